@@ -1,11 +1,18 @@
+import contextlib
+import operator
 import os
+import tempfile
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QAction, QDialog, QMessageBox, QDialogButtonBox  # Import QDialogButtonBox
 from qgis.core import (
+    QgsApplication,
     QgsProject,
     QgsFeature,
     QgsGeometry,
+    QgsFeatureRequest,
     QgsField,
+    QgsFields,
+    QgsSpatialIndex,
     QgsVectorLayer,
     QgsPointXY,
 )
@@ -13,6 +20,24 @@ from qgis.PyQt.QtCore import QVariant
 from PyQt5.QtGui import QIcon
 
 from .CreateGridPlugin_dialog import CreateGridPluginDialog
+from .CreateGridPlugin_adjacency import AdjacencyTable, sidecar_path
+from .CreateGridPlugin_cache import AdjacencyCache
+from .CreateGridPlugin_clip import BoundaryClip
+from .CreateGridPlugin_feedback import GridFeedback
+from .CreateGridPlugin_index import GridIndex
+from .CreateGridPlugin_live import LiveAdjacency
+from .CreateGridPlugin_memory import CELL_FEATURE_BYTES, CELL_LAYER_BYTES, MemoryBudget, snapshot_bytes
+from .CreateGridPlugin_output import GRID_FILE_CHUNK_SIZE, GridFileWriter, grid_file_driver, open_grid_file
+from .CreateGridPlugin_provider import CreateGridProvider
+from .CreateGridPlugin_tasks import AssignAdjacencyTask, CreateGridTask, LayerSnapshot
+from . import CreateGridPlugin_cache as grid_cache
+from . import CreateGridPlugin_core as grid_core
+from . import CreateGridPlugin_engine as grid_engine
+from . import CreateGridPlugin_formats as grid_formats
+from . import CreateGridPlugin_hex as grid_hex
+from . import CreateGridPlugin_neighbourhood as grid_neighbourhood
+from . import CreateGridPlugin_tiles as grid_tiles
+from .CreateGridPlugin_trace import TraceSpan, configure_from_environment, logger, trace_stage
 
 
 class CreateGridPlugin:
@@ -20,8 +45,13 @@ class CreateGridPlugin:
         self.iface = iface
         self.plugin_dir = os.path.dirname(__file__)
         self.dialog = None
+        self.active_task = None
+        self.provider = None
+        self.live_adjacency = {}
+        self.cache = None
         self.actions = []
         self.menu = "&Create Grid"
+        configure_from_environment()
 
     def add_action(
         self,
@@ -58,12 +88,26 @@ class CreateGridPlugin:
         self.actions.append(action)
         return action
 
+    def initProcessing(self):
+        """Register the Processing provider, also called by qgis_process without a GUI."""
+        if self.provider is None:
+            self.provider = CreateGridProvider(self)
+            QgsApplication.processingRegistry().addProvider(self.provider)
+
     def initGui(self):
+        self.initProcessing()
         icon_path = os.path.join(self.plugin_dir, "icon.png")
         if os.path.exists(icon_path):
             self.add_action(icon_path, "Create Grid", self.run)
 
     def unload(self):
+        self.cancel_task()
+        for live_adjacency in self.live_adjacency.values():
+            live_adjacency.detach()
+        self.live_adjacency = {}
+        if self.provider is not None:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+            self.provider = None
         for action in self.actions:
             self.iface.removePluginMenu(self.menu, action)
             self.iface.removeToolBarIcon(action)
@@ -95,53 +139,183 @@ class CreateGridPlugin:
             self.handle_task()
 
     def handle_task(self):
-        try:
-            # Reset the progress bar
-            self.dialog.progressBar.setValue(0)
-            
-            out_path = self.dialog.get_out_path()
-
-            # Validate output path
-            if not out_path or not os.path.isdir(os.path.dirname(out_path)):
-                QMessageBox.warning(None, "Invalid Output Path", "Please provide a valid output file path.")
-                return
+        """
+        Validate the dialog inputs and start the matching background task.
+        The heavy stages run in the QGIS task manager, the OK button is
+        re-enabled by task_finished once the task is done.
+        """
+        # Reset the progress bar
+        self.dialog.progressBar.setValue(0)
 
-            if self.dialog.radioButtonAddAdjacency.isChecked():
-                # Update adjacency fields in an existing grid layer
-                existing_grid_layer_name = self.dialog.get_existing_grid_layer()
-                grid_field_name = self.dialog.get_existing_grid_field()
+        task = self.build_task()
+        if task is None:
+            self.dialog.buttonBox.button(QDialogButtonBox.Ok).setEnabled(True)
+            return
 
-                if not existing_grid_layer_name or not grid_field_name:
-                    QMessageBox.warning(None, "Update Grid", "Please select a valid layer and field.")
-                    return
+        task.progressChanged.connect(lambda progress: self.dialog.progressBar.setValue(int(progress)))
+        self.active_task = task  # Keep a reference, the task manager does not own the Python object
+        QgsApplication.taskManager().addTask(task)
 
-                grid_layers = QgsProject.instance().mapLayersByName(existing_grid_layer_name)
-                if not grid_layers:
-                    QMessageBox.warning(None, "Update Grid", f"Layer '{existing_grid_layer_name}' not found.")
-                    return
+    def build_task(self):
+        """
+        Build the background task for the current dialog inputs, or return None
+        after warning the user when the inputs are invalid.
+        """
+        out_path = self.dialog.get_out_path()
 
-                grid_layer = grid_layers[0]
-                self.assign_adjacency_from_existing_layer(grid_layer, grid_field_name, out_path)
-                QMessageBox.information(None, "Task Completed", "Adjacency updated successfully and report saved.")
-            else:
-                # Create a new grid as a memory layer
-                selected_layer_name = self.dialog.get_selected_layer()
-                length = self.dialog.get_length()
-                width = self.dialog.get_width()
+        # Validate output path
+        if not out_path or not os.path.isdir(os.path.dirname(out_path)):
+            QMessageBox.warning(None, "Invalid Output Path", "Please provide a valid output file path.")
+            return None
 
-                if not selected_layer_name or length <= 0 or width <= 0:
-                    QMessageBox.warning(None, "Create Grid", "Please provide valid inputs.")
-                    return
+        if self.dialog.radioButtonAddAdjacency.isChecked():
+            # Update adjacency fields in an existing grid layer
+            existing_grid_layer_name = self.dialog.get_existing_grid_layer()
+            grid_field_name = self.dialog.get_existing_grid_field()
+
+            if not existing_grid_layer_name or not grid_field_name:
+                QMessageBox.warning(None, "Update Grid", "Please select a valid layer and field.")
+                return None
+
+            grid_layers = QgsProject.instance().mapLayersByName(existing_grid_layer_name)
+            if not grid_layers:
+                QMessageBox.warning(None, "Update Grid", f"Layer '{existing_grid_layer_name}' not found.")
+                return None
+
+            adjacency_mode = self.dialog.get_adjacency_mode()
+            write_sidecar = self.dialog.get_write_sidecar()
+            undo = self.dialog.get_undo()
+            live = self.dialog.get_live_adjacency()
+            neighbourhood = self.dialog.get_neighbourhood()
+            as_list = self.dialog.get_neighbour_list()
+            if adjacency_mode == "topology" and (neighbourhood != "8" or as_list):
+                QMessageBox.warning(None, "Update Grid", "Neighbours from geometry only fill the eight adjacency fields.")
+                return None
+            if grid_neighbourhood.ring_size(neighbourhood) and not grid_engine.HAS_NUMPY:
+                QMessageBox.warning(None, "Update Grid", "Ring neighbourhoods require NumPy.")
+                return None
+            columns = [grid_field_name] + grid_neighbourhood.neighbourhood_fields(neighbourhood, as_list)
+            if not self.check_report(out_path, columns):
+                return None
+            return AssignAdjacencyTask(self, grid_layers[0], grid_field_name, out_path, adjacency_mode, write_sidecar,
+                                       undo, live, self.dialog_memory_budget(), neighbourhood, as_list)
+
+        # Create a new grid as a memory layer, or streamed to a grid file
+        selected_layer_name = self.dialog.get_selected_layer()
+        length = self.dialog.get_length()
+        width = self.dialog.get_width()
+        cell_shape = self.dialog.get_cell_shape()
+
+        # Hexagons are only sized by their width
+        if not selected_layer_name or width <= 0 or (cell_shape == "square" and length <= 0):
+            QMessageBox.warning(None, "Create Grid", "Please provide valid inputs.")
+            return None
+
+        grid_path = self.dialog.get_grid_path() or None
+        if grid_path:
+            try:
+                grid_file_driver(grid_path)
+            except ValueError as e:
+                QMessageBox.warning(None, "Invalid Grid File", str(e))
+                return None
+            if not os.path.isdir(os.path.dirname(grid_path)):
+                QMessageBox.warning(None, "Invalid Grid File", "Please provide a valid grid file path.")
+                return None
+
+        boundary_layers = QgsProject.instance().mapLayersByName(selected_layer_name)
+        if not boundary_layers:
+            QMessageBox.warning(None, "Create Grid", f"Layer '{selected_layer_name}' not found.")
+            return None
+
+        engine = self.dialog.get_engine()
+        chunk_size = self.dialog.get_chunk_size()
+        clip_mode = self.dialog.get_clip_mode()
+        write_sidecar = self.dialog.get_write_sidecar()
+        if cell_shape != "square" and not grid_engine.HAS_NUMPY:
+            QMessageBox.warning(None, "Create Grid", "Hexagonal grids require NumPy.")
+            return None
+        if cell_shape != "square" and clip_mode:
+            QMessageBox.warning(None, "Create Grid", "Hexagonal grids cannot be clipped to the boundary.")
+            return None
+        if not self.check_report(out_path, ["GridNo"] + grid_hex.neighbour_fields(cell_shape)):
+            return None
+        memory_budget = self.dialog_memory_budget()
+        if not grid_path and not self.memory_layer_fits(boundary_layers[0], length, width, cell_shape, memory_budget):
+            QMessageBox.warning(None, "Create Grid", "The grid does not fit the memory budget as a memory layer. "
+                                                     "Please choose a grid file to stream it to.")
+            return None
+        return CreateGridTask(self, boundary_layers[0], length, width, out_path, engine, chunk_size, clip_mode,
+                              write_sidecar, grid_path, memory_budget, cell_shape)
 
-                self.create_new_grid(selected_layer_name, length, width, out_path)
-                QMessageBox.information(None, "Task Completed", "New grid created successfully and report saved.")
-        finally:
-            # Re-enable the OK button and ensure progress bar is at 100%
+    def check_report(self, out_path, columns):
+        """Return True if the report can be written, otherwise warn the user and return False."""
+        try:
+            grid_formats.check_report_file(out_path, columns)
+        except (RuntimeError, ValueError) as e:
+            QMessageBox.warning(None, "Invalid Output Path", str(e))
+            return False
+        return True
+
+    def dialog_memory_budget(self):
+        """Return a MemoryBudget for the dialog's memory budget, or None when no budget is set."""
+        megabytes = self.dialog.get_memory_budget()
+        return MemoryBudget.from_megabytes(megabytes) if megabytes else None
+
+    def task_finished(self, task, result):
+        """Called on the main thread when a background task ends."""
+        if task is self.active_task:
+            self.active_task = None
+        if self.dialog:
             self.dialog.buttonBox.button(QDialogButtonBox.Ok).setEnabled(True)
-            self.dialog.progressBar.setValue(100)
+            if result:
+                self.dialog.progressBar.setValue(100)
+
+    def cancel_task(self):
+        """Cancel the running background task, return True if there was one."""
+        if self.active_task is None:
+            return False
+        self.active_task.cancel()
+        return True
+
+    def set_live_adjacency(self, grid_layer, grid_field_name, enabled=True):
+        """
+        Turn live adjacency on or off for a grid layer. While it is on, edits
+        to the layer only recompute the adjacency of the touched cells.
+        """
+        current = self.live_adjacency.pop(grid_layer.id(), None)
+        if current is not None:
+            current.detach()
+        if enabled:
+            self.live_adjacency[grid_layer.id()] = LiveAdjacency(
+                grid_layer, grid_field_name, on_deleted=self.live_adjacency_deleted
+            )
+
+    def live_adjacency_deleted(self, layer_id):
+        """Forget the live adjacency of a grid layer that is being deleted."""
+        self.live_adjacency.pop(layer_id, None)
+
+    def grid_index(self, grid_layer, grid_field_name):
+        """
+        Build the GridIndex of a grid layer, for label, fid and (row, col)
+        lookups and neighbour queries without reading the layer again.
+        Other plugins reach it through qgis.utils.plugins["CreateGrid"].
+        """
+        if not grid_engine.HAS_NUMPY:
+            raise RuntimeError("NumPy is required for the grid index.")
+        return GridIndex.from_layer(grid_layer, grid_field_name)
+
+    def resolve_feedback(self, feedback=None):
+        """
+        Return the feedback a stage should use: the given one, else one driving
+        the dialog progress bar, else a silent one for headless use.
+        """
+        if feedback is not None:
+            return feedback
+        if self.dialog:
+            return GridFeedback.for_progress_bar(self.dialog.progressBar)
+        return GridFeedback()
 
 
-            
 
     def handle_task_1(self):
         # Reset the progress bar
@@ -186,79 +360,443 @@ class CreateGridPlugin:
             QMessageBox.information(None, "Task Completed", "New grid created successfully and report saved.")
 
 
-    def assign_adjacency_from_existing_layer(self, grid_layer, grid_field_name, out_path):
+    def assign_adjacency_from_existing_layer(self, grid_layer, grid_field_name, out_path, feedback=None, mode="label",
+                                             write_sidecar=False, undo=False, report_columns=None, use_cache=True,
+                                             memory_budget=None, neighbourhood="8", as_list=False):
         """
         Assign adjacency attributes to an existing grid layer and save the result to a text file.
+        Progress goes to feedback and the work stops once feedback is canceled.
+        mode "label" decodes 'A1'/'AA2' style labels, mode "topology" finds the
+        neighbours from the cell geometries instead.
+        With write_sidecar, the neighbour table is also saved as a binary sidecar next to out_path.
+        The new values are written in batches straight to the data provider,
+        unless undo is set, in which case they go through the layer's edit buffer.
+        Only the cells whose adjacency values change are written.
+        report_columns optionally replaces the default report columns.
+        With use_cache, the neighbour table of an unchanged layer is taken from
+        the adjacency cache instead of being recomputed.
+        With memory_budget (a MemoryBudget), the stage peaks are tracked and a
+        layer whose snapshot would not fit is processed in chunks.
+        neighbourhood ("8", "4" or "ring2" to "ring5") selects the neighbour
+        cells in label mode; they are written to one field per neighbour, or
+        with as_list to the single Neighbours field. Other neighbourhoods than
+        the eight adjacency fields are not cached.
+        grid_layer may also be a LayerSnapshot taken on the main thread, the
+        changes then go through it and the layer itself is not read here.
         """
-        print("\nStarting adjacency assignment for existing layer...\n")
+        custom = neighbourhood != grid_neighbourhood.DEFAULT_NEIGHBOURHOOD or as_list
+        if custom and mode != "label":
+            raise ValueError("Only label mode supports other neighbourhoods than the eight adjacency fields.")
+
+        feedback = self.resolve_feedback(feedback)
+        logger.info("Starting %s adjacency assignment for existing layer", mode)
+        adjacency_span = TraceSpan("topology adjacency" if mode == "topology" else "adjacency")
+        adjacency_span.start()
+
+        with memory_budget or contextlib.nullcontext():
+            value_fields = grid_neighbourhood.neighbourhood_fields(neighbourhood, as_list)
+            self.add_adjacency_fields(grid_layer, value_fields)
+            chunk_size = self.adjacency_chunk_size(grid_layer, mode, undo, memory_budget, neighbourhood)
+            with self.memory_stage(memory_budget, "adjacency"):
+                if chunk_size:
+                    logger.info("Snapshot exceeds the memory budget, assigning adjacency in chunks of %d cells",
+                                chunk_size)
+                    table = None
+                    assigned = self.assign_adjacency_in_chunks(grid_layer, grid_field_name, chunk_size, feedback,
+                                                               neighbourhood, as_list)
+                elif custom:
+                    table, assigned = self.assign_neighbourhood_values(grid_layer, grid_field_name, neighbourhood,
+                                                                       as_list, feedback, undo)
+                else:
+                    table, assigned = self.assign_adjacency_values(grid_layer, grid_field_name, feedback, mode,
+                                                                   write_sidecar, undo, use_cache)
+            if assigned is None:
+                logger.info("Adjacency assignment canceled")
+                return
+            grid_layer.triggerRepaint()
+            adjacency_span.stop(assigned)
+            adjacency_span.report()
+
+            if out_path:
+                if isinstance(grid_layer, LayerSnapshot):
+                    # The report reads back the values the snapshot wrote to the layer
+                    grid_layer.refresh()
+                with self.memory_stage(memory_budget, "export"):
+                    if custom:
+                        report_table = None
+                        report_columns = report_columns or [grid_field_name] + value_fields
+                    else:
+                        report_table = table if report_columns is None else None
+                    self.export_grid_to_txt(grid_layer, out_path, grid_field_name, feedback, report_columns,
+                                            report_table, use_cache=use_cache and mode == "label")
+                if write_sidecar:
+                    if table is None:
+                        logger.warning("No adjacency table was built, skipping the adjacency sidecar.")
+                    else:
+                        path = sidecar_path(out_path)
+                        table.save(path)
+                        logger.info("Adjacency sidecar saved to %s", path)
+
+        if memory_budget is not None:
+            memory_budget.report()
+        logger.info("Adjacency assignment for existing layer completed")
+        feedback.set_progress(100)
+
+    def assign_adjacency_values(self, grid_layer, grid_field_name, feedback=None, mode="label", write_sidecar=False,
+                                undo=False, use_cache=True):
+        """
+        Compute and write the adjacency of the whole layer from one snapshot.
+        Returns (table, cell count), table being the AdjacencyTable when one was
+        built (for the cache or the sidecar), or (None, None) if feedback was canceled.
+        """
+        fids, labels, current_values = self.read_adjacency_snapshot(grid_layer, grid_field_name)
+        logger.info("Total features in grid_layer: %d", len(fids))
+
+        cache = self.adjacency_cache() if use_cache and grid_engine.HAS_NUMPY else None
+        if cache is not None:
+            cache_key = self.adjacency_cache_key(grid_layer, grid_field_name, mode)
+            layer_fingerprint = self.layer_fingerprint(grid_layer, fids, labels, mode)
+            table = cache.get(*cache_key, layer_fingerprint)
+        else:
+            table = None
 
-        adjacency_fields = [
-            "Left", "Top_Left", "Top", "Top_Right",
-            "Right", "Bottom_Right", "Bottom", "Bottom_Left"
-        ]
+        if table is not None:
+            logger.info("Reusing the cached adjacency table")
+            neighbour_values = grid_neighbourhood.neighbour_values(table)
+        else:
+            if mode == "topology":
+                result = self.topology_neighbours(grid_layer, grid_field_name, feedback)
+                neighbours = None if result is None else result[0]
+                no_neighbours = [""] * len(grid_engine.ADJACENCY_FIELDS)
+                neighbour_values = None if neighbours is None else [neighbours.get(fid, no_neighbours) for fid in fids]
+            elif grid_engine.HAS_NUMPY:
+                # The int32 table comes straight from the vectorized lookup and the values are read from it
+                table = grid_neighbourhood.neighbourhood_table(labels, feedback=feedback)
+                neighbour_values = None if table is None else grid_neighbourhood.neighbour_values(table)
+            else:
+                neighbour_values = grid_core.label_adjacency(labels, feedback)
+            if neighbour_values is None:
+                return None, None
+            if table is None and grid_engine.HAS_NUMPY and (cache is not None or write_sidecar):
+                table = AdjacencyTable.from_neighbour_labels(labels, neighbour_values)
+            if cache is not None:
+                cache.put(*cache_key, layer_fingerprint, table)
+
+        updates = self.adjacency_updates(grid_layer, fids, current_values, neighbour_values)
+        logger.info("Cells with changed adjacency: %d", len(updates))
+        if not self.write_attribute_updates(grid_layer, updates, feedback, undo):
+            return None, None
+        return table, len(fids)
+
+    def assign_neighbourhood_values(self, grid_layer, grid_field_name, neighbourhood, as_list=False, feedback=None,
+                                    undo=False):
+        """
+        Compute and write a label mode neighbourhood of the whole layer, with
+        the vectorized neighbour table, to one field per neighbour or to the list field.
+        Returns (table, cell count), or (None, None) if feedback was canceled.
+        """
+        if not grid_engine.HAS_NUMPY:
+            raise RuntimeError("NumPy is required for other neighbourhoods than the eight adjacency fields.")
+        value_fields = grid_neighbourhood.neighbourhood_fields(neighbourhood, as_list)
+        fids, labels, current_values = self.read_adjacency_snapshot(grid_layer, grid_field_name,
+                                                                    value_fields=value_fields)
+        logger.info("Total features in grid_layer: %d", len(fids))
+        if feedback is not None and feedback.canceled:
+            return None, None
+
+        table = grid_neighbourhood.neighbourhood_table(labels, neighbourhood)
+        values = grid_neighbourhood.neighbour_values(table, as_list)
+        updates = self.adjacency_updates(grid_layer, fids, current_values, values, value_fields)
+        logger.info("Cells with changed %s neighbourhood: %d", neighbourhood, len(updates))
+        if not self.write_attribute_updates(grid_layer, updates, feedback, undo):
+            return None, None
+        return table, len(fids)
+
+    def assign_adjacency_in_chunks(self, grid_layer, grid_field_name, chunk_size, feedback=None, neighbourhood="8",
+                                   as_list=False):
+        """
+        Label mode adjacency that never holds the whole layer snapshot: the
+        labels are read first, then the current values are read, compared and
+        written chunk_size cells at a time, straight to the data provider.
+        neighbourhood and as_list select the values as in
+        assign_adjacency_from_existing_layer, other neighbourhoods than the
+        eight adjacency fields need NumPy.
+        Returns the cell count, or None if feedback was canceled.
+        """
+        feedback = self.resolve_feedback(feedback)
+        custom = neighbourhood != grid_neighbourhood.DEFAULT_NEIGHBOURHOOD or as_list
+        if custom and not grid_engine.HAS_NUMPY:
+            raise RuntimeError("NumPy is required for other neighbourhoods than the eight adjacency fields.")
+        value_fields = grid_neighbourhood.neighbourhood_fields(neighbourhood, as_list)
+        fids, all_labels = self.read_labels(grid_layer, grid_field_name)
+        # Every chunk looks its neighbours up among the labels of the whole layer
+        existing = grid_neighbourhood.CellLookup(all_labels) if grid_engine.HAS_NUMPY else set(all_labels)
+        del all_labels
+        logger.info("Total features in grid_layer: %d", len(fids))
+
+        total_features = max(len(fids), 1)
+        changed = 0
+        for start in range(0, len(fids), chunk_size):
+            if feedback.canceled:
+                if changed:
+                    logger.warning("Canceled after writing %d changed cells, the layer is only partly updated.",
+                                   changed)
+                return None
+            chunk_fids, labels, current_values = self.read_adjacency_snapshot(
+                grid_layer, grid_field_name, fids[start:start + chunk_size], value_fields
+            )
+            if custom:
+                neighbour_values = grid_neighbourhood.lookup_neighbour_values(labels, existing, neighbourhood,
+                                                                              as_list=as_list)
+            else:
+                neighbour_values = grid_core.label_adjacency(labels, existing=existing)
+            updates = self.adjacency_updates(grid_layer, chunk_fids, current_values, neighbour_values, value_fields)
+            # Chunk progress is reported here, the writer runs silently
+            self.write_attribute_updates(grid_layer, updates, GridFeedback())
+            changed += len(updates)
+            feedback.set_progress(min(start + chunk_size, len(fids)) * 100 / total_features)
+        logger.info("Cells with changed adjacency: %d", changed)
+        return len(fids)
+
+    def adjacency_chunk_size(self, grid_layer, mode="label", undo=False, memory_budget=None, neighbourhood="8"):
+        """
+        Return the chunk size of the chunked adjacency path when the layer
+        snapshot, which grows with the neighbourhood, would not fit in
+        memory_budget, else None.
+        """
+        cell_bytes = snapshot_bytes(grid_neighbourhood.neighbour_count(neighbourhood))
+        if memory_budget is None or memory_budget.fits(grid_layer.featureCount(), cell_bytes):
+            return None
+        if mode != "label" or undo:
+            logger.warning("%s adjacency needs the whole layer in memory, the memory budget may be exceeded.",
+                           "Undoable" if undo else "Topology")
+            return None
+        return memory_budget.chunk_size(cell_bytes)
 
+    def adjacency_updates(self, grid_layer, fids, current_values, new_values, value_fields=None):
+        """
+        Return the {fid: {field_index: value}} map of the cells whose values
+        of value_fields (by default the adjacency fields) change.
+        """
+        fields = grid_layer.fields()
+        value_indexes = [fields.indexOf(field) for field in value_fields or grid_engine.ADJACENCY_FIELDS]
+        return {
+            fid: dict(zip(value_indexes, values))
+            for fid, old_values, values in zip(fids, current_values, new_values)
+            if old_values != values
+        }
+
+    def memory_stage(self, memory_budget, name):
+        """Return memory_budget.stage(name), or a no-op context without a budget."""
+        return contextlib.nullcontext() if memory_budget is None else memory_budget.stage(name)
+
+    def assign_adjacency_by_topology(self, grid_layer, grid_field_name, out_path, feedback=None, write_sidecar=False,
+                                     undo=False, report_columns=None, use_cache=True):
+        """
+        Assign adjacency attributes from the cell geometries, for grids whose
+        labels cannot be decoded (numeric ids, UUIDs, irregular cells).
+        """
+        self.assign_adjacency_from_existing_layer(grid_layer, grid_field_name, out_path, feedback, "topology",
+                                                  write_sidecar, undo, report_columns, use_cache)
+
+    def add_adjacency_fields(self, grid_layer, value_fields=None):
+        """Add the adjacency fields (or the given value_fields) the layer does not have yet."""
         existing_fields = [field.name() for field in grid_layer.fields()]
-        missing_fields = [field for field in adjacency_fields if field not in existing_fields]
+        missing_fields = [field for field in value_fields or grid_engine.ADJACENCY_FIELDS
+                          if field not in existing_fields]
         if missing_fields:
-            print(f"Adding missing fields: {missing_fields}")
+            logger.info("Adding missing fields: %s", missing_fields)
             grid_layer.dataProvider().addAttributes([QgsField(field, QVariant.String) for field in missing_fields])
             grid_layer.updateFields()
 
-        features = {feat[grid_field_name]: feat for feat in grid_layer.getFeatures()}
-        print(f"Total features in grid_layer: {len(features)}\n")
-
-        grid_layer.startEditing()
-
-        total_features = len(features)
-        processed_features = 0
-
-        for feature in grid_layer.getFeatures():
-            grid_no = feature[grid_field_name]
-            print(f"Processing feature with {grid_field_name}: {grid_no}")
-
-            row, col = self.parse_grid_label(grid_no)
-            print(f"Row: {row}, Column: {col}")
-
-            neighbors = {
-                "Left": self.generate_grid_label(row, col - 1),
-                "Top_Left": self.generate_grid_label(row - 1, col - 1),
-                "Top": self.generate_grid_label(row - 1, col),
-                "Top_Right": self.generate_grid_label(row - 1, col + 1),
-                "Right": self.generate_grid_label(row, col + 1),
-                "Bottom_Right": self.generate_grid_label(row + 1, col + 1),
-                "Bottom": self.generate_grid_label(row + 1, col),
-                "Bottom_Left": self.generate_grid_label(row + 1, col - 1),
-            }
-
-            updated_attrs = {}
-            for field, neighbor in neighbors.items():
-                if neighbor in features:
-                    updated_attrs[field] = features[neighbor][grid_field_name]
-                else:
-                    updated_attrs[field] = ""
+    def read_adjacency_snapshot(self, grid_layer, grid_field_name, fids=None, value_fields=None):
+        """
+        Return the feature ids, labels and current adjacency values (or values
+        of value_fields) of a grid layer, or of the features in `fids`, read in
+        one pass without geometries. Empty values are "".
+        """
+        fields = grid_layer.fields()
+        label_index = fields.indexOf(grid_field_name)
+        adjacency_indexes = [fields.indexOf(field) for field in value_fields or grid_engine.ADJACENCY_FIELDS]
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([label_index] + adjacency_indexes)
+        if fids is not None:
+            request.setFilterFids(fids)
+
+        fids, labels, current_values = [], [], []
+        for feature in grid_layer.getFeatures(request):
+            attributes = feature.attributes()
+            fids.append(feature.id())
+            value = attributes[label_index]
+            labels.append("" if value is None else str(value))
+            current_values.append(["" if attributes[index] is None else attributes[index] for index in adjacency_indexes])
+        return fids, labels, current_values
+
+    def read_labels(self, grid_layer, grid_field_name):
+        """Return the feature ids and labels of a grid layer, read without geometries or other attributes."""
+        label_index = grid_layer.fields().indexOf(grid_field_name)
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([label_index])
+
+        fids, labels = [], []
+        for feature in grid_layer.getFeatures(request):
+            fids.append(feature.id())
+            value = feature.attributes()[label_index]
+            labels.append("" if value is None else str(value))
+        return fids, labels
+
+    def geometry_wkbs(self, grid_layer):
+        """Yield the WKB bytes of every feature geometry in iteration order, without attributes."""
+        request = QgsFeatureRequest().setNoAttributes()
+        for feature in grid_layer.getFeatures(request):
+            yield bytes(feature.geometry().asWkb()) if feature.hasGeometry() else b""
+
+    def adjacency_cache(self):
+        """Return the persistent adjacency cache, kept in the QGIS profile folder."""
+        if self.cache is None:
+            path = os.path.join(QgsApplication.qgisSettingsDirPath(), "create_grid", "adjacency_cache.sqlite")
+            self.cache = AdjacencyCache(path)
+        return self.cache
+
+    def adjacency_cache_key(self, grid_layer, grid_field_name, mode="label"):
+        """
+        Return the (source, field, mode) key the neighbour table of a layer is
+        cached under. Memory layers all report a "Polygon?crs=..." source, so
+        they are keyed by their layer id instead.
+        """
+        if grid_layer.providerType() == "memory":
+            source = f"memory:{grid_layer.id()}"
+        else:
+            source = f"{grid_layer.providerType()}:{grid_layer.source()}"
+        return source, grid_field_name, mode
+
+    def layer_fingerprint(self, grid_layer, fids, labels, mode="label"):
+        """Return the cache fingerprint of a layer whose feature ids and labels were read."""
+        extent = grid_layer.extent()
+        # Topology neighbours follow the cell shapes, moved or reshaped cells must miss the cache
+        geometries = self.geometry_wkbs(grid_layer) if mode == "topology" else None
+        return grid_cache.fingerprint(
+            fids, labels, (extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()), geometries
+        )
+
+    def cached_adjacency_table(self, grid_layer, grid_field_name):
+        """
+        Return the label mode AdjacencyTable cached for the unchanged layer,
+        or None when there is none. Only the feature ids and labels are read.
+        """
+        if not grid_engine.HAS_NUMPY:
+            return None
+        fids, labels = self.read_labels(grid_layer, grid_field_name)
+        return self.adjacency_cache().get(*self.adjacency_cache_key(grid_layer, grid_field_name),
+                                          self.layer_fingerprint(grid_layer, fids, labels))
 
-            for field, value in updated_attrs.items():
-                if field in feature.fields().names():
-                    feature.setAttribute(field, value)
+    def write_attribute_updates(self, grid_layer, updates, feedback=None, undo=False, batch_size=50000):
+        """
+        Write a {fid: {field_index: value}} map to the layer.
+        Without undo, the values go straight to the data provider with one
+        changeAttributeValues call per batch, skipping the edit buffer; batches
+        written before a cancel are kept and a warning says the layer is only
+        partly updated. With undo, they go through the edit buffer as one edit
+        command that is dropped on cancel. It is committed unless the layer
+        was already being edited, in which case the user's pending edits stay
+        uncommitted along with it. Must run on the layer's (main) thread.
+        Returns False if feedback was canceled.
+        """
+        feedback = self.resolve_feedback(feedback)
+        total_features = max(len(updates), 1)
+
+        if undo:
+            was_editing = grid_layer.isEditable()
+            if not was_editing:
+                grid_layer.startEditing()
+            grid_layer.beginEditCommand("Assign adjacency")
+            for processed_features, (fid, attributes) in enumerate(updates.items(), 1):
+                if feedback.canceled:
+                    grid_layer.destroyEditCommand()
+                    if not was_editing:
+                        grid_layer.rollBack()
+                    return False
+                grid_layer.changeAttributeValues(fid, attributes)
+                if processed_features % batch_size == 0:
+                    feedback.set_progress(int((processed_features / total_features) * 100))
+            grid_layer.endEditCommand()
+            if was_editing:
+                logger.warning("The layer was already being edited, the adjacency changes are left uncommitted.")
+            else:
+                grid_layer.commitChanges()
+            return True
 
-            grid_layer.updateFeature(feature)
+        provider = grid_layer.dataProvider()
+        batch = {}
+        written = 0
+        for processed_features, (fid, attributes) in enumerate(updates.items(), 1):
+            batch[fid] = attributes
+            if len(batch) >= batch_size:
+                if feedback.canceled:
+                    if written:
+                        logger.warning("Canceled after writing %d of %d changed cells, the layer is only partly "
+                                       "updated.", written, len(updates))
+                    return False
+                provider.changeAttributeValues(batch)
+                written += len(batch)
+                batch = {}
+                feedback.set_progress(int((processed_features / total_features) * 100))
+        if batch:
+            provider.changeAttributeValues(batch)
+        return True
+
+    def topology_neighbours(self, grid_layer, grid_field_name, feedback=None):
+        """
+        Return ({fid: [value per ADJACENCY_FIELDS entry]}, {fid: label}) computed from the geometries.
+        Candidates come from a QgsSpatialIndex bounding box lookup and are kept
+        when they intersect the cell; the direction is the centroid bearing
+        snapped to the nearest 45 degrees, the closest centroid wins a direction.
+        Returns None if feedback was canceled.
+        """
+        feedback = self.resolve_feedback(feedback)
+        request = QgsFeatureRequest().setSubsetOfAttributes([grid_field_name], grid_layer.fields())
+        geometries = {}
+        centroids = {}
+        labels = {}
+        index = QgsSpatialIndex()
+        for feature in grid_layer.getFeatures(request):
+            if not feature.hasGeometry():
+                continue
+            fid = feature.id()
+            geometries[fid] = feature.geometry()
+            centroids[fid] = feature.geometry().centroid().asPoint()
+            value = feature[grid_field_name]
+            labels[fid] = "" if value is None else str(value)
+            index.insertFeature(feature)
+
+        total_features = max(len(geometries), 1)
+        neighbours = {}
+        for processed_features, (fid, geometry) in enumerate(geometries.items(), 1):
+            if feedback.canceled:
+                return None
+
+            engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+            engine.prepareGeometry()
+            center = centroids[fid]
+
+            values = [""] * len(grid_engine.ADJACENCY_FIELDS)
+            distances = [None] * len(grid_engine.ADJACENCY_FIELDS)
+            for candidate in index.intersects(geometry.boundingBox()):
+                if candidate == fid or not engine.intersects(geometries[candidate].constGet()):
+                    continue
+                other = centroids[candidate]
+                dx, dy = other.x() - center.x(), other.y() - center.y()
+                direction = grid_engine.bearing_direction(dx, dy)
+                distance = dx * dx + dy * dy
+                if distances[direction] is None or distance < distances[direction]:
+                    distances[direction] = distance
+                    values[direction] = labels[candidate]
+            neighbours[fid] = values
 
-            processed_features += 1
             progress = int((processed_features / total_features) * 100)
-            self.dialog.progressBar.setValue(progress)
-
-        grid_layer.commitChanges()
-        grid_layer.triggerRepaint()
-
-        if out_path:
-            self.export_grid_to_txt(grid_layer, out_path, grid_field_name)
-
-        print("\nAdjacency assignment for existing layer completed.\n")
-        self.dialog.progressBar.setValue(100)
-
-
-
+            feedback.set_progress(progress)
 
+        return neighbours, labels
 
     def assign_adjacency_from_existing_layer_1(self, grid_layer, grid_field_name, out_path):
         """
@@ -295,19 +833,19 @@ class CreateGridPlugin:
             print(f"Processing feature with {grid_field_name}: {grid_no}")
 
             # Parse grid label to row and column
-            row, col = self.parse_grid_label(grid_no)
+            row, col = grid_core.parse_grid_label(grid_no)
             print(f"Row: {row}, Column: {col}")
 
             # Determine adjacent grid numbers
             neighbors = {
-                "Left": self.generate_grid_label(row, col - 1),
-                "Top_Left": self.generate_grid_label(row - 1, col - 1),
-                "Top": self.generate_grid_label(row - 1, col),
-                "Top_Right": self.generate_grid_label(row - 1, col + 1),
-                "Right": self.generate_grid_label(row, col + 1),
-                "Bottom_Right": self.generate_grid_label(row + 1, col + 1),
-                "Bottom": self.generate_grid_label(row + 1, col),
-                "Bottom_Left": self.generate_grid_label(row + 1, col - 1),
+                "Left": grid_core.generate_grid_label(row, col - 1),
+                "Top_Left": grid_core.generate_grid_label(row - 1, col - 1),
+                "Top": grid_core.generate_grid_label(row - 1, col),
+                "Top_Right": grid_core.generate_grid_label(row - 1, col + 1),
+                "Right": grid_core.generate_grid_label(row, col + 1),
+                "Bottom_Right": grid_core.generate_grid_label(row + 1, col + 1),
+                "Bottom": grid_core.generate_grid_label(row + 1, col),
+                "Bottom_Left": grid_core.generate_grid_label(row + 1, col - 1),
             }
 
             # Update feature attributes with neighbor grid numbers
@@ -340,177 +878,438 @@ class CreateGridPlugin:
         self.dialog.progressBar.setValue(100)  # Ensure progress bar is set to 100% at the end
 
 
-    def create_new_grid(self, layer_name, length, width, out_path):
+    def create_new_grid(self, layer_name, length, width, out_path, engine="loop", chunk_size=None, clip_mode=None,
+                        write_sidecar=False, grid_path=None, cell_shape="square"):
         boundary_layers = QgsProject.instance().mapLayersByName(layer_name)
         if not boundary_layers:
             QMessageBox.warning(None, "Create Grid", f"Layer '{layer_name}' not found.")
             return
         boundary_layer = boundary_layers[0]
 
-        crs = boundary_layer.crs()
-        grid_layer = QgsVectorLayer("Polygon?crs=" + crs.authid(), "Generated Grid", "memory")
-        if not grid_layer.isValid():
-            QMessageBox.warning(None, "Create Grid", "Failed to create memory layer.")
+        try:
+            grid_layer = self.build_new_grid(boundary_layer, length, width, out_path, engine, chunk_size, clip_mode,
+                                             write_sidecar, grid_path=grid_path, cell_shape=cell_shape)
+        except (RuntimeError, ValueError) as e:
+            QMessageBox.warning(None, "Create Grid", str(e))
             return
 
-        provider = grid_layer.dataProvider()
-        provider.addAttributes([
-            QgsField("GridNo", QVariant.String),
-            QgsField("Left", QVariant.String),
-            QgsField("Top_Left", QVariant.String),
-            QgsField("Top", QVariant.String),
-            QgsField("Top_Right", QVariant.String),
-            QgsField("Right", QVariant.String),
-            QgsField("Bottom_Right", QVariant.String),
-            QgsField("Bottom", QVariant.String),
-            QgsField("Bottom_Left", QVariant.String),
-        ])
-        grid_layer.updateFields()
-
-        self.generate_grid(boundary_layer, grid_layer, length, width)
         QgsProject.instance().addMapLayer(grid_layer)
-        self.export_grid_to_txt(grid_layer, out_path)
         QMessageBox.information(None, "Create Grid", "Grid created successfully and saved to file.")
 
-    def generate_grid(self, boundary_layer, grid_layer, length, width):
-        features = []
+    def build_new_grid(self, boundary_layer, length, width, out_path, engine="loop", chunk_size=None, clip_mode=None,
+                       write_sidecar=False, feedback=None, grid_path=None, report_columns=None, memory_budget=None,
+                       cell_shape="square", spill_dir=None):
+        """
+        Create the grid layer, fill it and export the report.
+        The grid is a memory layer, or with grid_path (.gpkg or .fgb) the cells
+        are streamed to that file as they are generated and the file is opened
+        as the returned layer.
+        report_columns optionally replaces the default report columns.
+        With memory_budget (a MemoryBudget), the stage peaks are tracked, the
+        chunk size is lowered to fit and a grid too large for a memory layer
+        is streamed to a GeoPackage in spill_dir instead; the caller owns
+        that directory. Without grid_path or spill_dir, such a grid raises ValueError.
+        cell_shape "hex_flat" or "hex_pointy" builds hexagons, see generate_grid.
+        Does not touch the project or the GUI so it can run inside a QgsTask,
+        returns None if feedback was canceled.
+        """
+        feedback = self.resolve_feedback(feedback)
+        with memory_budget or contextlib.nullcontext():
+            if memory_budget is not None:
+                chunk_size = memory_budget.chunk_size(CELL_FEATURE_BYTES, chunk_size)
+                if not grid_path and not self.memory_layer_fits(boundary_layer, length, width, cell_shape,
+                                                                memory_budget):
+                    if not spill_dir:
+                        raise ValueError("The grid does not fit the memory budget as a memory layer, "
+                                         "give a grid file to stream it to.")
+                    grid_path = os.path.join(spill_dir, "grid.gpkg")
+                    logger.warning("The grid does not fit the memory budget as a memory layer, streaming it to %s",
+                                   grid_path)
+
+            with self.memory_stage(memory_budget, "generation"):
+                if grid_path:
+                    # Always stream in chunks, so the file output keeps memory flat
+                    chunk_size = chunk_size or GRID_FILE_CHUNK_SIZE
+                    fields = self.grid_fields(cell_shape)
+                    with trace_stage("generation") as span, \
+                            GridFileWriter(grid_path, fields, boundary_layer.crs()) as grid_file:
+                        table = self.generate_grid(boundary_layer, None, length, width, engine, chunk_size, clip_mode,
+                                                   feedback, build_table=write_sidecar, sink=grid_file, fields=fields,
+                                                   cell_shape=cell_shape)
+                        span.cells = grid_file.written
+                        if feedback.canceled:
+                            grid_file.discard()
+                            return None
+                    grid_layer = open_grid_file(grid_path)
+                else:
+                    grid_layer = self.create_grid_layer(boundary_layer.crs(), cell_shape)
+                    with trace_stage("generation") as span:
+                        table = self.generate_grid(boundary_layer, grid_layer, length, width, engine, chunk_size,
+                                                   clip_mode, feedback, build_table=write_sidecar,
+                                                   cell_shape=cell_shape)
+                        span.cells = grid_layer.featureCount()
+                    if feedback.canceled:
+                        return None
+
+            if out_path:
+                with self.memory_stage(memory_budget, "export"):
+                    columns = report_columns or ["GridNo"] + grid_hex.neighbour_fields(cell_shape)
+                    self.export_grid_to_txt(grid_layer, out_path, feedback=feedback, columns=columns)
+            if table is not None and out_path:
+                path = sidecar_path(out_path)
+                table.save(path)
+                logger.info("Adjacency sidecar saved to %s", path)
+
+        if memory_budget is not None:
+            memory_budget.report()
+        return grid_layer
+
+    def create_grid_layer(self, crs, cell_shape="square"):
+        """Create an empty polygon memory layer with the GridNo and neighbour fields of a cell shape."""
+        grid_layer = QgsVectorLayer("Polygon?crs=" + crs.authid(), "Generated Grid", "memory")
+        if not grid_layer.isValid():
+            raise RuntimeError("Failed to create memory layer.")
+
         provider = grid_layer.dataProvider()
+        provider.addAttributes(self.grid_fields(cell_shape).toList())
+        grid_layer.updateFields()
+        return grid_layer
+
+    def grid_fields(self, cell_shape="square"):
+        """Return the GridNo and neighbour fields of a generated grid, eight for squares and six for hexagons."""
+        fields = QgsFields()
+        for name in ["GridNo"] + grid_hex.neighbour_fields(cell_shape):
+            fields.append(QgsField(name, QVariant.String))
+        return fields
+
+    def memory_layer_fits(self, boundary_layer, length, width, cell_shape="square", memory_budget=None):
+        """Return True if the grid fits memory_budget as a memory layer, always True without a budget."""
+        if memory_budget is None:
+            return True
+        n_rows, n_cols = self.grid_size(boundary_layer, length, width, cell_shape)
+        return memory_budget.fits(n_rows * n_cols, CELL_LAYER_BYTES)
+
+    def grid_size(self, boundary_layer, length, width, cell_shape="square"):
+        """Return the (rows, columns) of the grid covering the boundary layer extent."""
+        orientation = grid_hex.hex_orientation(cell_shape)
+        if orientation is None:
+            layout = grid_core.GridLayout.from_extent(boundary_layer.extent(), length, width)
+            return layout.n_rows, layout.n_cols
+        extent = boundary_layer.extent()
+        return grid_hex.hex_dimensions(extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum(),
+                                       width, orientation)
+
+    def generate_grid(self, boundary_layer, grid_layer, length, width, engine="loop", chunk_size=None, clip_mode=None,
+                      feedback=None, build_table=False, sink=None, fields=None, cell_shape="square"):
+        """
+        Generate the grid cells covering the boundary layer extent.
+        The eight adjacency fields are filled while the cells are created,
+        since every cell's row and column are known here.
+        When chunk_size is set, cells are flushed to the data provider every
+        chunk_size features instead of being collected in one list.
+        With clip_mode ("intersects" or "within") only the cells meeting the
+        boundary geometry itself are kept, labels keep their extent position.
+        With build_table, the grid's AdjacencyTable is returned (needs NumPy).
+        Cells go to grid_layer's data provider, or to `sink` (any QgsFeatureSink,
+        e.g. a Processing output) with the given `fields`, grid_layer may then be None.
+        cell_shape "hex_flat" or "hex_pointy" builds hexagons `width` wide
+        across their edges instead, see generate_grid_hex; length and engine
+        do not apply to them and clip_mode is rejected with ValueError.
+        """
+        feedback = self.resolve_feedback(feedback)
+        orientation = grid_hex.hex_orientation(cell_shape)
+        if orientation is not None:
+            if not grid_engine.HAS_NUMPY:
+                raise RuntimeError("NumPy is required for hexagonal grids.")
+            if clip_mode:
+                raise ValueError("Hexagonal grids cannot be clipped to the boundary.")
+            return self.generate_grid_hex(boundary_layer, grid_layer, width, orientation, chunk_size=chunk_size,
+                                          feedback=feedback, build_table=build_table, sink=sink, fields=fields)
+        if engine in ("numpy", "tiled"):
+            if grid_engine.HAS_NUMPY:
+                if engine == "tiled":
+                    return self.generate_grid_tiled(boundary_layer, grid_layer, length, width, chunk_size=chunk_size,
+                                                    clip_mode=clip_mode, feedback=feedback, build_table=build_table,
+                                                    sink=sink, fields=fields)
+                return self.generate_grid_numpy(boundary_layer, grid_layer, length, width, chunk_size=chunk_size,
+                                                clip_mode=clip_mode, feedback=feedback, build_table=build_table,
+                                                sink=sink, fields=fields)
+            logger.warning("NumPy is not available, falling back to the loop engine.")
 
-        xmin, ymin, xmax, ymax = boundary_layer.extent().toRectF().getCoords()
-        x_start, y_start = xmin, ymax
-        row_number = 0
+        features = []
+        provider = sink if sink is not None else grid_layer.dataProvider()
+        insert_span = TraceSpan("provider insert")
+        fields = fields if fields is not None else grid_layer.fields()
+        grid_no_index = fields.indexOf("GridNo")
+        adjacency_indexes = [fields.indexOf(field) for field in grid_engine.ADJACENCY_FIELDS]
+
+        layout = grid_core.GridLayout.from_extent(boundary_layer.extent(), length, width)
+        total_rows, total_cols = layout.n_rows, layout.n_cols
+
+        # Kept cells of the whole grid, needed up front to know which neighbours exist
+        cell_mask = None
+        if clip_mode:
+            clip = BoundaryClip(boundary_layer, clip_mode)
+            cell_mask = clip.grid_mask(layout.xmin, layout.ymax, length, width, total_rows, total_cols)
+
+        for row_number in range(total_rows):
+            if feedback.canceled:
+                return
 
-        total_rows = int((ymax - ymin) // length) + 1
-        total_progress_steps = total_rows  # Adjust if needed
-        
+            for col_number in range(total_cols):
+                if cell_mask is not None and not cell_mask[row_number][col_number]:
+                    continue
 
-        while y_start > ymin:
-            col_number = 0
-            x_pos = x_start
-
-            while x_pos < xmax:
-                points = [
-                    QgsPointXY(x_pos, y_start),
-                    QgsPointXY(x_pos + width, y_start),
-                    QgsPointXY(x_pos + width, y_start - length),
-                    QgsPointXY(x_pos, y_start - length),
-                    QgsPointXY(x_pos, y_start),
-                ]
+                points = [QgsPointXY(x, y) for x, y in layout.cell_ring(row_number, col_number)]
                 grid_geom = QgsGeometry.fromPolygonXY([points])
-                grid_label = f"{chr(65 + row_number)}{col_number + 1}"
-                feature = QgsFeature(grid_layer.fields())
+                feature = QgsFeature(fields)
                 feature.setGeometry(grid_geom)
-                feature.setAttribute("GridNo", grid_label)
+                feature.setAttribute(grid_no_index, layout.cell_label(row_number, col_number))
+
+                neighbours = layout.neighbour_labels(row_number, col_number, cell_mask)
+                for field_index, neighbour in zip(adjacency_indexes, neighbours):
+                    if field_index >= 0:
+                        feature.setAttribute(field_index, neighbour)
                 features.append(feature)
-                x_pos += width
-                col_number += 1
 
-            y_start -= length
-            row_number += 1
+                if chunk_size and len(features) >= chunk_size:
+                    features = self.flush_features(provider, features, insert_span)
 
             # Update progress bar
-            progress = int((row_number / total_progress_steps) * 100)
-            self.dialog.progressBar.setValue(progress)
-            
-
-        provider.addFeatures(features)
-        self.assign_adjacency_from_existing_layer(grid_layer, "GridNo", None)
-
-    def parse_grid_label_1(self, grid_label):
-        row = ord(grid_label[0].upper()) - ord("A")
-        col = int(grid_label[1:]) - 1
-        return row, col
-
-    def parse_grid_label_2(self, grid_label):
+            progress = int(((row_number + 1) / total_rows) * 100)
+            feedback.set_progress(progress)
+
+        self.flush_features(provider, features, insert_span)
+        insert_span.report()
+
+        if build_table:
+            if not grid_engine.HAS_NUMPY:
+                logger.warning("NumPy is not available, skipping the adjacency table.")
+                return None
+            mask = None if cell_mask is None else grid_engine.mask_array(cell_mask)
+            return AdjacencyTable.from_grid(total_rows, total_cols, mask)
+        return None
+
+    def generate_grid_numpy(self, boundary_layer, grid_layer, length, width, rows_per_band=64, chunk_size=None,
+                            clip_mode=None, feedback=None, build_table=False, sink=None, fields=None):
         """
-        Parse a grid label (e.g., 'AA1') into row and column indices.
+        Generate the same cells as generate_grid, computing all cell corners
+        and neighbour labels with NumPy and building the polygons from packed WKB buffers.
+        With chunk_size set, row bands are sized so a band never holds more
+        than chunk_size cells and features are flushed as soon as a chunk is full.
         """
-        import re
+        feedback = self.resolve_feedback(feedback)
+        features = []
+        provider = sink if sink is not None else grid_layer.dataProvider()
+        insert_span = TraceSpan("provider insert")
+        fields = fields if fields is not None else grid_layer.fields()
+
+        layout = grid_core.GridLayout.from_extent(boundary_layer.extent(), length, width)
+        xmin, ymin, xmax, ymax = layout.bounds()
+        total_rows, total_cols = layout.n_rows, layout.n_cols
+        if chunk_size and total_cols:
+            rows_per_band = max(min(rows_per_band, chunk_size // total_cols), 1)
+
+        cell_mask = None
+        if clip_mode:
+            clip = BoundaryClip(boundary_layer, clip_mode)
+            cell_mask = grid_engine.mask_array(clip.grid_mask(xmin, ymax, length, width, total_rows, total_cols))
+
+        for row_start, row_stop in grid_engine.iter_row_bands(total_rows, rows_per_band):
+            if feedback.canceled:
+                return
 
-        match = re.match(r"([A-Z]+)(\d+)", grid_label)
-        if not match:
-            return -1, -1
+            labels, wkb_list, neighbours = grid_engine.build_cells(
+                xmin, ymin, xmax, ymax, length, width, row_start, row_stop, cell_mask
+            )
+            features = self.append_cell_features(features, labels, wkb_list, neighbours, fields, provider, chunk_size,
+                                                 insert_span)
 
-        col_label, row_label = match.groups()
-        col = 0
-        for char in col_label:
-            col = col * 26 + (ord(char.upper()) - ord("A") + 1)
-        col -= 1  # Convert to 0-based index
+            # Update progress bar once per band
+            progress = int((row_stop / total_rows) * 100)
+            feedback.set_progress(progress)
 
-        row = int(row_label) - 1  # Convert to 0-based index
-        return row, col
+        self.flush_features(provider, features, insert_span)
+        insert_span.report()
+        return AdjacencyTable.from_grid(total_rows, total_cols, cell_mask) if build_table else None
 
-    def parse_grid_label(self, grid_label):
+    def generate_grid_tiled(self, boundary_layer, grid_layer, length, width, workers=None, chunk_size=None,
+                            clip_mode=None, feedback=None, build_table=False, sink=None, fields=None):
         """
-        Parse a grid label (e.g., 'A1', 'AA2') into row and column indices.
-        Handles cases where either alphabetic or numeric parts are missing.
+        Generate the same cells as generate_grid_numpy, with the row bands
+        built in parallel by a pool of `workers` processes (all cores but one
+        by default). Tiles come back through temporary files and are added in
+        row order, so labels and neighbours across tile edges match a single pass.
         """
-        # Remove any invalid characters (non-alphabetic and non-numeric)
-        grid_label = ''.join(filter(lambda x: x.isalnum(), grid_label))
-
-        # Separate the alphabetic and numeric parts of the label
-        alpha_part = ''.join(filter(str.isalpha, grid_label))
-        num_part = ''.join(filter(str.isdigit, grid_label))
-
-        # Handle missing alphabetic part (default to 'A')
-        if not alpha_part:
-            alpha_part = 'A'
-
-        # Handle missing numeric part (default to '1')
-        if not num_part:
-            num_part = '1'
-
-        # Calculate the column index from the alphabetic part
-        col = 0
-        for char in alpha_part:
-            col = col * 26 + (ord(char.upper()) - ord('A') + 1)
-        col -= 1  # Make it 0-based
-
-        # Calculate the row index from the numeric part
-        row = int(num_part) - 1  # Make it 0-based
+        feedback = self.resolve_feedback(feedback)
+        features = []
+        provider = sink if sink is not None else grid_layer.dataProvider()
+        insert_span = TraceSpan("provider insert")
+        fields = fields if fields is not None else grid_layer.fields()
+
+        layout = grid_core.GridLayout.from_extent(boundary_layer.extent(), length, width)
+        total_rows, total_cols = layout.n_rows, layout.n_cols
+
+        cell_mask = None
+        if clip_mode:
+            clip = BoundaryClip(boundary_layer, clip_mode)
+            cell_mask = grid_engine.mask_array(clip.grid_mask(layout.xmin, layout.ymax, length, width, total_rows,
+                                                              total_cols))
+
+        workers = workers or grid_tiles.default_workers()
+        bands = grid_tiles.tile_bands(total_rows, total_cols, workers, chunk_size)
+        logger.info("Generating %d tiles on %d worker processes", len(bands), workers)
+
+        with tempfile.TemporaryDirectory(prefix="create_grid_") as tile_dir, grid_tiles.process_pool(workers) as pool:
+            jobs = grid_tiles.tile_jobs(layout.bounds(), length, width, bands, cell_mask, tile_dir)
+            futures = [pool.submit(grid_tiles.build_tile, job) for job in jobs]
+            for (row_start, row_stop), future in zip(bands, futures):
+                if feedback.canceled:
+                    for pending in futures:
+                        pending.cancel()
+                    return
 
-        return row, col
+                labels, wkb_list, neighbours = grid_tiles.load_tile(future.result())
+                features = self.append_cell_features(features, labels, wkb_list, neighbours, fields, provider,
+                                                     chunk_size, insert_span)
 
+                # Update progress bar once per tile
+                progress = int((row_stop / total_rows) * 100)
+                feedback.set_progress(progress)
 
-    def generate_grid_label(self, row, col):
-        if row < 0 or col < 0:
-            return None
+        self.flush_features(provider, features, insert_span)
+        insert_span.report()
+        return AdjacencyTable.from_grid(total_rows, total_cols, cell_mask) if build_table else None
 
-        def column_label(index):
-            label = ""
-            while index >= 0:
-                label = chr(index % 26 + ord("A")) + label
-                index = index // 26 - 1
-            return label
+    def generate_grid_hex(self, boundary_layer, grid_layer, size, orientation="flat", rows_per_band=64, chunk_size=None,
+                          feedback=None, build_table=False, sink=None, fields=None):
+        """
+        Generate flat-top or pointy-top hexagons `size` wide across their edges
+        over the boundary layer extent, built in row bands from NumPy centre
+        arrays. The six neighbour fields are filled from axial coordinates,
+        labels use the same letters + row number scheme as square cells.
+        """
+        feedback = self.resolve_feedback(feedback)
+        features = []
+        provider = sink if sink is not None else grid_layer.dataProvider()
+        insert_span = TraceSpan("provider insert")
+        fields = fields if fields is not None else grid_layer.fields()
+        neighbour_fields = grid_hex.HEX_FIELDS[orientation]
+
+        extent = boundary_layer.extent()
+        bounds = (extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum())
+        total_rows, total_cols = grid_hex.hex_dimensions(*bounds, size, orientation)
+        if chunk_size and total_cols:
+            rows_per_band = max(min(rows_per_band, chunk_size // total_cols), 1)
+
+        for row_start, row_stop in grid_engine.iter_row_bands(total_rows, rows_per_band):
+            if feedback.canceled:
+                return
 
-        col_label = column_label(col)
-        label = f"{col_label}{row + 1}"
-        print(f"Row: {row}, Column: {col}, Generated Label: {label}")
-        return label
+            labels, wkb_list, neighbours = grid_hex.build_hex_cells(*bounds, size, orientation, row_start, row_stop)
+            features = self.append_cell_features(features, labels, wkb_list, neighbours, fields, provider, chunk_size,
+                                                 insert_span, neighbour_fields)
 
+            # Update progress bar once per band
+            progress = int((row_stop / total_rows) * 100)
+            feedback.set_progress(progress)
 
+        self.flush_features(provider, features, insert_span)
+        insert_span.report()
+        return grid_hex.hex_table(total_rows, total_cols, orientation) if build_table else None
 
+    def append_cell_features(self, features, labels, wkb_list, neighbours, fields, provider, chunk_size=None,
+                             span=None, neighbour_fields=None):
+        """
+        Turn cells built by the engine (labels, WKB polygons and one neighbour
+        label list per neighbour field, by default the adjacency fields) into
+        features appended to `features`.
+        Full chunks are flushed to the provider, returns the pending features.
+        """
+        grid_no_index = fields.indexOf("GridNo")
+        adjacency_indexes = [fields.indexOf(field) for field in neighbour_fields or grid_engine.ADJACENCY_FIELDS]
+        for cell_number, (grid_label, wkb) in enumerate(zip(labels, wkb_list)):
+            grid_geom = QgsGeometry()
+            grid_geom.fromWkb(wkb)
+            feature = QgsFeature(fields)
+            feature.setGeometry(grid_geom)
+            feature.setAttribute(grid_no_index, grid_label)
+            for field_index, neighbour_labels in zip(adjacency_indexes, neighbours):
+                if field_index >= 0:
+                    feature.setAttribute(field_index, neighbour_labels[cell_number])
+            features.append(feature)
+
+            if chunk_size and len(features) >= chunk_size:
+                features = self.flush_features(provider, features, span)
+        return features
+
+    def flush_features(self, provider, features, span=None):
+        """
+        Add a chunk of features to the data provider and return a fresh list
+        for the next chunk. The insert time is added to span when given.
+        """
+        if features:
+            if span is None:
+                provider.addFeatures(features)
+            else:
+                with span.measure(len(features)):
+                    provider.addFeatures(features)
+        return []
 
-    def export_grid_to_txt(self, vector_layer, out_path, grid_field_name=None):
+    def export_grid_to_txt(self, vector_layer, out_path, grid_field_name=None, feedback=None, columns=None, table=None,
+                           use_cache=True):
         """
-        Export the grid layer's attributes (including adjacency) to a text file.
+        Export the grid layer's attributes (including adjacency) to a CSV text
+        file, or to a Parquet, Arrow or NumPy file depending on the out_path extension.
+        columns lists the exported fields, by default the label field
+        (grid_field_name, else GridNo) followed by the eight adjacency fields.
+        Only those attributes are fetched, geometries are not. With table, the
+        AdjacencyTable just assigned to or generated for the layer, the report
+        is written from it without reading the layer, which may then be None;
+        columns must then name the label column and the table's neighbour columns.
+        Without table, when grid_field_name and the eight adjacency fields are
+        exported and use_cache is set, the label mode table cached for the
+        unchanged layer is used instead of reading the adjacency fields.
+        Raises ValueError or RuntimeError when the report cannot be written.
         """
+        feedback = self.resolve_feedback(feedback)
         # Validate output path
-        if not out_path or not os.path.isdir(os.path.dirname(out_path)):
-            print("Invalid output path. Skipping export.")
+        if not grid_core.report_path_is_valid(out_path):
+            raise ValueError(f"Invalid output path '{out_path}'.")
+
+        default_columns = [grid_field_name or "GridNo"] + grid_engine.ADJACENCY_FIELDS
+        if table is None and use_cache and grid_field_name and columns in (None, default_columns):
+            table = self.cached_adjacency_table(vector_layer, grid_field_name)
+            if table is not None:
+                logger.info("Exporting the cached adjacency table")
+
+        if table is not None:
+            columns = columns or default_columns
+            rows = ([label] + table.neighbour_labels(row) for row, label in enumerate(table.labels))
+            total = len(table)
+        else:
+            if columns is None:
+                columns = default_columns
+            fields = vector_layer.fields()
+            indexes = [fields.indexOf(name) for name in columns]
+            missing_fields = [name for name, index in zip(columns, indexes) if index < 0]
+            if missing_fields:
+                raise ValueError(f"Cannot export, fields not found: {', '.join(missing_fields)}")
+
+            request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setSubsetOfAttributes(indexes)
+            row_values = operator.itemgetter(*indexes)
+            rows = (row_values(feature.attributes()) for feature in vector_layer.getFeatures(request))
+            if len(indexes) == 1:
+                rows = ((value,) for value in rows)
+            total = vector_layer.featureCount()
+
+        export_span = TraceSpan("export")
+        export_span.start()
+        exported = grid_formats.write_report_file(out_path, rows, total, feedback, columns)
+        if exported is None:
+            logger.info("Export canceled.")
             return
-
-        field_names = ["GridNo", "Left", "Top_Left", "Top", "Top_Right", "Right", "Bottom_Right", "Bottom", "Bottom_Left"]
-
-        try:
-            with open(out_path, "w", encoding="utf-8") as f:
-                # Write header
-                f.write(",".join(field_names) + "\n")
-                # Write each feature
-                for feature in vector_layer.getFeatures():
-                    row = [feature[field] if feature[field] is not None else "" for field in field_names]
-                    f.write(",".join(row) + "\n")
-            print(f"Adjacency report saved to {out_path}")
-        except Exception as e:
-            print(f"Error exporting grid to text file: {e}")
+        export_span.stop(exported)
+        export_span.report()
+        logger.info("Adjacency report saved to %s", out_path)
 
@@ -0,0 +1,159 @@
+"""
+Compact, array-backed adjacency store for the Create Grid plugin.
+
+The neighbour table is an int32 array of shape (n_cells, 8) holding the row
+index of each neighbour cell in ADJACENCY_FIELDS order, -1 meaning
+"no neighbour". Tables are saved to a binary sidecar file whose neighbour
+block sits at a fixed offset, so downstream jobs can memory-map it instead
+of parsing the text report.
+
+Sidecar layout (little endian):
+    64 byte header: magic, n_cells, n_dirs, label offsets position, label blob position
+    int32[n_cells, n_dirs] neighbour table
+    int64[n_cells + 1] label offsets into the blob
+    utf-8 label blob
+"""
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .CreateGridPlugin_engine import ADJACENCY_FIELDS, NEIGHBOUR_OFFSETS, cell_indices, cell_labels
+
+SIDECAR_MAGIC = b"CGADJ001"
+SIDECAR_EXTENSION = ".adj"
+HEADER_FORMAT = "<8sIIQQ"
+HEADER_SIZE = 64
+NO_NEIGHBOUR = -1
+
+
+def sidecar_path(out_path):
+    """Return the adjacency sidecar path that goes next to a report file."""
+    return os.path.splitext(out_path)[0] + SIDECAR_EXTENSION
+
+
+class AdjacencyTable:
+    def __init__(self, labels, neighbours):
+        """
+        labels: cell label of each table row.
+        neighbours: int32 array of shape (n_cells, len(ADJACENCY_FIELDS)).
+        """
+        self.labels = labels
+        self.neighbours = neighbours
+        self._index = None
+
+    def __len__(self):
+        return len(self.neighbours)
+
+    @classmethod
+    def from_grid(cls, n_rows, n_cols, cell_mask=None):
+        """
+        Build the table of a generated grid from its dimensions, without any
+        label lookups. cell_mask is an optional (n_rows, n_cols) boolean array
+        of kept cells; cells are numbered row by row.
+        """
+        row_idx, col_idx = cell_indices(n_cols, 0, n_rows)
+        if cell_mask is not None:
+            keep = cell_mask[row_idx, col_idx]
+            row_idx, col_idx = row_idx[keep], col_idx[keep]
+
+        cell_ids = np.full((n_rows, n_cols), NO_NEIGHBOUR, dtype=np.int32)
+        cell_ids[row_idx, col_idx] = np.arange(len(row_idx), dtype=np.int32)
+
+        neighbours = np.full((len(row_idx), len(NEIGHBOUR_OFFSETS)), NO_NEIGHBOUR, dtype=np.int32)
+        for direction, (row_offset, col_offset) in enumerate(NEIGHBOUR_OFFSETS):
+            n_row = row_idx + row_offset
+            n_col = col_idx + col_offset
+            valid = (n_row >= 0) & (n_row < n_rows) & (n_col >= 0) & (n_col < n_cols)
+            neighbours[valid, direction] = cell_ids[n_row[valid], n_col[valid]]
+
+        return cls(cell_labels(row_idx, col_idx), neighbours)
+
+    @classmethod
+    def from_neighbour_labels(cls, labels, neighbour_labels, n_dirs=None):
+        """
+        Build the table from per cell neighbour label lists, as written to the
+        adjacency fields, or to n_dirs other neighbour fields (e.g. the six
+        hexagon fields). Empty or unknown labels become NO_NEIGHBOUR.
+        """
+        labels = list(labels)
+        index = {label: i for i, label in enumerate(labels)}
+        index.pop("", None)
+        n_dirs = len(ADJACENCY_FIELDS) if n_dirs is None else n_dirs
+        # One flat pass over all values instead of one array assignment per cell
+        count = len(labels) * n_dirs
+        flat = (index.get(value, NO_NEIGHBOUR) for values in neighbour_labels for value in values)
+        neighbours = np.fromiter(flat, dtype=np.int32, count=count).reshape(len(labels), n_dirs)
+        return cls(labels, neighbours)
+
+    def index_of(self, label):
+        """Return the table row of a label, or NO_NEIGHBOUR if it is unknown."""
+        if self._index is None:
+            self._index = {label: i for i, label in enumerate(self.labels)}
+        return self._index.get(label, NO_NEIGHBOUR)
+
+    def neighbour_labels(self, row):
+        """Return the neighbour labels of a table row, "" where there is none."""
+        return ["" if n < 0 else self.labels[n] for n in self.neighbours[row].tolist()]
+
+    def save(self, path):
+        """Write the table to a binary sidecar file."""
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    def to_bytes(self):
+        """Return the table in the sidecar file layout."""
+        encoded = [str(label).encode("utf-8") for label in self.labels]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        offsets[1:] = np.cumsum([len(label) for label in encoded], dtype=np.int64)
+
+        n_cells, n_dirs = self.neighbours.shape
+        offsets_position = HEADER_SIZE + n_cells * n_dirs * 4
+        blob_position = offsets_position + offsets.nbytes
+        header = struct.pack(HEADER_FORMAT, SIDECAR_MAGIC, n_cells, n_dirs, offsets_position, blob_position)
+        return b"".join([
+            header.ljust(HEADER_SIZE, b"\0"),
+            np.ascontiguousarray(self.neighbours, dtype="<i4").tobytes(),
+            offsets.tobytes(),
+            b"".join(encoded),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Build a table from bytes in the sidecar file layout."""
+        magic, n_cells, n_dirs, offsets_position, blob_position = struct.unpack_from(HEADER_FORMAT, data)
+        if magic != SIDECAR_MAGIC:
+            raise ValueError("Data is not an adjacency table.")
+        neighbours = np.frombuffer(data, dtype="<i4", count=n_cells * n_dirs, offset=HEADER_SIZE)
+        offsets = np.frombuffer(data, dtype="<i8", count=n_cells + 1, offset=offsets_position).tolist()
+        blob = data[blob_position:]
+        labels = [blob[start:stop].decode("utf-8") for start, stop in zip(offsets[:-1], offsets[1:])]
+        return cls(labels, neighbours.reshape(n_cells, n_dirs))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Read a sidecar file. With mmap the neighbour table is memory-mapped
+        read-only instead of being copied into memory.
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        magic, n_cells, n_dirs, offsets_position, blob_position = struct.unpack_from(HEADER_FORMAT, header)
+        if magic != SIDECAR_MAGIC:
+            raise ValueError(f"'{path}' is not an adjacency sidecar file.")
+
+        if mmap and n_cells:
+            neighbours = np.memmap(path, dtype="<i4", mode="r", offset=HEADER_SIZE, shape=(n_cells, n_dirs))
+        else:
+            neighbours = np.fromfile(path, dtype="<i4", count=n_cells * n_dirs, offset=HEADER_SIZE)
+            neighbours = neighbours.reshape(n_cells, n_dirs)
+
+        offsets = np.fromfile(path, dtype="<i8", count=n_cells + 1, offset=offsets_position)
+        with open(path, "rb") as f:
+            f.seek(blob_position)
+            blob = f.read()
+        labels = [blob[start:stop].decode("utf-8") for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+        return cls(labels, neighbours)
@@ -0,0 +1,287 @@
+from qgis.core import (
+    QgsProcessing,
+    QgsProcessingAlgorithm,
+    QgsProcessingException,
+    QgsProcessingOutputVectorLayer,
+    QgsProcessingParameterBoolean,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterField,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterVectorLayer,
+    QgsProcessingUtils,
+    QgsWkbTypes,
+)
+
+from .CreateGridPlugin_adjacency import sidecar_path
+from .CreateGridPlugin_engine import HAS_NUMPY
+from .CreateGridPlugin_feedback import GridFeedback
+from .CreateGridPlugin_formats import REPORT_FILE_FILTER, check_report_file
+from .CreateGridPlugin_hex import CELL_SHAPES, neighbour_fields
+from .CreateGridPlugin_memory import MemoryBudget
+from .CreateGridPlugin_neighbourhood import NEIGHBOURHOODS, neighbourhood_fields
+from .CreateGridPlugin_tasks import LayerSnapshot, MainThreadCall
+
+
+class GridAlgorithm(QgsProcessingAlgorithm):
+    """
+    Common base of the plugin's Processing algorithms, which reuse the plugin stages.
+    Input layers are captured as a LayerSnapshot in prepareAlgorithm, on the
+    main thread, so processAlgorithm never reads a live layer from the
+    Processing worker thread.
+    """
+
+    def __init__(self, plugin):
+        super(GridAlgorithm, self).__init__()
+        self.plugin = plugin
+
+    def createInstance(self):
+        return type(self)(self.plugin)
+
+    def group(self):
+        return "Grid"
+
+    def groupId(self):
+        return "grid"
+
+    def check_report(self, report_path, columns):
+        """Fail before any work is done when the report cannot be written."""
+        if not report_path:
+            return
+        try:
+            check_report_file(report_path, columns)
+        except (RuntimeError, ValueError) as e:
+            raise QgsProcessingException(str(e))
+
+
+class CreateGridAlgorithm(GridAlgorithm):
+    INPUT = "INPUT"
+    WIDTH = "WIDTH"
+    LENGTH = "LENGTH"
+    SHAPE = "SHAPE"
+    ENGINE = "ENGINE"
+    CHUNK_SIZE = "CHUNK_SIZE"
+    CLIP = "CLIP"
+    SIDECAR = "SIDECAR"
+    OUTPUT = "OUTPUT"
+    REPORT = "REPORT"
+
+    ENGINES = ["loop", "numpy", "tiled"]
+    CLIP_MODES = [None, "intersects", "within"]
+
+    def name(self):
+        return "creategrid"
+
+    def displayName(self):
+        return "Create grid"
+
+    def shortHelpString(self):
+        return (
+            "Creates a grid of width x length cells over the extent of a polygon layer, "
+            "with the GridNo label and the eight adjacency fields filled in, "
+            "and optionally writes the adjacency report. Hexagonal cells are 'Cell width' wide across "
+            "their edges and get six neighbour fields; length does not apply to them and they cannot be clipped."
+        )
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterVectorLayer(
+            self.INPUT, "Boundary layer", [QgsProcessing.TypeVectorPolygon]
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.WIDTH, "Cell width", QgsProcessingParameterNumber.Double, 3000.0, minValue=0.0
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.LENGTH, "Cell length", QgsProcessingParameterNumber.Double, 2000.0, minValue=0.0
+        ))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.SHAPE, "Cell shape", ["Square", "Hexagon, flat top", "Hexagon, pointy top"], defaultValue=0
+        ))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.ENGINE, "Geometry engine", ["Loop", "NumPy", "NumPy on all CPU cores"], defaultValue=0
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.CHUNK_SIZE, "Insert chunk size (0 adds all cells at once)",
+            QgsProcessingParameterNumber.Integer, 50000, minValue=0
+        ))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.CLIP, "Clip to boundary",
+            ["No clipping", "Cells intersecting boundary", "Cells inside boundary"], defaultValue=0
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.SIDECAR, "Write adjacency sidecar next to the report", defaultValue=False
+        ))
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, "Grid", QgsProcessing.TypeVectorPolygon
+        ))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.REPORT, "Adjacency report", REPORT_FILE_FILTER, optional=True
+        ))
+
+    def prepareAlgorithm(self, parameters, context, feedback):
+        boundary_layer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        if boundary_layer is None:
+            raise QgsProcessingException("Please provide valid inputs.")
+        self.boundary_layer = LayerSnapshot(boundary_layer)
+        return True
+
+    def processAlgorithm(self, parameters, context, feedback):
+        boundary_layer = self.boundary_layer
+        width = self.parameterAsDouble(parameters, self.WIDTH, context)
+        length = self.parameterAsDouble(parameters, self.LENGTH, context)
+        cell_shape = CELL_SHAPES[self.parameterAsEnum(parameters, self.SHAPE, context)]
+        if width <= 0 or (cell_shape == "square" and length <= 0):
+            raise QgsProcessingException("Please provide valid inputs.")
+
+        engine = self.ENGINES[self.parameterAsEnum(parameters, self.ENGINE, context)]
+        chunk_size = self.parameterAsInt(parameters, self.CHUNK_SIZE, context) or None
+        clip_mode = self.CLIP_MODES[self.parameterAsEnum(parameters, self.CLIP, context)]
+        if cell_shape != "square" and clip_mode:
+            raise QgsProcessingException("Hexagonal grids cannot be clipped to the boundary.")
+        write_sidecar = self.parameterAsBoolean(parameters, self.SIDECAR, context)
+        report_path = self.parameterAsFileOutput(parameters, self.REPORT, context)
+        report_columns = ["GridNo"] + neighbour_fields(cell_shape)
+        self.check_report(report_path, report_columns)
+
+        fields = self.plugin.grid_fields(cell_shape)
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context, fields, QgsWkbTypes.Polygon, boundary_layer.crs()
+        )
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+
+        grid_feedback = GridFeedback.for_processing(feedback)
+        table = self.plugin.generate_grid(
+            boundary_layer, None, length, width, engine, chunk_size, clip_mode, grid_feedback,
+            build_table=bool(report_path) and HAS_NUMPY, sink=sink, fields=fields, cell_shape=cell_shape
+        )
+        if grid_feedback.canceled:
+            return {}
+
+        results = {self.OUTPUT: dest_id}
+        if report_path:
+            if table is not None:
+                # The report comes from the generated cells, the destination is not read back
+                self.plugin.export_grid_to_txt(None, report_path, feedback=grid_feedback, columns=report_columns,
+                                               table=table)
+            else:
+                # Release the sink so its writer commits and closes the destination before it is read
+                del sink
+                grid_layer = QgsProcessingUtils.mapLayerFromString(dest_id, context)
+                if grid_layer is None:
+                    raise QgsProcessingException("Cannot read the grid output back to write the report.")
+                self.plugin.export_grid_to_txt(grid_layer, report_path, feedback=grid_feedback,
+                                               columns=report_columns)
+            if write_sidecar and table is not None:
+                table.save(sidecar_path(report_path))
+            results[self.REPORT] = report_path
+        return results
+
+
+class AssignAdjacencyAlgorithm(GridAlgorithm):
+    INPUT = "INPUT"
+    FIELD = "FIELD"
+    MODE = "MODE"
+    NEIGHBOURHOOD = "NEIGHBOURHOOD"
+    LIST = "LIST"
+    SIDECAR = "SIDECAR"
+    MEMORY_BUDGET = "MEMORY_BUDGET"
+    REPORT = "REPORT"
+    OUTPUT = "OUTPUT"
+
+    MODES = ["label", "topology"]
+
+    def name(self):
+        return "assignadjacency"
+
+    def displayName(self):
+        return "Assign adjacency"
+
+    def shortHelpString(self):
+        return (
+            "Fills the eight adjacency fields (Left, Top_Left, ... Bottom_Left) of an existing grid layer "
+            "in place, from 'A1'/'AA2' style labels or from the cell geometries, "
+            "and optionally writes the adjacency report. With grid labels, the 4 neighbours or every cell "
+            "up to 2 to 5 cells away can be assigned instead, as one field per neighbour or as one list field."
+        )
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterVectorLayer(
+            self.INPUT, "Grid layer", [QgsProcessing.TypeVectorPolygon]
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.FIELD, "Grid field", parentLayerParameterName=self.INPUT
+        ))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.MODE, "Find neighbours from", ["Grid labels", "Cell geometries"], defaultValue=0
+        ))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.NEIGHBOURHOOD, "Neighbourhood (grid labels only)",
+            ["8 neighbours", "4 neighbours", "2-ring", "3-ring", "4-ring", "5-ring"], defaultValue=0
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.LIST, "Write neighbours to one Neighbours list field", defaultValue=False
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.SIDECAR, "Write adjacency sidecar next to the report", defaultValue=False
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.MEMORY_BUDGET, "Memory budget in MiB (0 for no limit)",
+            QgsProcessingParameterNumber.Integer, 0, minValue=0
+        ))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.REPORT, "Adjacency report", REPORT_FILE_FILTER, optional=True
+        ))
+        self.addOutput(QgsProcessingOutputVectorLayer(self.OUTPUT, "Updated grid"))
+
+    def prepareAlgorithm(self, parameters, context, feedback):
+        # The missing fields are added and the layer captured here on the main thread,
+        # processAlgorithm hands every batch of changes back to the main thread to be written
+        grid_layer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        grid_field_name = self.parameterAsString(parameters, self.FIELD, context)
+        if grid_layer is None or not grid_field_name:
+            raise QgsProcessingException("Please select a valid layer and field.")
+
+        mode = self.MODES[self.parameterAsEnum(parameters, self.MODE, context)]
+        neighbourhood = NEIGHBOURHOODS[self.parameterAsEnum(parameters, self.NEIGHBOURHOOD, context)]
+        as_list = self.parameterAsBoolean(parameters, self.LIST, context)
+        if mode == "topology" and (neighbourhood != "8" or as_list):
+            raise QgsProcessingException("Cell geometries only fill the eight adjacency fields.")
+        report_path = self.parameterAsFileOutput(parameters, self.REPORT, context) or None
+        self.check_report(report_path, [grid_field_name] + neighbourhood_fields(neighbourhood, as_list))
+        self.plugin.add_adjacency_fields(grid_layer, neighbourhood_fields(neighbourhood, as_list))
+        self.grid_layer = grid_layer
+        self.layer_id = grid_layer.id()
+        canceled = None if feedback is None else feedback.isCanceled
+        self.snapshot = LayerSnapshot(grid_layer, MainThreadCall(canceled))
+        return True
+
+    def processAlgorithm(self, parameters, context, feedback):
+        grid_field_name = self.parameterAsString(parameters, self.FIELD, context)
+        mode = self.MODES[self.parameterAsEnum(parameters, self.MODE, context)]
+        neighbourhood = NEIGHBOURHOODS[self.parameterAsEnum(parameters, self.NEIGHBOURHOOD, context)]
+        as_list = self.parameterAsBoolean(parameters, self.LIST, context)
+        write_sidecar = self.parameterAsBoolean(parameters, self.SIDECAR, context)
+        report_path = self.parameterAsFileOutput(parameters, self.REPORT, context) or None
+        megabytes = self.parameterAsInt(parameters, self.MEMORY_BUDGET, context)
+        memory_budget = MemoryBudget.from_megabytes(megabytes) if megabytes else None
+
+        grid_feedback = GridFeedback.for_processing(feedback)
+        self.plugin.assign_adjacency_from_existing_layer(
+            self.snapshot, grid_field_name, report_path, feedback=grid_feedback, mode=mode,
+            write_sidecar=write_sidecar, memory_budget=memory_budget, neighbourhood=neighbourhood, as_list=as_list
+        )
+        if grid_feedback.canceled:
+            return {}
+        if memory_budget is not None:
+            feedback.pushInfo(memory_budget.summary())
+
+        results = {self.OUTPUT: self.layer_id}
+        if report_path:
+            results[self.REPORT] = report_path
+        return results
+
+    def postProcessAlgorithm(self, context, feedback):
+        if self.snapshot.changes.flushed:
+            self.grid_layer.triggerRepaint()
+        return {}
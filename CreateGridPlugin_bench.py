@@ -0,0 +1,337 @@
+"""
+Benchmarks of the Create Grid stages: generation, adjacency and export.
+
+Each stage runs on square grids of the requested sizes (1k, 100k, 1M and
+10M cells are the reference points) and reports cells per second and the
+peak of Python allocations traced with tracemalloc, measured in a second
+pass so tracing does not skew the timings. Two backends exist:
+    qgis  the plugin methods on real memory layers, needs qgis.core
+    fake  the Qt-free engine and core functions on a FakeLayer, a small
+          in-memory stand-in for a grid layer and its provider, so CI
+          machines without QGIS can track the pure Python/NumPy parts
+Results can be saved as a JSON baseline and later runs compared with it:
+
+    python -m CreateGrid.CreateGridPlugin_bench --backend fake --save-baseline bench.json
+    python -m CreateGrid.CreateGridPlugin_bench --backend fake --compare bench.json
+
+A run fails (exit code 1) when a stage got slower, or its peak memory grew,
+by more than the tolerance.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .CreateGridPlugin_core import REPORT_FIELDS, GridLayout, label_adjacency
+from .CreateGridPlugin_engine import ADJACENCY_FIELDS, build_cells, iter_row_bands
+from .CreateGridPlugin_formats import write_report_file
+
+SIZES = {"1k": 1000, "100k": 100000, "1M": 1000000, "10M": 10000000}
+DEFAULT_SIZES = ["1k", "100k", "1M"]
+STAGES = ["generation", "adjacency", "export"]
+
+
+def grid_shape(cells):
+    """Return the (rows, cols) of the square-ish grid with at least `cells` cells."""
+    n_cols = max(int(math.ceil(math.sqrt(cells))), 1)
+    return int(math.ceil(cells / n_cols)), n_cols
+
+
+class FakeFields:
+    def __init__(self, names):
+        self.names = list(names)
+
+    def indexOf(self, name):
+        return self.names.index(name) if name in self.names else -1
+
+
+class FakeFeature:
+    def __init__(self, fid, attributes):
+        self.fid = fid
+        self.values = attributes
+
+    def id(self):
+        return self.fid
+
+    def attributes(self):
+        return self.values
+
+
+class FakeLayer:
+    """
+    Stand-in for a grid layer and its data provider: GridNo and adjacency
+    attributes kept in one list per feature, cell WKB kept aside.
+    """
+
+    def __init__(self):
+        self.field_list = FakeFields(REPORT_FIELDS)
+        self.rows = []
+        self.geometries = []
+
+    def fields(self):
+        return self.field_list
+
+    def dataProvider(self):
+        return self
+
+    def featureCount(self):
+        return len(self.rows)
+
+    def getFeatures(self, request=None):
+        for fid, attributes in enumerate(self.rows):
+            yield FakeFeature(fid, attributes)
+
+    def addFeatures(self, cells):
+        """Add (label, wkb, neighbour labels) cells."""
+        for label, wkb, neighbours in cells:
+            self.rows.append([label] + list(neighbours))
+            self.geometries.append(wkb)
+        return True
+
+    def changeAttributeValues(self, updates):
+        for fid, attributes in updates.items():
+            row = self.rows[fid]
+            for index, value in attributes.items():
+                row[index] = value
+        return True
+
+
+class FakeBackend:
+    """Runs the Qt-free parts of each stage against a FakeLayer."""
+
+    name = "fake"
+
+    def __init__(self, args):
+        self.chunk_size = args.chunk_size
+        self.layer = None
+
+    def generation(self, n_rows, n_cols):
+        self.layer = FakeLayer()
+        layout = GridLayout(0.0, 0.0, float(n_cols), float(n_rows), 1.0, 1.0)
+        rows_per_band = max(self.chunk_size // max(n_cols, 1), 1)
+        for row_start, row_stop in iter_row_bands(layout.n_rows, rows_per_band):
+            labels, wkb_list, neighbours = build_cells(*layout.bounds(), 1.0, 1.0, row_start, row_stop)
+            self.layer.addFeatures(zip(labels, wkb_list, zip(*neighbours)))
+        return self.layer.featureCount()
+
+    def prepare_adjacency(self):
+        pass  # The fake adjacency stage writes every cell anyway
+
+    def adjacency(self):
+        fields = self.layer.fields()
+        label_index = fields.indexOf("GridNo")
+        adjacency_indexes = [fields.indexOf(field) for field in ADJACENCY_FIELDS]
+        features = list(self.layer.getFeatures())
+        labels = [feature.attributes()[label_index] for feature in features]
+        values = label_adjacency(labels)
+        self.layer.changeAttributeValues({
+            feature.id(): dict(zip(adjacency_indexes, neighbours)) for feature, neighbours in zip(features, values)
+        })
+        return len(labels)
+
+    def export(self, out_path):
+        rows = (feature.attributes() for feature in self.layer.getFeatures())
+        return write_report_file(out_path, rows, self.layer.featureCount())
+
+    def reset(self):
+        self.layer = None
+
+    def close(self):
+        pass
+
+
+class QgisBackend:
+    """Runs the plugin methods against real memory layers."""
+
+    name = "qgis"
+
+    def __init__(self, args):
+        from .CreateGridPlugin_cli import start_qgis
+
+        self.qgs = start_qgis(args.qgis_prefix)
+        from .CreateGridPlugin import CreateGridPlugin
+
+        self.plugin = CreateGridPlugin(None)
+        self.engine = args.engine
+        self.chunk_size = args.chunk_size
+        self.grid_layer = None
+
+    def boundary_layer(self, n_rows, n_cols):
+        from qgis.core import QgsFeature, QgsGeometry, QgsRectangle, QgsVectorLayer
+
+        layer = QgsVectorLayer("Polygon?crs=EPSG:3857", "Benchmark boundary", "memory")
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromRect(QgsRectangle(0, 0, n_cols, n_rows)))
+        layer.dataProvider().addFeatures([feature])
+        layer.updateExtents()
+        return layer
+
+    def generation(self, n_rows, n_cols):
+        boundary_layer = self.boundary_layer(n_rows, n_cols)
+        self.grid_layer = self.plugin.create_grid_layer(boundary_layer.crs())
+        self.plugin.generate_grid(boundary_layer, self.grid_layer, 1.0, 1.0, self.engine, self.chunk_size)
+        return self.grid_layer.featureCount()
+
+    def prepare_adjacency(self):
+        """Clear the values written by the generation stage, so the adjacency stage writes every cell again."""
+        from qgis.core import QgsFeatureRequest
+
+        fields = self.grid_layer.fields()
+        cleared = {index: "" for index in (fields.indexOf(field) for field in ADJACENCY_FIELDS)}
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setNoAttributes()
+        self.grid_layer.dataProvider().changeAttributeValues(
+            {feature.id(): cleared for feature in self.grid_layer.getFeatures(request)}
+        )
+
+    def adjacency(self):
+        self.plugin.assign_adjacency_from_existing_layer(self.grid_layer, "GridNo", None, use_cache=False)
+        return self.grid_layer.featureCount()
+
+    def export(self, out_path):
+        self.plugin.export_grid_to_txt(self.grid_layer, out_path)
+        return self.grid_layer.featureCount()
+
+    def reset(self):
+        self.grid_layer = None
+
+    def close(self):
+        self.qgs.exitQgis()
+
+
+def measure(function, *args, trace_memory=True):
+    """Run function(*args) and return (result, seconds, peak traced bytes or None)."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = function(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_stages(backend, size, stages, report_dir, trace_memory):
+    """Run the stages on one grid size and return {stage: (cells, seconds, peak bytes or None)}."""
+    n_rows, n_cols = grid_shape(SIZES[size])
+    # Adjacency and export work on the grid built by the generation stage
+    runs = {"generation": measure(backend.generation, n_rows, n_cols, trace_memory=trace_memory)}
+    if "adjacency" in stages:
+        # The reset of the generated values is setup, it stays out of the measured stage
+        backend.prepare_adjacency()
+        runs["adjacency"] = measure(backend.adjacency, trace_memory=trace_memory)
+    if "export" in stages:
+        out_path = os.path.join(report_dir, f"report_{size}.txt")
+        runs["export"] = measure(backend.export, out_path, trace_memory=trace_memory)
+    backend.reset()
+    return runs
+
+
+def run_benchmarks(backend, sizes, stages, report_dir, trace_memory=True):
+    """
+    Run the stages on every grid size and return one result dict per stage run.
+    tracemalloc slows Python code down several times, so the timings come
+    from a first untraced pass and the peaks from a second, traced pass.
+    """
+    results = []
+    for size in sizes:
+        timed = run_stages(backend, size, stages, report_dir, False)
+        traced = run_stages(backend, size, stages, report_dir, True) if trace_memory else {}
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            cells, elapsed, _ = timed[stage]
+            result = {
+                "key": f"{backend.name}:{stage}:{size}",
+                "cells": cells,
+                "seconds": elapsed,
+                "cells_per_s": cells / elapsed if elapsed > 0 else 0.0,
+                "peak_bytes": traced[stage][2] if stage in traced else None,
+            }
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def print_result(result):
+    peak = "-" if result["peak_bytes"] is None else f"{result['peak_bytes'] / 2 ** 20:,.1f} MiB"
+    print(f"{result['key']:<28} {result['cells']:>10,} cells {result['seconds']:>9.3f} s "
+          f"{result['cells_per_s']:>14,.0f} cells/s  peak {peak}")
+
+
+def compare(results, baseline, tolerance):
+    """Return the regressions of results against a baseline, as messages."""
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["key"])
+        if reference is None:
+            continue
+        if result["cells_per_s"] < reference["cells_per_s"] * (1 - tolerance):
+            regressions.append(f"{result['key']}: {result['cells_per_s']:,.0f} cells/s, "
+                               f"baseline {reference['cells_per_s']:,.0f} cells/s")
+        if (result["peak_bytes"] is not None and reference.get("peak_bytes")
+                and result["peak_bytes"] > reference["peak_bytes"] * (1 + tolerance)):
+            regressions.append(f"{result['key']}: peak {result['peak_bytes']:,} bytes, "
+                               f"baseline {reference['peak_bytes']:,} bytes")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="CreateGridPlugin_bench", description="Benchmark the Create Grid stages.")
+    parser.add_argument("--backend", choices=["fake", "qgis"], default="fake")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                        help=f"comma separated grid sizes out of {', '.join(SIZES)} (default: %(default)s)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma separated stages (default: %(default)s)")
+    parser.add_argument("--engine", choices=["loop", "numpy", "tiled"], default="numpy",
+                        help="generation engine of the qgis backend")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--no-memory", dest="trace_memory", action="store_false",
+                        help="skip the traced pass that measures peak memory")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON baseline to check the results against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slow-down or memory growth (default: %(default)s)")
+    parser.add_argument("--qgis-prefix", help="QGIS install prefix for the qgis backend")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [size for size in sizes if size not in SIZES] + [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown sizes or stages: {', '.join(unknown)}")
+
+    backend = QgisBackend(args) if args.backend == "qgis" else FakeBackend(args)
+    try:
+        with tempfile.TemporaryDirectory(prefix="create_grid_bench_") as report_dir:
+            results = run_benchmarks(backend, sizes, stages, report_dir, args.trace_memory)
+    finally:
+        backend.close()
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({result["key"]: result for result in results}, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
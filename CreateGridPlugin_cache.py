@@ -0,0 +1,119 @@
+"""
+Persistent adjacency cache for the Create Grid plugin.
+
+Neighbour tables computed for existing grid layers are kept in a SQLite
+database, keyed by layer source, grid field and adjacency mode. Each entry
+carries a fingerprint of the layer content (feature count, feature ids,
+labels and extent), so a later run on an unchanged layer reuses the table
+instead of recomputing it. Once the stored tables take more than max_bytes,
+the least recently used entries are evicted.
+"""
+import array
+import contextlib
+import hashlib
+import os
+import sqlite3
+import time
+
+from .CreateGridPlugin_adjacency import AdjacencyTable
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS adjacency (
+    source TEXT NOT NULL,
+    field TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (source, field, mode)
+)
+"""
+
+
+def fingerprint(fids, labels, extent=None, geometries=None):
+    """
+    Return a cheap content fingerprint of a grid layer: a hash of the feature
+    count, the feature ids and labels in iteration order and the extent.
+    geometries optionally adds the WKB bytes of every cell, for tables that
+    depend on the cell shapes and not only on the labels.
+    """
+    digest = hashlib.sha1()
+    digest.update(str(len(fids)).encode("ascii"))
+    digest.update(array.array("q", fids).tobytes())
+    digest.update("\0".join(labels).encode("utf-8"))
+    if extent is not None:
+        digest.update(repr(tuple(extent)).encode("ascii"))
+    if geometries is not None:
+        for wkb in geometries:
+            digest.update(len(wkb).to_bytes(8, "little"))
+            digest.update(wkb)
+    return digest.hexdigest()
+
+
+class AdjacencyCache:
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        path: SQLite database file, created on first use.
+        max_bytes: total size of the stored tables above which old entries are evicted.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+
+    @contextlib.contextmanager
+    def connect(self):
+        """Open the database for one transaction; connections are not shared between threads."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as connection:
+            with connection:
+                connection.execute(SCHEMA)
+                yield connection
+
+    def get(self, source, field, mode, layer_fingerprint):
+        """Return the cached AdjacencyTable of a layer, or None if there is none or the layer changed."""
+        key = (source, field, mode)
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT fingerprint, data FROM adjacency WHERE source = ? AND field = ? AND mode = ?", key
+            ).fetchone()
+            if row is None or row[0] != layer_fingerprint:
+                return None
+            connection.execute(
+                "UPDATE adjacency SET last_used = ? WHERE source = ? AND field = ? AND mode = ?", (time.time(),) + key
+            )
+        return AdjacencyTable.from_bytes(bytes(row[1]))
+
+    def put(self, source, field, mode, layer_fingerprint, table):
+        """Store the table of a layer, replacing its previous entry, then evict old entries."""
+        data = table.to_bytes()
+        if len(data) > self.max_bytes:
+            return
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO adjacency VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, field, mode, layer_fingerprint, sqlite3.Binary(data), len(data), time.time()),
+            )
+            self.evict(connection)
+
+    def evict(self, connection):
+        """Delete the least recently used entries until the stored tables fit in max_bytes."""
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM adjacency").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        entries = connection.execute("SELECT source, field, mode, size FROM adjacency ORDER BY last_used").fetchall()
+        for source, field, mode, size in entries:
+            if total <= self.max_bytes:
+                break
+            connection.execute(
+                "DELETE FROM adjacency WHERE source = ? AND field = ? AND mode = ?", (source, field, mode)
+            )
+            total -= size
+
+    def clear(self):
+        """Remove every cached table."""
+        with self.connect() as connection:
+            connection.execute("DELETE FROM adjacency")
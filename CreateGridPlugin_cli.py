@@ -0,0 +1,296 @@
+"""
+Command line batch generator for the Create Grid plugin.
+
+Runs grid generation, adjacency assignment and report export without the
+QGIS GUI. QGIS is started once per run, or once per worker process with
+--workers, so a batch file listing many jobs pays the start-up cost only
+once per process:
+
+    python -m CreateGrid.CreateGridPlugin_cli create boundary.shp --width 3000 --length 2000 --report out/area.txt
+    python -m CreateGrid.CreateGridPlugin_cli create boundary.shp --width 3000 --length 2000 --grid out/area.gpkg
+    python -m CreateGrid.CreateGridPlugin_cli adjacency grid.gpkg --field GridNo --report out/grid.txt
+    python -m CreateGrid.CreateGridPlugin_cli batch jobs.txt --workers 4
+
+A batch file holds one create or adjacency command per line, with the same
+arguments as on the command line; blank lines and lines starting with #
+are skipped. QGIS is only imported once jobs are about to run.
+"""
+import argparse
+import logging
+import multiprocessing
+import multiprocessing.util
+import os
+import shlex
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .CreateGridPlugin_feedback import GridFeedback
+from .CreateGridPlugin_formats import check_report_file
+from .CreateGridPlugin_hex import CELL_SHAPES, neighbour_fields
+from .CreateGridPlugin_memory import MemoryBudget
+from .CreateGridPlugin_neighbourhood import NEIGHBOURHOODS, neighbourhood_fields
+from .CreateGridPlugin_trace import enable_tracing, logger
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes running jobs at the same time (default: 1)")
+    common.add_argument("--qgis-prefix", help="QGIS install prefix, if QGIS cannot find it on its own")
+    common.add_argument("--columns", type=lambda value: [name.strip() for name in value.split(",") if name.strip()],
+                        help="comma separated report columns (default: label field and the eight adjacency fields)")
+    common.add_argument("--memory-budget", type=int, metavar="MIB",
+                        help="memory budget of a job in MiB, larger grids are streamed and processed in chunks")
+    common.add_argument("-v", "--verbose", action="count", default=0,
+                        help="log stage timings (-v) or per feature traces (-vv) to stderr")
+
+    parser = argparse.ArgumentParser(prog="CreateGridPlugin_cli", description="Create grids and adjacency reports.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", parents=[common], help="create a grid over a boundary layer")
+    create.add_argument("input", help="boundary polygon layer (any OGR readable file)")
+    create.add_argument("--width", type=float, required=True, help="cell width in layer units")
+    create.add_argument("--length", type=float, help="cell length in layer units, required for square cells")
+    create.add_argument("--report", help="adjacency report path")
+    create.add_argument("--grid", help="GeoPackage (.gpkg) or FlatGeobuf (.fgb) file the grid is written to")
+    create.add_argument("--engine", choices=["loop", "numpy", "tiled"], default="loop",
+                        help="tiled builds the cells on a process pool using all cores but one")
+    create.add_argument("--chunk-size", type=int, default=50000,
+                        help="cells added to the layer per insert, 0 adds all cells at once")
+    create.add_argument("--shape", choices=CELL_SHAPES, default="square",
+                        help="hexagons are --width wide across their edges, --length does not apply and --clip is rejected")
+    create.add_argument("--clip", choices=["intersects", "within"],
+                        help="only keep cells intersecting or inside the boundary geometry")
+    create.add_argument("--sidecar", action="store_true", help="also write the binary adjacency sidecar")
+
+    adjacency = commands.add_parser("adjacency", parents=[common], help="assign adjacency to an existing grid layer")
+    adjacency.add_argument("input", help="grid polygon layer, updated in place")
+    adjacency.add_argument("--field", required=True, help="grid label field")
+    adjacency.add_argument("--report", help="adjacency report path")
+    adjacency.add_argument("--mode", choices=["label", "topology"], default="label",
+                           help="find neighbours from the labels or from the cell geometries")
+    adjacency.add_argument("--neighbourhood", choices=NEIGHBOURHOODS, default="8",
+                           help="neighbour cells in label mode: 8, 4 or every cell up to K cells away (ringK)")
+    adjacency.add_argument("--list", dest="as_list", action="store_true",
+                           help="write the neighbours to one comma separated Neighbours field")
+    adjacency.add_argument("--sidecar", action="store_true", help="also write the binary adjacency sidecar")
+    adjacency.add_argument("--no-cache", dest="use_cache", action="store_false",
+                           help="always recompute, without reading or updating the adjacency cache")
+
+    batch = commands.add_parser("batch", parents=[common], help="run the jobs listed in a file")
+    batch.add_argument("jobs", help="file with one create or adjacency command per line")
+    return parser
+
+
+def read_jobs(path, parser):
+    """Parse a batch file into one argparse namespace per job."""
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                job = parser.parse_args(shlex.split(line))
+            except SystemExit:
+                raise SystemExit(f"{path}:{line_number}: invalid job '{line}'")
+            if job.command == "batch":
+                raise SystemExit(f"{path}:{line_number}: batch files cannot contain batch commands")
+            jobs.append(job)
+    return jobs
+
+
+def report_columns(job):
+    """Return the report columns of a job, the --columns option or the fields the job fills."""
+    if job.columns:
+        return job.columns
+    if job.command == "create":
+        return ["GridNo"] + neighbour_fields(job.shape)
+    return [job.field] + neighbourhood_fields(job.neighbourhood, job.as_list)
+
+
+def check_jobs(jobs, parser):
+    """Reject jobs whose report cannot be written before QGIS is started."""
+    for job in jobs:
+        if not job.report:
+            continue
+        try:
+            check_report_file(job.report, report_columns(job))
+        except (RuntimeError, ValueError) as e:
+            parser.error(f"{job.command} {job.input}: {e}")
+
+
+def start_qgis(prefix_path=None):
+    """Start a GUI-less QGIS application, once for the whole run."""
+    from qgis.core import QgsApplication
+
+    if prefix_path:
+        QgsApplication.setPrefixPath(prefix_path, True)
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    return qgs
+
+
+def run_job(plugin, job, feedback):
+    """
+    Run one create or adjacency job with the plugin stages.
+    Returns (completed, memory budget summary or None), completed being
+    False if the job was canceled. Raises on invalid input.
+    """
+    from qgis.core import QgsVectorLayer
+
+    layer = QgsVectorLayer(job.input, os.path.splitext(os.path.basename(job.input))[0], "ogr")
+    if not layer.isValid():
+        raise RuntimeError(f"Cannot open layer '{job.input}'.")
+
+    memory_budget = MemoryBudget.from_megabytes(job.memory_budget) if job.memory_budget else None
+    report_path = os.path.abspath(job.report) if job.report else None
+    if report_path:
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+
+    if job.command == "create":
+        if job.width <= 0 or (job.shape == "square" and (job.length or 0) <= 0):
+            raise ValueError("Cell width and length must be positive.")
+        if job.shape != "square" and job.clip:
+            raise ValueError("Hexagonal grids cannot be clipped to the boundary.")
+        if not report_path and not job.grid:
+            raise ValueError("Nothing to write, give --report and/or --grid.")
+        grid_path = os.path.abspath(job.grid) if job.grid else None
+        if grid_path:
+            os.makedirs(os.path.dirname(grid_path), exist_ok=True)
+        # A grid over the memory budget without --grid only lives as long as the job
+        with tempfile.TemporaryDirectory(prefix="create_grid_") as spill_dir:
+            grid_layer = plugin.build_new_grid(
+                layer, job.length, job.width, report_path, job.engine, job.chunk_size or None, job.clip,
+                job.sidecar, feedback=feedback, grid_path=grid_path, report_columns=job.columns,
+                memory_budget=memory_budget, cell_shape=job.shape, spill_dir=spill_dir
+            )
+            completed = grid_layer is not None
+            del grid_layer  # Release the spilled grid file before its directory is removed
+    else:
+        if layer.fields().indexOf(job.field) < 0:
+            raise ValueError(f"Field '{job.field}' not found in '{job.input}'.")
+        plugin.assign_adjacency_from_existing_layer(
+            layer, job.field, report_path, feedback=feedback, mode=job.mode, write_sidecar=job.sidecar,
+            report_columns=job.columns, use_cache=job.use_cache, memory_budget=memory_budget,
+            neighbourhood=job.neighbourhood, as_list=job.as_list
+        )
+        completed = not feedback.canceled
+    return completed, None if memory_budget is None else memory_budget.summary()
+
+
+# Plugin of a pool worker process, created once by start_worker for all the jobs the worker runs
+_worker_plugin = None
+
+
+def start_worker(prefix_path=None, log_level=logging.WARNING):
+    """Process pool initializer: start QGIS once in this worker process, logging to stderr like the parent."""
+    global _worker_plugin
+    enable_tracing(log_level, message_log=False)
+    qgs = start_qgis(prefix_path)
+    # Pool workers exit through multiprocessing, which runs its finalizers but not atexit handlers
+    multiprocessing.util.Finalize(None, qgs.exitQgis, exitpriority=10)
+    from .CreateGridPlugin import CreateGridPlugin
+
+    _worker_plugin = CreateGridPlugin(None)
+
+
+def timed_job(plugin, job, feedback):
+    """Run one job, returns (completed, memory budget summary or None, seconds)."""
+    start = time.perf_counter()
+    completed, memory_report = run_job(plugin, job, feedback)
+    return completed, memory_report, time.perf_counter() - start
+
+
+def run_worker_job(job):
+    """Process pool task: run one job with the worker's plugin."""
+    return timed_job(_worker_plugin, job, GridFeedback())
+
+
+def print_status(n, jobs, job, outcome):
+    """Print the status line of job n, returns False if it failed or was canceled."""
+    prefix = f"[{n}/{len(jobs)}] {job.command} {job.input}"
+    if isinstance(outcome, Exception):
+        print(f"{prefix}: failed: {outcome}")
+        return False
+    completed, memory_report, elapsed = outcome
+    print(f"{prefix}: {'done' if completed else 'canceled'} in {elapsed:.1f} s")
+    if memory_report:
+        print(f"[{n}/{len(jobs)}] {memory_report}")
+    return completed
+
+
+def run_jobs(jobs, workers=1, prefix_path=None):
+    """
+    Run all jobs, printing one status line per job, and return the number of
+    jobs that failed or were canceled. With one worker the jobs run in this
+    process, otherwise on a pool of `workers` processes that each start QGIS
+    once and run many jobs, since the per cell work holds the GIL.
+    """
+    if workers > 1 and len(jobs) > 1:
+        return run_jobs_in_pool(jobs, workers, prefix_path)
+
+    qgs = start_qgis(prefix_path)
+    try:
+        from .CreateGridPlugin import CreateGridPlugin
+
+        plugin = CreateGridPlugin(None)
+        failed = 0
+        for n, job in enumerate(jobs, 1):
+            feedback = GridFeedback.for_console(f"[{n}/{len(jobs)}] {job.command}")
+            try:
+                outcome = timed_job(plugin, job, feedback)
+            except KeyboardInterrupt:
+                logger.warning("Interrupted, canceling the remaining jobs.")
+                raise
+            except Exception as e:
+                outcome = e
+            if not print_status(n, jobs, job, outcome):
+                failed += 1
+        return failed
+    finally:
+        qgs.exitQgis()
+
+
+def run_jobs_in_pool(jobs, workers, prefix_path=None):
+    """Run the jobs on a pool of spawned worker processes, see run_jobs."""
+    context = multiprocessing.get_context("spawn")
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context,
+                                   initializer=start_worker, initargs=(prefix_path, logger.level))
+    try:
+        futures = [executor.submit(run_worker_job, job) for job in jobs]
+        failed = 0
+        for n, (job, future) in enumerate(zip(jobs, futures), 1):
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = e
+            if not print_status(n, jobs, job, outcome):
+                failed += 1
+    except KeyboardInterrupt:
+        logger.warning("Interrupted, canceling the remaining jobs.")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    return failed
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # Warnings and errors always go to stderr, -v adds the stage summaries and -vv the traces
+    enable_tracing({0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG), message_log=False)
+
+    jobs = read_jobs(args.jobs, parser) if args.command == "batch" else [args]
+    if not jobs:
+        print("No jobs to run.")
+        return 0
+    check_jobs(jobs, parser)
+    failed = run_jobs(jobs, args.workers, args.qgis_prefix)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
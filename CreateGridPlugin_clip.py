@@ -0,0 +1,69 @@
+"""
+Clipping of generated grids to the real boundary geometry.
+
+The boundary features are merged once and prepared with a GEOS geometry
+engine. Each grid row is first reduced to the column span where the row
+strip actually meets the boundary, so only the cells inside that span go
+through the prepared predicate test.
+"""
+import math
+
+from qgis.core import QgsGeometry, QgsRectangle
+
+CLIP_INTERSECTS = "intersects"
+CLIP_WITHIN = "within"
+CLIP_MODES = (CLIP_INTERSECTS, CLIP_WITHIN)
+
+
+class BoundaryClip:
+    def __init__(self, boundary_layer, mode=CLIP_INTERSECTS):
+        if mode not in CLIP_MODES:
+            raise ValueError(f"Unknown clip mode '{mode}'.")
+        self.mode = mode
+
+        geometries = [feature.geometry() for feature in boundary_layer.getFeatures() if feature.hasGeometry()]
+        self.geometry = QgsGeometry.unaryUnion(geometries)
+
+        self.engine = QgsGeometry.createGeometryEngine(self.geometry.constGet())
+        self.engine.prepareGeometry()
+
+    def column_span(self, top, length, xmin, width, n_cols):
+        """
+        Return the (col_start, col_stop) range of the row whose top edge is at
+        `top` that can contain kept cells. Returns (0, 0) for rows outside the boundary.
+        """
+        strip = QgsGeometry.fromRect(QgsRectangle(xmin, top - length, xmin + n_cols * width, top))
+        row_geom = self.geometry.intersection(strip)
+        if row_geom.isNull() or row_geom.isEmpty():
+            return 0, 0
+
+        bbox = row_geom.boundingBox()
+        col_start = max(int(math.floor((bbox.xMinimum() - xmin) / width)), 0)
+        col_stop = min(int(math.ceil((bbox.xMaximum() - xmin) / width)), n_cols)
+        return col_start, max(col_stop, col_start)
+
+    def grid_mask(self, xmin, ymax, length, width, n_rows, n_cols):
+        """
+        Return one bytearray per grid row, with 1 for the cells that are kept.
+        Only the cells inside each row's column span are tested.
+        """
+        mask = []
+        for row in range(n_rows):
+            top = ymax - row * length
+            row_mask = bytearray(n_cols)
+            col_start, col_stop = self.column_span(top, length, xmin, width, n_cols)
+            for col in range(col_start, col_stop):
+                left = xmin + col * width
+                cell = QgsGeometry.fromRect(QgsRectangle(left, top - length, left + width, top))
+                if self.keep(cell):
+                    row_mask[col] = 1
+            mask.append(row_mask)
+        return mask
+
+    def keep(self, cell_geometry):
+        """Return True if the cell passes the clip test against the prepared boundary."""
+        cell = cell_geometry.constGet()
+        if self.mode == CLIP_WITHIN:
+            return self.engine.contains(cell)
+        # Cells that only share an edge with the boundary are not kept
+        return self.engine.intersects(cell) and not self.engine.touches(cell)
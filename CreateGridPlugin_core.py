@@ -0,0 +1,181 @@
+"""
+Qt-free grid core of the Create Grid plugin.
+
+Everything that only depends on the grid extent and the cell size lives
+here: the cell layout, GridNo labels, neighbour lookups and the adjacency
+report format. The module imports neither PyQt5 nor qgis, so it can run in
+multiprocessing workers, scripts and tests without a QGIS application.
+The plugin, its tasks and the Processing algorithms are thin QGIS adapters
+on top of it; QGIS objects are only used through duck typing here.
+"""
+import csv
+import itertools
+import os
+
+from .CreateGridPlugin_engine import ADJACENCY_FIELDS, HAS_NUMPY, NEIGHBOUR_OFFSETS, grid_dimensions
+from .CreateGridPlugin_labels import decode_label, encode_label
+from .CreateGridPlugin_neighbourhood import CellLookup, lookup_neighbour_values, neighbour_values, neighbourhood_table
+
+REPORT_FIELDS = ["GridNo"] + ADJACENCY_FIELDS
+
+
+def parse_grid_label(grid_label):
+    """Parse a grid label (e.g. 'A1', 'AA2') into 0-based (row, col) indexes."""
+    return decode_label(grid_label)
+
+
+def generate_grid_label(row, col):
+    """Return the grid label of a 0-based (row, col) cell, or None for negative indexes."""
+    return encode_label(row, col)
+
+
+def label_neighbours(grid_label):
+    """
+    Return the labels of the eight cells around a label, in ADJACENCY_FIELDS
+    order, without checking that they exist. None where an index would be negative.
+    """
+    row, col = decode_label(grid_label)
+    return [encode_label(row + row_offset, col + col_offset) for row_offset, col_offset in NEIGHBOUR_OFFSETS]
+
+
+def label_adjacency(labels, feedback=None, existing=None):
+    """
+    Return the neighbour values of every label, one list in ADJACENCY_FIELDS
+    order per label: the neighbour's label where that label is one of the
+    `existing` labels (by default `labels`), else "". Empty labels get no neighbours.
+    With NumPy the labels are decoded and looked up in batches through the
+    "8" neighbourhood table, and existing may also be a CellLookup built
+    once for repeated calls; without it every label is decoded on its own.
+    Returns None if feedback was canceled.
+    """
+    if HAS_NUMPY:
+        if existing is None:
+            table = neighbourhood_table(labels, feedback=feedback)
+            return None if table is None else neighbour_values(table)
+        lookup = existing if isinstance(existing, CellLookup) else CellLookup(existing)
+        return lookup_neighbour_values(labels, lookup, feedback=feedback)
+
+    existing = set(labels if existing is None else existing)
+    existing.discard("")
+    no_neighbours = [""] * len(ADJACENCY_FIELDS)
+    total = max(len(labels), 1)
+    values = []
+    for processed, label in enumerate(labels, 1):
+        if not label:
+            values.append(no_neighbours)
+            continue
+        values.append([neighbour if neighbour in existing else "" for neighbour in label_neighbours(label)])
+        if feedback is not None and processed % 10000 == 0:
+            if feedback.canceled:
+                return None
+            feedback.set_progress(processed * 100 / total)
+    return values
+
+
+def neighbour_labels(row, col, n_rows, n_cols, cell_mask=None):
+    """
+    Return the labels of the eight neighbours of a grid cell, in
+    ADJACENCY_FIELDS order, with "" where the neighbour is outside the grid
+    or not kept in cell_mask (indexable as cell_mask[row][col]).
+    """
+    labels = []
+    for row_offset, col_offset in NEIGHBOUR_OFFSETS:
+        n_row, n_col = row + row_offset, col + col_offset
+        if (0 <= n_row < n_rows and 0 <= n_col < n_cols
+                and (cell_mask is None or cell_mask[n_row][n_col])):
+            labels.append(encode_label(n_row, n_col))
+        else:
+            labels.append("")
+    return labels
+
+
+class GridLayout:
+    def __init__(self, xmin, ymin, xmax, ymax, length, width):
+        """
+        Layout of the grid covering an extent with cells `width` wide and
+        `length` tall. Row 0, column 0 is the top left cell and rows grow downwards.
+        """
+        self.xmin = xmin
+        self.ymin = ymin
+        self.xmax = xmax
+        self.ymax = ymax
+        self.length = length
+        self.width = width
+        self.n_rows, self.n_cols = grid_dimensions(xmin, ymin, xmax, ymax, length, width)
+
+    @classmethod
+    def from_extent(cls, extent, length, width):
+        """Build the layout of a QgsRectangle, or anything with the same x/yMinimum/Maximum methods."""
+        return cls(extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum(), length, width)
+
+    def __len__(self):
+        return self.n_rows * self.n_cols
+
+    def bounds(self):
+        """Return the (xmin, ymin, xmax, ymax) extent the grid was laid out on."""
+        return self.xmin, self.ymin, self.xmax, self.ymax
+
+    def contains(self, row, col):
+        return 0 <= row < self.n_rows and 0 <= col < self.n_cols
+
+    def cell_corners(self, row, col):
+        """Return the (left, top, right, bottom) coordinates of a cell."""
+        left = self.xmin + col * self.width
+        top = self.ymax - row * self.length
+        return left, top, left + self.width, top - self.length
+
+    def cell_ring(self, row, col):
+        """Return the closed ring of a cell as five (x, y) tuples, clockwise from the top left corner."""
+        left, top, right, bottom = self.cell_corners(row, col)
+        return [(left, top), (right, top), (right, bottom), (left, bottom), (left, top)]
+
+    def cell_label(self, row, col):
+        return encode_label(row, col)
+
+    def neighbour_labels(self, row, col, cell_mask=None):
+        return neighbour_labels(row, col, self.n_rows, self.n_cols, cell_mask)
+
+
+def report_path_is_valid(out_path):
+    """Return True if out_path can receive a report, i.e. its directory exists."""
+    return bool(out_path) and os.path.isdir(os.path.dirname(out_path))
+
+
+def report_batches(rows, batch_size, total=None, feedback=None):
+    """
+    Yield lists of up to batch_size rows, reporting progress once each batch
+    has been handled. Stops early when feedback is canceled, callers check
+    feedback.canceled afterwards.
+    """
+    total = max(total or 0, 1)
+    done = 0
+    rows = iter(rows)
+    while feedback is None or not feedback.canceled:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+        done += len(batch)
+        if feedback is not None:
+            feedback.set_progress(done * 100 / total)
+
+
+def write_report(out_path, rows, total=None, feedback=None, columns=None, batch_size=10000):
+    """
+    Write the adjacency report as CSV: a header line with the column names
+    (REPORT_FIELDS by default) followed by one line per row, None values
+    written as empty strings and values quoted where needed.
+    rows is an iterable of value sequences in column order and total its
+    length, used for progress. Rows are written batch_size at a time.
+    Returns the number of rows written, or None if feedback was canceled.
+    """
+    written = 0
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(columns or REPORT_FIELDS)
+        for batch in report_batches(rows, batch_size, total, feedback):
+            writer.writerows(batch)
+            written += len(batch)
+    if feedback is not None and feedback.canceled:
+        return None
+    return written
@@ -13,6 +13,11 @@ from PyQt5 import uic
 from qgis.core import QgsProject
 import os
 
+from .CreateGridPlugin_formats import REPORT_FILE_FILTER
+from .CreateGridPlugin_hex import CELL_SHAPES
+from .CreateGridPlugin_neighbourhood import NEIGHBOURHOODS
+from .CreateGridPlugin_output import GRID_FILE_FILTER
+
 FORM_CLASS, _ = uic.loadUiType(os.path.join(os.path.dirname(__file__), 'CreateGridPlugin_dialog_base.ui'))
 
 class CreateGridPluginDialog(QDialog, FORM_CLASS):
@@ -26,13 +31,15 @@ class CreateGridPluginDialog(QDialog, FORM_CLASS):
 
         # Connect signals for layer selection changes
         self.existingGridLayerComboBox.currentIndexChanged.connect(self.populate_fields)
+        self.shapeComboBox.currentIndexChanged.connect(self.update_shape_inputs)
 
         # OK / Cancel
         self.buttonBox.button(QDialogButtonBox.Ok).clicked.connect(self.ok_button_clicked)
-        self.buttonBox.button(QDialogButtonBox.Cancel).clicked.connect(self.reject)
+        self.buttonBox.button(QDialogButtonBox.Cancel).clicked.connect(self.cancel_button_clicked)
 
         # Connect the browse button
         self.browseButton.clicked.connect(self.browse_output_path)
+        self.gridBrowseButton.clicked.connect(self.browse_grid_path)
 
     def populate_layers(self):
         """
@@ -71,15 +78,31 @@ class CreateGridPluginDialog(QDialog, FORM_CLASS):
         for field in fields:
             self.existingGridLayerComboBox_2.addItem(field.name())
 
+    def update_shape_inputs(self):
+        """Disable the cell length and clipping inputs, which do not apply to hexagons."""
+        square = self.get_cell_shape() == "square"
+        self.lengthlineEdit.setEnabled(square)
+        if not square:
+            self.clipComboBox.setCurrentIndex(0)
+        self.clipComboBox.setEnabled(square)
+
     def browse_output_path(self):
-        """Open a file dialog to pick the output text file path."""
+        """Open a file dialog to pick the output report path, its extension selects the format."""
         # Default file name
         default_name = os.path.join(os.path.expanduser("~"), "grid_output.txt")
 
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save as text", default_name, "Text Files (*.txt)")
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save as text", default_name, REPORT_FILE_FILTER)
         if file_path:
             self.outPathLineEdit.setText(file_path)
 
+    def browse_grid_path(self):
+        """Open a file dialog to pick the GeoPackage or FlatGeobuf file a new grid is written to."""
+        default_name = os.path.join(os.path.expanduser("~"), "grid.gpkg")
+
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save grid as", default_name, GRID_FILE_FILTER)
+        if file_path:
+            self.gridPathLineEdit.setText(file_path)
+
     def ok_button_clicked_1(self):
         self.accept()
 
@@ -93,6 +116,11 @@ class CreateGridPluginDialog(QDialog, FORM_CLASS):
         self.plugin.handle_task()
         
 
+    def cancel_button_clicked(self):
+        """Cancel the running task, or close the dialog when nothing is running."""
+        if not self.plugin.cancel_task():
+            self.reject()
+
     def get_length(self):
         """Return length as a float."""
         try:
@@ -107,10 +135,68 @@ class CreateGridPluginDialog(QDialog, FORM_CLASS):
         except ValueError:
             return 0.0  # Default to 0 if invalid
 
+    def get_engine(self):
+        """Return the cell geometry engine to use for a new grid."""
+        if self.tiledEngineCheckBox.isChecked():
+            return "tiled"
+        return "numpy" if self.numpyEngineCheckBox.isChecked() else "loop"
+
+    def get_chunk_size(self):
+        """Return the streaming chunk size, or None to add all cells at once."""
+        try:
+            chunk_size = int(self.chunkSizeLineEdit.text())
+        except ValueError:
+            return None
+        return chunk_size if chunk_size > 0 else None
+
+    def get_memory_budget(self):
+        """Return the memory budget of a run in MiB, or None for no limit."""
+        try:
+            megabytes = int(self.memoryBudgetLineEdit.text())
+        except ValueError:
+            return None
+        return megabytes if megabytes > 0 else None
+
+    def get_cell_shape(self):
+        """Return the cell shape of a new grid: "square", "hex_flat" or "hex_pointy"."""
+        return CELL_SHAPES[max(self.shapeComboBox.currentIndex(), 0)]
+
+    def get_clip_mode(self):
+        """Return the boundary clip mode for a new grid, or None to keep the full extent."""
+        return {1: "intersects", 2: "within"}.get(self.clipComboBox.currentIndex())
+
+    def get_adjacency_mode(self):
+        """Return how neighbours of an existing grid are found: "label" or "topology"."""
+        return "topology" if self.topologyCheckBox.isChecked() else "label"
+
+    def get_neighbourhood(self):
+        """Return the neighbourhood assigned to an existing grid: "8", "4" or "ring2" to "ring5"."""
+        return NEIGHBOURHOODS[max(self.neighbourhoodComboBox.currentIndex(), 0)]
+
+    def get_neighbour_list(self):
+        """Return True if neighbours go to the single Neighbours list field instead of one field each."""
+        return self.neighbourListCheckBox.isChecked()
+
+    def get_write_sidecar(self):
+        """Return True if the binary adjacency sidecar should be written next to the report."""
+        return self.sidecarCheckBox.isChecked()
+
+    def get_undo(self):
+        """Return True if adjacency edits should go through the undoable edit buffer."""
+        return self.undoCheckBox.isChecked()
+
+    def get_live_adjacency(self):
+        """Return True if the grid's adjacency should follow its later edits."""
+        return self.liveCheckBox.isChecked()
+
     def get_out_path(self):
         """Return the chosen path for saving the text file."""
         return self.outPathLineEdit.text().strip()
 
+    def get_grid_path(self):
+        """Return the grid file path for a new grid, or "" to create a memory layer."""
+        return self.gridPathLineEdit.text().strip()
+
     def get_selected_layer(self):
         """Return the selected layer name for creating a new grid."""
         return self.layerComboBox.currentText()
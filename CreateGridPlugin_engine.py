@@ -0,0 +1,180 @@
+"""
+Vectorized cell geometry engine for the Create Grid plugin.
+
+Computes every cell corner of a grid extent as NumPy arrays and packs the
+cell polygons into WKB buffers in bulk, so the plugin does not have to build
+five QgsPointXY objects per cell. The cell layout and labels are the same as
+the ones produced by the row/column loop in CreateGridPlugin.generate_grid.
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the plugin falls back to the loop engine
+    np = None
+
+from .CreateGridPlugin_labels import encode_labels
+
+HAS_NUMPY = np is not None
+
+# Adjacency fields and the matching (row, column) offsets, rows grow downwards
+ADJACENCY_FIELDS = [
+    "Left", "Top_Left", "Top", "Top_Right",
+    "Right", "Bottom_Right", "Bottom", "Bottom_Left"
+]
+NEIGHBOUR_OFFSETS = [
+    (0, -1), (-1, -1), (-1, 0), (-1, 1),
+    (0, 1), (1, 1), (1, 0), (1, -1),
+]
+
+# Little endian WKB polygon with one closed ring of five points
+WKB_POLYGON = 3
+WKB_CELL_DTYPE = None if np is None else np.dtype([
+    ("byte_order", "u1"),
+    ("wkb_type", "<u4"),
+    ("num_rings", "<u4"),
+    ("num_points", "<u4"),
+    ("coords", "<f8", (10,)),
+])
+WKB_CELL_SIZE = 93
+
+
+# ADJACENCY_FIELDS index for each 45 degree bearing sector, counter-clockwise from east
+BEARING_DIRECTIONS = [4, 3, 2, 1, 0, 7, 6, 5]
+
+
+def bearing_direction(dx, dy):
+    """Return the ADJACENCY_FIELDS index of the direction pointing along (dx, dy)."""
+    sector = int(round(math.degrees(math.atan2(dy, dx)) / 45.0)) % 8
+    return BEARING_DIRECTIONS[sector]
+
+
+def grid_dimensions(xmin, ymin, xmax, ymax, length, width):
+    """
+    Return the number of rows and columns needed to cover the extent.
+    Rows are `length` tall and columns are `width` wide, matching generate_grid.
+    """
+    n_rows = max(int(math.ceil((ymax - ymin) / length)), 0)
+    n_cols = max(int(math.ceil((xmax - xmin) / width)), 0)
+    return n_rows, n_cols
+
+
+def cell_indices(n_cols, row_start, row_stop):
+    """Return flat row and column index arrays for rows [row_start, row_stop)."""
+    rows = np.arange(row_start, row_stop, dtype=np.int64)
+    cols = np.arange(n_cols, dtype=np.int64)
+    row_idx = np.repeat(rows, n_cols)
+    col_idx = np.tile(cols, len(rows))
+    return row_idx, col_idx
+
+
+def cell_corners(xmin, ymax, length, width, row_idx, col_idx):
+    """
+    Return the (left, top, right, bottom) coordinate arrays of the given cells.
+    The first cell starts at the top left corner of the extent.
+    """
+    left = xmin + col_idx * width
+    top = ymax - row_idx * length
+    return left, top, left + width, top - length
+
+
+def cell_wkb_buffer(left, top, right, bottom):
+    """
+    Pack the cells described by the corner arrays into one contiguous WKB buffer.
+    Each cell takes WKB_CELL_SIZE bytes, ring order follows generate_grid.
+    """
+    records = np.empty(len(left), dtype=WKB_CELL_DTYPE)
+    records["byte_order"] = 1
+    records["wkb_type"] = WKB_POLYGON
+    records["num_rings"] = 1
+    records["num_points"] = 5
+    coords = records["coords"]
+    coords[:, 0] = left
+    coords[:, 1] = top
+    coords[:, 2] = right
+    coords[:, 3] = top
+    coords[:, 4] = right
+    coords[:, 5] = bottom
+    coords[:, 6] = left
+    coords[:, 7] = bottom
+    coords[:, 8] = left
+    coords[:, 9] = top
+    return records.tobytes()
+
+
+def split_wkb_buffer(buffer, cell_size=WKB_CELL_SIZE):
+    """Split a packed WKB buffer into one bytes object per cell of cell_size bytes."""
+    return [buffer[i:i + cell_size] for i in range(0, len(buffer), cell_size)]
+
+
+def cell_labels(row_idx, col_idx):
+    """
+    Return the GridNo labels of the given cells, using the same
+    column letters + row number scheme as generate_grid.
+    """
+    return encode_labels(row_idx, col_idx)
+
+
+def iter_row_bands(n_rows, rows_per_band):
+    """Yield (row_start, row_stop) pairs covering all rows in bands."""
+    rows_per_band = max(int(rows_per_band), 1)
+    for row_start in range(0, n_rows, rows_per_band):
+        yield row_start, min(row_start + rows_per_band, n_rows)
+
+
+def mask_array(mask_rows):
+    """Convert a list of per row bytearray masks into a 2D boolean array."""
+    if not mask_rows:
+        return np.zeros((0, 0), dtype=bool)
+    return np.frombuffer(b"".join(mask_rows), dtype=np.uint8).reshape(len(mask_rows), -1).astype(bool)
+
+
+def neighbour_labels(row_idx, col_idx, n_rows, n_cols, cell_mask=None, mask_row_start=0):
+    """
+    Return one label list per NEIGHBOUR_OFFSETS entry for the given cells.
+    Neighbours outside the grid, or not kept in cell_mask, get "".
+    cell_mask may hold only the grid rows from mask_row_start on, as long as
+    it covers the rows next to the given cells.
+    """
+    neighbours = []
+    for row_offset, col_offset in NEIGHBOUR_OFFSETS:
+        n_row = row_idx + row_offset
+        n_col = col_idx + col_offset
+        valid = (n_row >= 0) & (n_row < n_rows) & (n_col >= 0) & (n_col < n_cols)
+        if cell_mask is not None:
+            valid[valid] = cell_mask[n_row[valid] - mask_row_start, n_col[valid]]
+        labels = np.full(len(row_idx), "", dtype=object)
+        labels[valid] = cell_labels(n_row[valid], n_col[valid])
+        neighbours.append(labels.tolist())
+    return neighbours
+
+
+def build_cells(xmin, ymin, xmax, ymax, length, width, row_start=0, row_stop=None, cell_mask=None, mask_row_start=0):
+    """
+    Build the cells of a row band in one step.
+    Returns (labels, wkb_list, neighbours) for rows [row_start, row_stop) of
+    the grid, where neighbours holds one label list per adjacency field.
+    When cell_mask (a boolean array of grid rows from mask_row_start on, by
+    default the full grid) is given, only kept cells are built and clipped
+    neighbours are left empty.
+    """
+    labels, wkb_buffer, neighbours = build_cell_buffer(
+        xmin, ymin, xmax, ymax, length, width, row_start, row_stop, cell_mask, mask_row_start
+    )
+    return labels, split_wkb_buffer(wkb_buffer), neighbours
+
+
+def build_cell_buffer(xmin, ymin, xmax, ymax, length, width, row_start=0, row_stop=None, cell_mask=None,
+                      mask_row_start=0):
+    """Same as build_cells, with the cell polygons left in one packed WKB buffer."""
+    n_rows, n_cols = grid_dimensions(xmin, ymin, xmax, ymax, length, width)
+    if row_stop is None:
+        row_stop = n_rows
+    row_idx, col_idx = cell_indices(n_cols, row_start, min(row_stop, n_rows))
+    if cell_mask is not None:
+        keep = cell_mask[row_idx - mask_row_start, col_idx]
+        row_idx, col_idx = row_idx[keep], col_idx[keep]
+    left, top, right, bottom = cell_corners(xmin, ymax, length, width, row_idx, col_idx)
+    wkb_buffer = cell_wkb_buffer(left, top, right, bottom)
+    neighbours = neighbour_labels(row_idx, col_idx, n_rows, n_cols, cell_mask, mask_row_start)
+    return cell_labels(row_idx, col_idx), wkb_buffer, neighbours
@@ -0,0 +1,84 @@
+"""
+Progress and cancellation service shared by all grid stages.
+
+Stages receive a GridFeedback instead of touching the dialog. Progress
+updates are throttled by time and by percentage change before they reach
+the sink (a QProgressBar, a QgsTask, a QgsProcessingFeedback or the
+console), and the inner loops only read the plain `canceled` flag.
+The module has no Qt dependency, sinks are used through duck typing.
+"""
+import sys
+import time
+
+
+class GridFeedback:
+    def __init__(self, on_progress=None, min_interval=0.2, min_step=1.0):
+        """
+        on_progress: callable receiving a 0-100 progress value, or None.
+        min_interval: minimum seconds between two progress updates.
+        min_step: minimum percentage change between two progress updates.
+        """
+        self.on_progress = on_progress
+        self.min_interval = min_interval
+        self.min_step = min_step
+        self.canceled = False
+        self._last_value = None
+        self._last_time = 0.0
+
+    @classmethod
+    def for_progress_bar(cls, progress_bar, **kwargs):
+        """Feedback that drives a QProgressBar."""
+        return cls(lambda value: progress_bar.setValue(int(value)), **kwargs)
+
+    @classmethod
+    def for_task(cls, task, **kwargs):
+        """
+        Feedback that reports to a QgsTask. The task must call cancel() on the
+        feedback when it is canceled, see GridTask.cancel.
+        """
+        return cls(task.setProgress, **kwargs)
+
+    @classmethod
+    def for_processing(cls, processing_feedback, **kwargs):
+        """Feedback that reports to a QgsProcessingFeedback and follows its cancellation."""
+        feedback = cls(processing_feedback.setProgress, **kwargs)
+        processing_feedback.canceled.connect(feedback.cancel)
+        if processing_feedback.isCanceled():
+            feedback.cancel()
+        return feedback
+
+    @classmethod
+    def for_console(cls, label="Create Grid", stream=None, **kwargs):
+        """Feedback that prints the progress percentage on one console line."""
+        stream = stream or sys.stderr
+
+        def write(value):
+            stream.write(f"\r{label}: {value:5.1f}%")
+            if value >= 100:
+                stream.write("\n")
+            stream.flush()
+
+        return cls(write, **kwargs)
+
+    def set_progress(self, value):
+        """
+        Report stage progress. The update is dropped unless it moved by at
+        least min_step and min_interval has passed; 0 and 100 always go through.
+        """
+        if self.on_progress is None:
+            return
+        value = min(max(float(value), 0.0), 100.0)
+        if self._last_value is not None and 0.0 < value < 100.0:
+            if abs(value - self._last_value) < self.min_step:
+                return
+            if time.monotonic() - self._last_time < self.min_interval:
+                return
+        if value == self._last_value:
+            return
+        self._last_value = value
+        self._last_time = time.monotonic()
+        self.on_progress(value)
+
+    def cancel(self):
+        """Ask the running stage to stop at its next check."""
+        self.canceled = True
@@ -0,0 +1,154 @@
+"""
+Report file formats of the Create Grid plugin.
+
+The report format follows the file extension:
+    .txt, .csv  CSV text, see CreateGridPlugin_core.write_report
+    .parquet    Parquet, one row group per report batch
+    .arrows     Arrow IPC stream, one record batch per report batch
+    .npz        NumPy arrays: the int32 (n_cells, n_dirs) `neighbours` table
+                of AdjacencyTable (row indexes in neighbour column order, -1
+                for no neighbour) and, when every label is a grid label, the
+                int32 `rows` and `cols` of each cell decoded from its label
+                (-1 for empty labels)
+Parquet and Arrow columns are dictionary encoded strings, so every label is
+stored once per batch and referenced by index. They need pyarrow, which is
+optional like NumPy. The Arrow stream format is used because it allows each
+batch to carry its own dictionaries; read it with pyarrow.ipc.open_stream.
+"""
+import os
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, only the Parquet and Arrow reports need it
+    pa = pq = None
+
+from .CreateGridPlugin_adjacency import AdjacencyTable
+from .CreateGridPlugin_core import REPORT_FIELDS, report_batches, write_report
+from .CreateGridPlugin_labels import decode_labels
+from .CreateGridPlugin_neighbourhood import LIST_FIELD
+
+HAS_PYARROW = pa is not None
+
+# Letters and row number of a grid label, short enough for int32 rows and columns
+GRID_LABEL = re.compile(r"[A-Za-z]{1,6}[0-9]{1,9}")
+
+REPORT_FORMATS = {".txt": "csv", ".csv": "csv", ".parquet": "parquet", ".arrows": "arrow", ".npz": "npz"}
+# Only the formats that can be written with the installed packages are offered
+REPORT_FILE_FILTER = ";;".join(
+    ["Text Files (*.txt)", "CSV (*.csv)"]
+    + (["Parquet (*.parquet)", "Arrow IPC stream (*.arrows)"] if HAS_PYARROW else [])
+    + (["NumPy arrays (*.npz)"] if np is not None else [])
+)
+
+
+def report_format(path):
+    """Return the report format of a path from its extension, "csv" for unknown extensions."""
+    return REPORT_FORMATS.get(os.path.splitext(path)[1].lower(), "csv")
+
+
+def check_report_file(out_path, columns=None):
+    """
+    Raise if a report with these columns cannot be written to out_path,
+    so callers can reject it before any work is done: RuntimeError when the
+    package its format needs is missing, ValueError when the columns do
+    not fit the format.
+    """
+    columns = list(columns or REPORT_FIELDS)
+    report_type = report_format(out_path)
+    if report_type in ("parquet", "arrow") and not HAS_PYARROW:
+        raise RuntimeError("pyarrow is needed to write Parquet and Arrow reports.")
+    if report_type == "npz":
+        if np is None:
+            raise RuntimeError("NumPy is needed to write NumPy reports.")
+        if len(columns) < 2 or LIST_FIELD in columns:
+            raise ValueError("NumPy reports need the label column followed by one column per neighbour.")
+
+
+def write_report_file(out_path, rows, total=None, feedback=None, columns=None, batch_size=10000):
+    """
+    Write a report in the format given by the out_path extension.
+    Takes the same arguments as write_report and returns the number of rows
+    written, or None if feedback was canceled. Raises like check_report_file.
+    """
+    columns = list(columns or REPORT_FIELDS)
+    check_report_file(out_path, columns)
+    report_type = report_format(out_path)
+    if report_type in ("parquet", "arrow"):
+        return write_arrow_report(out_path, rows, columns, report_type, total, feedback, batch_size)
+    if report_type == "npz":
+        return write_npz_report(out_path, rows, columns, total, feedback, batch_size)
+    return write_report(out_path, rows, total, feedback, columns, batch_size)
+
+
+def write_arrow_report(out_path, rows, columns, report_type="parquet", total=None, feedback=None, batch_size=10000):
+    """Write a Parquet or Arrow IPC stream report with dictionary encoded string columns."""
+    schema = pa.schema([(name, pa.dictionary(pa.int32(), pa.string())) for name in columns])
+    if report_type == "parquet":
+        writer = pq.ParquetWriter(out_path, schema)
+    else:
+        writer = pa.ipc.new_stream(out_path, schema)
+
+    written = 0
+    try:
+        for batch in report_batches(rows, batch_size, total, feedback):
+            arrays = [
+                pa.array([None if value is None else str(value) for value in values], type=pa.string())
+                .dictionary_encode()
+                for values in zip(*batch)
+            ]
+            record_batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            if report_type == "parquet":
+                writer.write_table(pa.Table.from_batches([record_batch]))
+            else:
+                writer.write_batch(record_batch)
+            written += len(batch)
+    finally:
+        writer.close()
+
+    if feedback is not None and feedback.canceled:
+        return None
+    return written
+
+
+def write_npz_report(out_path, rows, columns, total=None, feedback=None, batch_size=10000):
+    """
+    Write the integer rows, cols and neighbours arrays of a report to a .npz
+    file. The columns must be the label column followed by one column per
+    neighbour direction, e.g. the eight adjacency fields or the six hexagon fields.
+    """
+    labels = []
+    neighbour_labels = []
+    for batch in report_batches(rows, batch_size, total, feedback):
+        for row in batch:
+            labels.append("" if row[0] is None else str(row[0]))
+            neighbour_labels.append(row[1:])
+    if feedback is not None and feedback.canceled:
+        return None
+
+    table = AdjacencyTable.from_neighbour_labels(labels, neighbour_labels, len(columns) - 1)
+    arrays = {"neighbours": table.neighbours}
+    cells = grid_cells(labels)
+    if cells is not None:
+        arrays["rows"], arrays["cols"] = cells
+    np.savez(out_path, **arrays)
+    return len(labels)
+
+
+def grid_cells(labels):
+    """
+    Return the int32 (rows, cols) arrays decoded from labels, -1 for empty
+    labels, or None when a label is not a grid label ('A1', 'AA2', ...), e.g.
+    the numbers or UUIDs of grids whose adjacency comes from their geometries.
+    """
+    present = np.array([bool(label) for label in labels], dtype=bool)
+    if not all(GRID_LABEL.fullmatch(label) for label in labels if label):
+        return None
+    rows, cols = decode_labels([label or "A1" for label in labels])
+    return np.where(present, rows, -1).astype(np.int32), np.where(present, cols, -1).astype(np.int32)
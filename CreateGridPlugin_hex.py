@@ -0,0 +1,176 @@
+"""
+Vectorized hexagonal grid engine for the Create Grid plugin.
+
+Hexagons are laid out in offset rows and columns, row 0, column 0 being the
+top left cell, and labelled with the same column letters + row number codec
+as square cells ('A1', 'B1', ..., 'AA2'). Flat-top grids shift odd columns
+down by half a cell ("odd-q"), pointy-top grids shift odd rows right by half
+a cell ("odd-r"). Neighbours come from axial (q, r) coordinates: the six
+neighbours of a cell are its axial position plus the six axial directions,
+converted back to rows and columns, so no geometry is ever tested.
+
+`size` is the distance between two opposite edges, which is also the
+distance between the centres of two neighbouring cells.
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .CreateGridPlugin_adjacency import NO_NEIGHBOUR, AdjacencyTable
+from .CreateGridPlugin_engine import ADJACENCY_FIELDS, WKB_POLYGON, cell_indices, cell_labels, split_wkb_buffer
+
+CELL_SHAPES = ["square", "hex_flat", "hex_pointy"]
+HEX_ORIENTATIONS = ["flat", "pointy"]
+SQRT3 = math.sqrt(3.0)
+
+# Axial (q, r) directions and the matching neighbour fields, clockwise from the top
+AXIAL_DIRECTIONS = {
+    "flat": [(0, -1), (1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0)],
+    "pointy": [(1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1)],
+}
+HEX_FIELDS = {
+    "flat": ["N", "NE", "SE", "S", "SW", "NW"],
+    "pointy": ["NE", "E", "SE", "SW", "W", "NW"],
+}
+# Vertex angles in degrees, clockwise like the square cell rings
+VERTEX_ANGLES = {
+    "flat": [180, 120, 60, 0, -60, -120],
+    "pointy": [150, 90, 30, -30, -90, -150],
+}
+
+# Little endian WKB polygon with one closed ring of seven points
+WKB_HEX_DTYPE = None if np is None else np.dtype([
+    ("byte_order", "u1"),
+    ("wkb_type", "<u4"),
+    ("num_rings", "<u4"),
+    ("num_points", "<u4"),
+    ("coords", "<f8", (14,)),
+])
+
+
+def hex_orientation(cell_shape):
+    """Return the hexagon orientation of a cell shape, or None for square cells."""
+    if cell_shape not in CELL_SHAPES:
+        raise ValueError(f"Unknown cell shape '{cell_shape}', expected one of {', '.join(CELL_SHAPES)}.")
+    return cell_shape[4:] if cell_shape.startswith("hex_") else None
+
+
+def neighbour_fields(cell_shape):
+    """Return the neighbour fields of a cell shape: the eight adjacency fields or six hexagon ones."""
+    orientation = hex_orientation(cell_shape)
+    return list(ADJACENCY_FIELDS if orientation is None else HEX_FIELDS[orientation])
+
+
+def check_orientation(orientation):
+    if orientation not in HEX_ORIENTATIONS:
+        raise ValueError(f"Unknown hexagon orientation '{orientation}', expected 'flat' or 'pointy'.")
+
+
+def hex_radius(size):
+    """Return the centre to vertex distance of hexagons `size` wide across their edges."""
+    return size / SQRT3
+
+
+def hex_dimensions(xmin, ymin, xmax, ymax, size, orientation):
+    """Return the number of rows and columns of hexagons needed to cover the extent."""
+    check_orientation(orientation)
+    radius = hex_radius(size)
+    across, along = (ymax - ymin, xmax - xmin) if orientation == "flat" else (xmax - xmin, ymax - ymin)
+    # `size` apart across the shifted lines, 1.5 radius apart along them
+    n_across = max(int(math.ceil(across / size + 0.5)), 0)
+    n_along = max(int(math.ceil((along - radius) / (1.5 * radius))) + 1, 0) if along > 0 else 0
+    return (n_across, n_along) if orientation == "flat" else (n_along, n_across)
+
+
+def hex_centres(xmin, ymax, size, orientation, row_idx, col_idx):
+    """Return the x and y centre arrays of the given cells."""
+    radius = hex_radius(size)
+    if orientation == "flat":
+        x = xmin + radius / 2 + 1.5 * radius * col_idx
+        y = ymax - size * (row_idx + 0.5 * (col_idx & 1))
+    else:
+        x = xmin + size * (col_idx + 0.5 * (row_idx & 1))
+        y = ymax - radius / 2 - 1.5 * radius * row_idx
+    return x, y
+
+
+def hex_wkb_buffer(x, y, size, orientation):
+    """Pack hexagons centred on the x, y arrays into one contiguous WKB buffer."""
+    radius = hex_radius(size)
+    angles = np.radians(VERTEX_ANGLES[orientation] + VERTEX_ANGLES[orientation][:1])
+    records = np.empty(len(x), dtype=WKB_HEX_DTYPE)
+    records["byte_order"] = 1
+    records["wkb_type"] = WKB_POLYGON
+    records["num_rings"] = 1
+    records["num_points"] = len(angles)
+    coords = records["coords"]
+    coords[:, 0::2] = x[:, None] + radius * np.cos(angles)
+    coords[:, 1::2] = y[:, None] + radius * np.sin(angles)
+    return records.tobytes()
+
+
+def offset_to_axial(row_idx, col_idx, orientation):
+    """Convert offset row and column arrays into axial (q, r) arrays."""
+    if orientation == "flat":
+        return col_idx, row_idx - (col_idx - (col_idx & 1)) // 2
+    return col_idx - (row_idx - (row_idx & 1)) // 2, row_idx
+
+
+def axial_to_offset(q, r, orientation):
+    """Convert axial (q, r) arrays back into offset (row, col) arrays."""
+    if orientation == "flat":
+        return r + (q - (q & 1)) // 2, q
+    return r, q + (r - (r & 1)) // 2
+
+
+def hex_neighbour_cells(row_idx, col_idx, n_rows, n_cols, orientation):
+    """
+    Return, per HEX_FIELDS entry, the (row, col, valid) arrays of the given
+    cells' neighbours, valid being False outside the grid.
+    """
+    q, r = offset_to_axial(row_idx, col_idx, orientation)
+    neighbours = []
+    for dq, dr in AXIAL_DIRECTIONS[orientation]:
+        n_row, n_col = axial_to_offset(q + dq, r + dr, orientation)
+        valid = (n_row >= 0) & (n_row < n_rows) & (n_col >= 0) & (n_col < n_cols)
+        neighbours.append((n_row, n_col, valid))
+    return neighbours
+
+
+def hex_neighbour_labels(row_idx, col_idx, n_rows, n_cols, orientation):
+    """Return one label list per HEX_FIELDS entry for the given cells, "" outside the grid."""
+    neighbours = []
+    for n_row, n_col, valid in hex_neighbour_cells(row_idx, col_idx, n_rows, n_cols, orientation):
+        labels = np.full(len(row_idx), "", dtype=object)
+        labels[valid] = cell_labels(n_row[valid], n_col[valid])
+        neighbours.append(labels.tolist())
+    return neighbours
+
+
+def build_hex_cells(xmin, ymin, xmax, ymax, size, orientation, row_start=0, row_stop=None):
+    """
+    Build the hexagons of a row band in one step, like build_cells.
+    Returns (labels, wkb_list, neighbours) for rows [row_start, row_stop),
+    where neighbours holds one label list per HEX_FIELDS entry.
+    """
+    n_rows, n_cols = hex_dimensions(xmin, ymin, xmax, ymax, size, orientation)
+    if row_stop is None:
+        row_stop = n_rows
+    row_idx, col_idx = cell_indices(n_cols, row_start, min(row_stop, n_rows))
+    x, y = hex_centres(xmin, ymax, size, orientation, row_idx, col_idx)
+    wkb_list = split_wkb_buffer(hex_wkb_buffer(x, y, size, orientation), WKB_HEX_DTYPE.itemsize)
+    neighbours = hex_neighbour_labels(row_idx, col_idx, n_rows, n_cols, orientation)
+    return cell_labels(row_idx, col_idx), wkb_list, neighbours
+
+
+def hex_table(n_rows, n_cols, orientation):
+    """Return the AdjacencyTable of a hexagonal grid, columns in HEX_FIELDS order, cells row by row."""
+    row_idx, col_idx = cell_indices(n_cols, 0, n_rows)
+    neighbours = np.full((len(row_idx), 6), NO_NEIGHBOUR, dtype=np.int32)
+    for direction, (n_row, n_col, valid) in enumerate(
+            hex_neighbour_cells(row_idx, col_idx, n_rows, n_cols, orientation)):
+        neighbours[valid, direction] = n_row[valid] * n_cols + n_col[valid]
+    return AdjacencyTable(cell_labels(row_idx, col_idx), neighbours)
@@ -0,0 +1,127 @@
+"""
+In-memory neighbour queries over a grid layer.
+
+A GridIndex is built once from the labels (and feature ids) of a grid and
+then maps label, fid and (row, col) to each other: labels and fids through
+dictionaries, positions through the vectorized CellLookup of the
+neighbourhood module. Position lookups are a direct array lookup on dense
+grids and a binary search over the sorted cells on sparse ones. Neighbour, k-ring and rectangular range
+queries only touch the index, never the layer. The index is a snapshot,
+build a new one after the layer's labels change.
+
+    index = GridIndex.from_layer(grid_layer, "GridNo")
+    index.neighbours("B2")          # ['A2', 'A1', 'B1', 'C1', 'C2', 'C3', 'B3', 'A3']
+    index.ring("B2", 2)             # every cell up to 2 rows and columns away
+    index.rectangle("B2", "D5")     # cells of columns B to D, rows 2 to 5
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .CreateGridPlugin_adjacency import NO_NEIGHBOUR
+from .CreateGridPlugin_labels import decode_label
+from .CreateGridPlugin_neighbourhood import CellLookup, neighbourhood_offsets, neighbourhood_table
+
+
+class GridIndex:
+    def __init__(self, labels, fids=None):
+        """
+        labels: label of each cell, e.g. 'A1'. Empty labels are skipped by
+        position queries and the first of duplicate labels wins.
+        fids: feature id of each cell, by default its position in labels.
+        """
+        self.labels = list(labels)
+        self.fids = list(range(len(self.labels))) if fids is None else list(fids)
+        if len(self.fids) != len(self.labels):
+            raise ValueError("labels and fids must have the same length.")
+        self.lookup = CellLookup(self.labels)
+        self._by_label = {}
+        for cell, label in enumerate(self.labels):
+            if label:
+                self._by_label.setdefault(label, cell)
+        self._by_fid = {fid: cell for cell, fid in enumerate(self.fids)}
+
+    @classmethod
+    def from_layer(cls, grid_layer, grid_field_name):
+        """Build the index of a grid layer from one pass over its labels, without geometries."""
+        from qgis.core import QgsFeatureRequest
+
+        label_index = grid_layer.fields().indexOf(grid_field_name)
+        if label_index < 0:
+            raise ValueError(f"Field '{grid_field_name}' not found.")
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([label_index])
+        fids, labels = [], []
+        for feature in grid_layer.getFeatures(request):
+            value = feature.attributes()[label_index]
+            fids.append(feature.id())
+            labels.append("" if value is None else str(value))
+        return cls(labels, fids)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self._by_label
+
+    def _cell(self, label):
+        cell = self._by_label.get(label)
+        if cell is None:
+            raise KeyError(label)
+        return cell
+
+    def _labels_of(self, cells):
+        return [self.labels[cell] for cell in cells.tolist()]
+
+    def fid_of(self, label):
+        """Return the feature id of a label, raises KeyError for unknown labels."""
+        return self.fids[self._cell(label)]
+
+    def label_of(self, fid):
+        """Return the label of a feature id, raises KeyError for unknown fids."""
+        return self.labels[self._by_fid[fid]]
+
+    def position_of(self, label):
+        """Return the 0-based (row, col) of a label in the grid."""
+        cell = self._cell(label)
+        return int(self.lookup.rows[cell]), int(self.lookup.cols[cell])
+
+    def label_at(self, row, col):
+        """Return the label of the cell at (row, col), or None if the grid has no such cell."""
+        cell = self.lookup.find([row], [col])[0]
+        return None if cell == NO_NEIGHBOUR else self.labels[cell]
+
+    def fid_at(self, row, col):
+        """Return the feature id of the cell at (row, col), or None if the grid has no such cell."""
+        cell = self.lookup.find([row], [col])[0]
+        return None if cell == NO_NEIGHBOUR else self.fids[cell]
+
+    def neighbours(self, label, neighbourhood="8"):
+        """
+        Return the neighbour labels of a cell for a neighbourhood ("8", "4" or
+        "ring2" to "ring5"), in the neighbourhood's offset order with None
+        where there is no cell.
+        """
+        row, col = self.position_of(label)
+        row_offsets, col_offsets = neighbourhood_offsets(neighbourhood)
+        cells = self.lookup.find(row + row_offsets, col + col_offsets).tolist()
+        return [None if cell == NO_NEIGHBOUR else self.labels[cell] for cell in cells]
+
+    def ring(self, label, k):
+        """Return the labels of every existing cell at most k rows and k columns away, row by row."""
+        row, col = self.position_of(label)
+        center = self.lookup.find([row], [col])[0]
+        cells = [self.lookup.find_range(n_row, col - k, col + k + 1) for n_row in range(row - k, row + k + 1)]
+        cells = np.concatenate(cells)
+        return self._labels_of(cells[cells != center])
+
+    def rectangle(self, corner, opposite_corner):
+        """Return the labels of the existing cells in the rectangle spanned by two corner labels, row by row."""
+        rows, cols = zip(decode_label(corner), decode_label(opposite_corner))
+        cells = [self.lookup.find_range(row, min(cols), max(cols) + 1) for row in range(min(rows), max(rows) + 1)]
+        return self._labels_of(np.concatenate(cells))
+
+    def table(self, neighbourhood="8"):
+        """Return the AdjacencyTable of the whole grid for a neighbourhood, rows in index order."""
+        return neighbourhood_table(self.labels, neighbourhood, lookup=self.lookup)
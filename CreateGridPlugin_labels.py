@@ -0,0 +1,119 @@
+"""
+Grid label codec for the Create Grid plugin.
+
+A label is the column letters followed by the 1-based row number, e.g. 'A1'
+for the top left cell, 'B1' for the cell to its right and 'AA2' for row 1,
+column 26 (0-based). Column letters come from a precomputed table, single
+labels are memoized and the batch functions convert whole NumPy row/column
+arrays in one call.
+"""
+import functools
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Column letters by 0-based column index, grown on demand
+_COLUMN_LETTERS = []
+
+
+def _extend_column_letters(count):
+    """Grow the column letter table to at least `count` entries."""
+    for index in range(len(_COLUMN_LETTERS), count):
+        label = ""
+        while index >= 0:
+            label = chr(index % 26 + ord("A")) + label
+            index = index // 26 - 1
+        _COLUMN_LETTERS.append(label)
+
+
+# Every one and two letter column is available without any work at lookup time
+_extend_column_letters(26 + 26 * 26)
+
+
+def column_letters(col):
+    """Return the letters of a 0-based column index ('A', 'B', ..., 'Z', 'AA', ...)."""
+    if col >= len(_COLUMN_LETTERS):
+        _extend_column_letters(max(col + 1, 2 * len(_COLUMN_LETTERS)))
+    return _COLUMN_LETTERS[col]
+
+
+@functools.lru_cache(maxsize=1 << 18)
+def encode_label(row, col):
+    """Return the label of a 0-based (row, col) cell, or None for negative indexes."""
+    if row < 0 or col < 0:
+        return None
+    return f"{column_letters(col)}{row + 1}"
+
+
+@functools.lru_cache(maxsize=1 << 18)
+def decode_label(label):
+    """
+    Parse a label (e.g. 'A1', 'AA2') into 0-based (row, col) indexes.
+    Characters other than letters and digits are ignored, a missing letter
+    part counts as 'A' and a missing number part counts as '1'.
+    """
+    alpha_part = []
+    num_part = []
+    for char in label:
+        if char.isalpha():
+            alpha_part.append(char)
+        elif char.isdigit():
+            num_part.append(char)
+
+    col = 0
+    for char in alpha_part or "A":
+        col = col * 26 + (ord(char.upper()) - ord("A") + 1)
+
+    row = int("".join(num_part) or "1")
+    return row - 1, col - 1
+
+
+def encode_labels(rows, cols):
+    """Return the labels of the cells given by NumPy row and column index arrays."""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    if not len(rows):
+        return []
+    column_letters(int(cols.max()))
+    letters = np.array(_COLUMN_LETTERS, dtype=object)[cols]
+    numbers = np.char.mod("%d", rows + 1).astype(object)
+    return (letters + numbers).tolist()
+
+
+def decode_labels(labels):
+    """
+    Parse a sequence of labels into NumPy (rows, cols) index arrays, with the
+    same rules as decode_label. ASCII labels are decoded as one byte matrix.
+    """
+    labels = list(labels)
+    if not labels:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    try:
+        chars = np.array(labels, dtype="S")
+    except UnicodeEncodeError:
+        rows, cols = np.array([decode_label(label) for label in labels], dtype=np.int64).T
+        return rows, cols
+    chars = chars.view(np.uint8).reshape(len(labels), -1).astype(np.int64)
+
+    letters = chars & ~0x20  # upper case
+    is_alpha = (letters >= ord("A")) & (letters <= ord("Z"))
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    rows = np.zeros(len(labels), dtype=np.int64)
+    cols = np.zeros(len(labels), dtype=np.int64)
+    for position in range(chars.shape[1]):
+        alpha = is_alpha[:, position]
+        digit = is_digit[:, position]
+        cols[alpha] = cols[alpha] * 26 + (letters[alpha, position] - ord("A") + 1)
+        rows[digit] = rows[digit] * 10 + (chars[digit, position] - ord("0"))
+    # A missing letter part counts as 'A' and a missing number part as '1'
+    cols[~is_alpha.any(axis=1)] = 1
+    rows[~is_digit.any(axis=1)] = 1
+    return rows - 1, cols - 1
+
+
+def clear_caches():
+    """Drop the memoized single label results."""
+    encode_label.cache_clear()
+    decode_label.cache_clear()
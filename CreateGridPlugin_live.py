@@ -0,0 +1,143 @@
+"""
+Live adjacency for grid layers that are being edited.
+
+Once attached, LiveAdjacency follows the layer's featureAdded, featureDeleted
+and attributeValueChanged signals. A change only marks the touched labels as
+dirty; on the next event loop pass those cells and their eight neighbours
+are recomputed from a label index, and written through the layer's edit
+buffer as one edit command. Edit time therefore depends on the size of the
+change, not on the size of the grid. Neighbours are found from the labels,
+as in the "label" adjacency mode.
+"""
+from PyQt5.QtCore import QTimer
+from qgis.core import QgsFeatureRequest
+
+from .CreateGridPlugin_core import label_neighbours
+from .CreateGridPlugin_engine import ADJACENCY_FIELDS
+from .CreateGridPlugin_trace import logger
+
+
+class LiveAdjacency:
+    def __init__(self, grid_layer, grid_field_name, on_deleted=None):
+        """on_deleted: optional callable receiving the layer id once the layer is about to be deleted."""
+        self.layer = grid_layer
+        self.layer_id = grid_layer.id()
+        self.field_name = grid_field_name
+        self.on_deleted = on_deleted
+        self.labels = {}  # fid -> label
+        self.fids = {}  # label -> fid
+        self.dirty = set()
+        self.scheduled = False
+        self.rebuild_index()
+
+        self.connections = [
+            (grid_layer.featureAdded, self.feature_added),
+            (grid_layer.featureDeleted, self.feature_deleted),
+            (grid_layer.attributeValueChanged, self.attribute_value_changed),
+            (grid_layer.committedFeaturesAdded, self.committed_features_added),
+            (grid_layer.afterRollBack, self.rebuild_index),
+            (grid_layer.willBeDeleted, self.layer_deleted),
+        ]
+        for signal, slot in self.connections:
+            signal.connect(slot)
+        logger.info("Live adjacency attached to %s", grid_layer.name())
+
+    def detach(self):
+        """Stop following the layer's edits."""
+        for signal, slot in self.connections:
+            try:
+                signal.disconnect(slot)
+            except (RuntimeError, TypeError):
+                pass  # The layer is already gone
+        self.connections = []
+        self.dirty.clear()
+
+    def layer_deleted(self):
+        self.detach()
+        if self.on_deleted is not None:
+            self.on_deleted(self.layer_id)
+
+    def label_field_index(self):
+        return self.layer.fields().indexOf(self.field_name)
+
+    def rebuild_index(self):
+        """Index the labels of all features, done once on attach and after a rollback."""
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([self.label_field_index()])
+        self.labels = {}
+        self.fids = {}
+        self.dirty.clear()
+        for feature in self.layer.getFeatures(request):
+            self.set_label(feature.id(), feature[self.field_name])
+
+    def set_label(self, fid, value):
+        """Index the label of a feature and return it, None for empty labels."""
+        label = str(value) if value else None
+        if label is not None:
+            self.labels[fid] = label
+            self.fids[label] = fid
+        return label
+
+    def forget(self, fid):
+        """Drop a feature from the index and return its old label."""
+        label = self.labels.pop(fid, None)
+        if label is not None and self.fids.get(label) == fid:
+            del self.fids[label]
+        return label
+
+    def mark(self, label, include_cell=True):
+        """Mark the cells around a label, and the cell itself, for recomputation."""
+        if label is None:
+            return
+        if include_cell:
+            self.dirty.add(label)
+        self.dirty.update(neighbour for neighbour in label_neighbours(label) if neighbour is not None)
+        if not self.scheduled:
+            # Edit signals are emitted while QGIS applies an undo command, write once it is done
+            self.scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def feature_added(self, fid):
+        feature = self.layer.getFeature(fid)
+        self.mark(self.set_label(fid, feature[self.field_name]))
+
+    def feature_deleted(self, fid):
+        self.mark(self.forget(fid), include_cell=False)
+
+    def attribute_value_changed(self, fid, index, value):
+        # Adjacency fields written by flush() land here too and are ignored
+        if index != self.label_field_index():
+            return
+        self.mark(self.forget(fid), include_cell=False)
+        self.mark(self.set_label(fid, value))
+
+    def committed_features_added(self, layer_id, features):
+        # Added features get their final ids on commit
+        for feature in features:
+            label = feature[self.field_name]
+            if label:
+                self.forget(self.fids.get(str(label)))
+                self.set_label(feature.id(), label)
+
+    def flush(self):
+        """Recompute the adjacency fields of the dirty cells in one edit command."""
+        self.scheduled = False
+        dirty, self.dirty = self.dirty, set()
+        if not dirty or not self.connections or not self.layer.isEditable():
+            return
+
+        fields = self.layer.fields()
+        adjacency_indexes = [fields.indexOf(field) for field in ADJACENCY_FIELDS]
+        self.layer.beginEditCommand("Update grid adjacency")
+        updated = 0
+        for label in dirty:
+            fid = self.fids.get(label)
+            if fid is None:
+                continue
+            values = [neighbour if neighbour in self.fids else "" for neighbour in label_neighbours(label)]
+            self.layer.changeAttributeValues(
+                fid, {index: value for index, value in zip(adjacency_indexes, values) if index >= 0}
+            )
+            updated += 1
+        self.layer.endEditCommand()
+        logger.debug("Live adjacency updated %d cells", updated)
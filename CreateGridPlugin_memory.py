@@ -0,0 +1,195 @@
+"""
+Memory budget for a Create Grid run.
+
+A MemoryBudget traces Python allocations with tracemalloc while a run is
+active and keeps the peak of every stage. The features, geometries and
+layer storage that QGIS allocates in C++ are invisible to tracemalloc, so
+the stages size their chunks and choose between the in-memory and the
+streaming paths from per cell estimates checked against what the budget
+has left. Tracing is process wide, so runs going on at the same time share
+their peaks. The process peak resident size is added to the report where
+the platform provides it.
+StagedChanges holds the attribute changes a worker thread computes for a
+layer until they are written, one batch at a time when it can flush them.
+"""
+import contextlib
+import sys
+import threading
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from .CreateGridPlugin_trace import logger
+
+# Rough per cell memory of the data each stage holds
+CELL_FEATURE_BYTES = 2048  # one pending QgsFeature with its polygon and nine string attributes
+CELL_LAYER_BYTES = 1536  # one cell stored by the memory provider
+CELL_SNAPSHOT_BYTES = 1280  # fid, label, current and new adjacency values of one cell
+MIN_CHUNK_SIZE = 1000
+MIB = 2 ** 20
+
+# Budgets of concurrent runs share the process wide tracing
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+
+
+def snapshot_bytes(neighbours=8):
+    """Return the estimated snapshot memory of one cell with `neighbours` neighbour values."""
+    return CELL_SNAPSHOT_BYTES * max(neighbours, 8) // 8
+
+
+def peak_rss_bytes():
+    """Return the peak resident set size of the process, or None where it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryBudget:
+    def __init__(self, max_bytes=None):
+        """
+        max_bytes: allowed memory of a run, None to only track the peaks.
+        """
+        self.max_bytes = max_bytes
+        self.peaks = {}
+        self._tracing = False
+
+    @classmethod
+    def from_megabytes(cls, megabytes):
+        """Budget of `megabytes` MiB, or one without a limit for None or 0."""
+        return cls(int(megabytes * MIB) if megabytes else None)
+
+    def start(self):
+        """Start tracing allocations, unless something else already traces them."""
+        global _tracing_users, _started_tracing
+        with _tracing_lock:
+            if self._tracing:
+                return
+            if _tracing_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+            _tracing_users += 1
+            self._tracing = True
+
+    def stop(self):
+        """Stop tracing once the last budget stops, if a budget turned it on."""
+        global _tracing_users, _started_tracing
+        with _tracing_lock:
+            if not self._tracing:
+                return
+            _tracing_users -= 1
+            self._tracing = False
+            if _tracing_users == 0 and _started_tracing:
+                tracemalloc.stop()
+                _started_tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def used(self):
+        """Return the traced bytes currently allocated."""
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    def remaining(self):
+        """Return the bytes left in the budget, or None without a limit."""
+        if self.max_bytes is None:
+            return None
+        return max(self.max_bytes - self.used(), 0)
+
+    def fits(self, cells, bytes_per_cell):
+        """Return True if `cells` cells of bytes_per_cell each fit in what is left."""
+        remaining = self.remaining()
+        return remaining is None or cells * bytes_per_cell <= remaining
+
+    def chunk_size(self, bytes_per_cell, chunk_size=None):
+        """
+        Return the chunk size to use: chunk_size, lowered so that a chunk
+        takes at most half of what is left. Without a limit chunk_size is
+        returned unchanged.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return chunk_size
+        cells = max(remaining // 2 // bytes_per_cell, MIN_CHUNK_SIZE)
+        return min(chunk_size, cells) if chunk_size else cells
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Record the traced peak of the block as the peak of stage `name`."""
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        try:
+            yield self
+        finally:
+            if tracemalloc.is_tracing():
+                self.peaks[name] = max(self.peaks.get(name, 0), tracemalloc.get_traced_memory()[1])
+
+    def peak(self):
+        """Return the highest traced peak of all stages."""
+        return max(self.peaks.values(), default=0)
+
+    def exceeded(self):
+        return self.max_bytes is not None and self.peak() > self.max_bytes
+
+    def summary(self):
+        stages = ", ".join(f"{name} {peak / MIB:,.1f} MiB" for name, peak in self.peaks.items())
+        text = f"Memory peak {self.peak() / MIB:,.1f} MiB"
+        if self.max_bytes is not None:
+            text += f" of a {self.max_bytes / MIB:,.0f} MiB budget"
+        if stages:
+            text += f" ({stages})"
+        rss = peak_rss_bytes()
+        if rss is not None:
+            text += f", process peak RSS {rss / MIB:,.0f} MiB"
+        return text
+
+    def report(self):
+        """Log the summary, as a warning when the budget was exceeded."""
+        if self.exceeded():
+            logger.warning(self.summary())
+        else:
+            logger.info(self.summary())
+
+
+class StagedChanges:
+    def __init__(self, flush=None):
+        """
+        Attribute changes ({fid: {field_index: value}}) waiting to be written
+        to a layer. With `flush`, a callable writing such a map and returning
+        True on success, every staged batch is flushed right away, so no more
+        than one batch is held; without it, changes pile up in `pending`
+        until the caller applies them. peak_cells is the most cells held at once.
+        """
+        self.flush = flush
+        self.pending = {}
+        self.flushed = 0
+        self.peak_cells = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def get(self, fid):
+        """Return the staged {field_index: value} changes of a feature, or None."""
+        return self.pending.get(fid)
+
+    def stage(self, attribute_map):
+        """Stage a batch of changes, flushing them when possible. Returns False if the flush failed."""
+        for fid, attributes in attribute_map.items():
+            self.pending.setdefault(fid, {}).update(attributes)
+        self.peak_cells = max(self.peak_cells, len(self.pending))
+        if self.flush is None:
+            return True
+        changes, self.pending = self.pending, {}
+        self.flushed += len(changes)
+        return bool(self.flush(changes))
@@ -0,0 +1,214 @@
+"""
+Configurable cell neighbourhoods for the Create Grid plugin.
+
+A neighbourhood is a set of (row, column) offsets around a cell:
+    "8"      the eight Moore neighbours, written to ADJACENCY_FIELDS
+    "4"      the four von Neumann neighbours (Left, Top, Right, Bottom)
+    "ringK"  every cell at most K rows and K columns away, K from 2 to 5
+Neighbour tables are computed for whole label arrays at once: labels are
+decoded into row/column arrays, turned into integer cell keys and every
+offset is looked up with one sorted search, in chunks of cells so the
+(cells x offsets) arrays stay small. Results are AdjacencyTable objects,
+written either as one field per offset or as a single list field.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .CreateGridPlugin_adjacency import NO_NEIGHBOUR, AdjacencyTable
+from .CreateGridPlugin_engine import ADJACENCY_FIELDS, NEIGHBOUR_OFFSETS
+from .CreateGridPlugin_labels import decode_labels
+
+DEFAULT_NEIGHBOURHOOD = "8"
+NEIGHBOURHOODS = ["8", "4", "ring2", "ring3", "ring4", "ring5"]
+VON_NEUMANN_FIELDS = ["Left", "Top", "Right", "Bottom"]
+LIST_FIELD = "Neighbours"
+LIST_SEPARATOR = ","
+TABLE_CHUNK_SIZE = 65536
+
+
+def ring_size(neighbourhood):
+    """Return K of a "ringK" neighbourhood, or None for the "4" and "8" ones."""
+    if neighbourhood not in NEIGHBOURHOODS:
+        raise ValueError(f"Unknown neighbourhood '{neighbourhood}', expected one of {', '.join(NEIGHBOURHOODS)}.")
+    return int(neighbourhood[4:]) if neighbourhood.startswith("ring") else None
+
+
+def neighbour_count(neighbourhood):
+    """Return the number of neighbours of a cell in a neighbourhood, without NumPy."""
+    k = ring_size(neighbourhood)
+    if k is None:
+        return len(VON_NEUMANN_FIELDS if neighbourhood == "4" else ADJACENCY_FIELDS)
+    return (2 * k + 1) ** 2 - 1
+
+
+def neighbourhood_offsets(neighbourhood):
+    """
+    Return the (row offsets, column offsets) int64 arrays of a neighbourhood.
+    "4" and "8" follow their field order, rings go row by row from the top left.
+    """
+    k = ring_size(neighbourhood)
+    if k is None:
+        fields = VON_NEUMANN_FIELDS if neighbourhood == "4" else ADJACENCY_FIELDS
+        offsets = [NEIGHBOUR_OFFSETS[ADJACENCY_FIELDS.index(field)] for field in fields]
+        row_offsets, col_offsets = np.array(offsets, dtype=np.int64).T
+        return row_offsets, col_offsets
+    row_offsets, col_offsets = np.mgrid[-k:k + 1, -k:k + 1].reshape(2, -1).astype(np.int64)
+    keep = (row_offsets != 0) | (col_offsets != 0)
+    return row_offsets[keep], col_offsets[keep]
+
+
+def offset_field_name(row_offset, col_offset):
+    """Return the field name of a ring offset, e.g. 'N_m2_p1' for 2 rows up and 1 column right."""
+    def part(offset):
+        return f"{'m' if offset < 0 else 'p'}{abs(offset)}"
+
+    return f"N_{part(row_offset)}_{part(col_offset)}"
+
+
+def neighbourhood_fields(neighbourhood, as_list=False):
+    """Return the fields a neighbourhood is written to, one per offset or the single list field."""
+    if as_list:
+        return [LIST_FIELD]
+    k = ring_size(neighbourhood)
+    if k is None:
+        return list(VON_NEUMANN_FIELDS if neighbourhood == "4" else ADJACENCY_FIELDS)
+    row_offsets, col_offsets = neighbourhood_offsets(neighbourhood)
+    return [offset_field_name(row, col) for row, col in zip(row_offsets.tolist(), col_offsets.tolist())]
+
+
+class CellLookup:
+    def __init__(self, labels):
+        """
+        Vectorized (row, col) -> cell lookup over the cells of `labels`, cell i
+        being labels[i]. Empty labels are no cells and the first of duplicate
+        labels wins. Cells get one integer key each, resolved through a direct
+        lookup array when the grid is dense enough, else with a sorted search.
+        """
+        labels = list(labels)
+        self.labels = labels
+        self._label_array = None
+        self.present = np.array([bool(label) for label in labels], dtype=bool)
+        self.rows, self.cols = decode_labels([label or "A1" for label in labels])
+        cell_ids = np.flatnonzero(self.present)
+        # Cells beyond the last row or column cannot exist
+        self.n_rows = int(self.rows[cell_ids].max()) + 1 if len(cell_ids) else 0
+        self.n_cols = int(self.cols[cell_ids].max()) + 1 if len(cell_ids) else 0
+        keys = self.rows[cell_ids] * self.n_cols + self.cols[cell_ids]
+        self.dense = self.n_rows * self.n_cols <= max(4 * len(labels), 1 << 20)
+        if self.dense:
+            self.lookup = np.full(self.n_rows * self.n_cols, NO_NEIGHBOUR, dtype=np.int32)
+            self.lookup[keys[::-1]] = cell_ids[::-1]
+        else:
+            order = np.argsort(keys, kind="stable")
+            self.sorted_keys = keys[order]
+            self.sorted_ids = cell_ids[order].astype(np.int32)
+
+    def find(self, rows, cols):
+        """Return the cell of every (rows[i], cols[i]) pair, NO_NEIGHBOUR where there is none."""
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        inside = (rows >= 0) & (rows < self.n_rows) & (cols >= 0) & (cols < self.n_cols)
+        keys = np.where(inside, rows * self.n_cols + cols, 0)
+        if not inside.any():
+            return np.full(keys.shape, NO_NEIGHBOUR, dtype=np.int32)
+        if self.dense:
+            found = self.lookup[keys]
+        else:
+            positions = np.minimum(np.searchsorted(self.sorted_keys, keys), len(self.sorted_keys) - 1)
+            found = np.where(self.sorted_keys[positions] == keys, self.sorted_ids[positions], NO_NEIGHBOUR)
+        return np.where(inside, found, NO_NEIGHBOUR).astype(np.int32)
+
+    def labels_of(self, cells):
+        """Return the labels of an array of cells as nested lists, "" for NO_NEIGHBOUR."""
+        if self._label_array is None:
+            # NO_NEIGHBOUR (-1) picks the trailing ""
+            self._label_array = np.array(self.labels + [""], dtype=object)
+        return self._label_array[np.asarray(cells)].tolist()
+
+    def find_range(self, row, col_start, col_stop):
+        """Return the cells of one row between two columns (stop excluded), in column order."""
+        col_start, col_stop = max(col_start, 0), min(col_stop, self.n_cols)
+        if not 0 <= row < self.n_rows or col_start >= col_stop:
+            return np.zeros(0, dtype=np.int32)
+        start_key = row * self.n_cols
+        if self.dense:
+            found = self.lookup[start_key + col_start:start_key + col_stop]
+            return found[found >= 0]
+        first, last = np.searchsorted(self.sorted_keys, [start_key + col_start, start_key + col_stop])
+        keys = self.sorted_keys[first:last]
+        ids = self.sorted_ids[first:last]
+        # Keep the first of duplicate labels only
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = keys[1:] != keys[:-1]
+        return ids[keep]
+
+
+def neighbourhood_table(labels, neighbourhood=DEFAULT_NEIGHBOURHOOD, chunk_size=TABLE_CHUNK_SIZE, lookup=None,
+                        feedback=None):
+    """
+    Return the AdjacencyTable of `labels` for a neighbourhood: table row i
+    holds, per offset, the index in `labels` of the neighbour cell, or
+    NO_NEIGHBOUR where that cell is not in `labels`. Empty labels get no neighbours.
+    lookup is an optional CellLookup of `labels` that was already built.
+    Progress goes to feedback once per chunk, returns None if it was canceled.
+    """
+    labels = list(labels)
+    row_offsets, col_offsets = neighbourhood_offsets(neighbourhood)
+    lookup = lookup or CellLookup(labels)
+    neighbours = np.full((len(labels), len(row_offsets)), NO_NEIGHBOUR, dtype=np.int32)
+    for start in range(0, len(labels), chunk_size):
+        if feedback is not None and feedback.canceled:
+            return None
+        stop = min(start + chunk_size, len(labels))
+        found = lookup.find(lookup.rows[start:stop, None] + row_offsets, lookup.cols[start:stop, None] + col_offsets)
+        neighbours[start:stop] = np.where(lookup.present[start:stop, None], found, NO_NEIGHBOUR)
+        if feedback is not None:
+            feedback.set_progress(stop * 100 / len(labels))
+    return AdjacencyTable(labels, neighbours)
+
+
+def lookup_neighbour_values(labels, lookup, neighbourhood=DEFAULT_NEIGHBOURHOOD, chunk_size=TABLE_CHUNK_SIZE,
+                            feedback=None, as_list=False):
+    """
+    Return the neighbour labels of every label, one per offset and "" where
+    there is none, looking the neighbours up among the cells of `lookup`, a
+    CellLookup of other labels (e.g. the whole layer while `labels` is one
+    chunk of it). With as_list, each row is joined like neighbour_values does.
+    Returns None if feedback was canceled.
+    """
+    labels = list(labels)
+    row_offsets, col_offsets = neighbourhood_offsets(neighbourhood)
+    present = np.array([bool(label) for label in labels], dtype=bool)
+    rows, cols = decode_labels([label or "A1" for label in labels])
+    values = []
+    for start in range(0, len(labels), chunk_size):
+        if feedback is not None and feedback.canceled:
+            return None
+        stop = min(start + chunk_size, len(labels))
+        found = lookup.find(rows[start:stop, None] + row_offsets, cols[start:stop, None] + col_offsets)
+        chunk_values = lookup.labels_of(np.where(present[start:stop, None], found, NO_NEIGHBOUR))
+        if as_list:
+            chunk_values = [[LIST_SEPARATOR.join(filter(None, row))] for row in chunk_values]
+        values.extend(chunk_values)
+        if feedback is not None:
+            feedback.set_progress(stop * 100 / len(labels))
+    return values
+
+
+def neighbour_values(table, as_list=False, chunk_size=TABLE_CHUNK_SIZE):
+    """
+    Return the values written for every table row: one label per offset
+    ("" where there is no neighbour), or a one item list holding the labels
+    of the existing neighbours joined by LIST_SEPARATOR.
+    """
+    label_array = np.array(list(table.labels) + [""], dtype=object)
+    values = []
+    for start in range(0, len(table), chunk_size):
+        # NO_NEIGHBOUR (-1) picks the trailing ""
+        rows = label_array[np.asarray(table.neighbours[start:start + chunk_size])].tolist()
+        if as_list:
+            rows = [[LIST_SEPARATOR.join(filter(None, row))] for row in rows]
+        values.extend(rows)
+    return values
@@ -0,0 +1,75 @@
+"""
+File outputs for generated grids.
+
+Cells can be streamed to a GeoPackage or FlatGeobuf file while they are
+generated, instead of being collected in a memory layer that has to be
+saved again afterwards. QgsVectorFileWriter wraps the whole write in one
+OGR transaction where the format supports it (GeoPackage), so chunked
+inserts do not commit one by one. The finished file is then opened as a
+regular file-backed layer.
+"""
+import os
+
+from qgis.core import QgsVectorFileWriter, QgsVectorLayer, QgsWkbTypes
+
+GRID_FILE_DRIVERS = {".gpkg": "GPKG", ".fgb": "FlatGeobuf"}
+GRID_FILE_FILTER = "GeoPackage (*.gpkg);;FlatGeobuf (*.fgb)"
+# Cells per insert when streaming to a file and no chunk size was given
+GRID_FILE_CHUNK_SIZE = 50000
+
+
+def grid_file_driver(path):
+    """Return the OGR driver name of a grid file from its extension."""
+    driver = GRID_FILE_DRIVERS.get(os.path.splitext(path)[1].lower())
+    if driver is None:
+        raise ValueError(f"Unsupported grid file '{path}', use a .gpkg or .fgb file.")
+    return driver
+
+
+def open_grid_file(path, name="Generated Grid"):
+    """Open a written grid file as a vector layer."""
+    grid_layer = QgsVectorLayer(path, name, "ogr")
+    if not grid_layer.isValid():
+        raise RuntimeError(f"Failed to open grid file '{path}'.")
+    return grid_layer
+
+
+class GridFileWriter:
+    """
+    Feature sink writing grid cells to a GeoPackage or FlatGeobuf file.
+    Use it as a context manager, the file is complete once it is closed.
+    """
+
+    def __init__(self, path, fields, crs):
+        self.path = path
+        self.fields = fields
+        self.written = 0
+        self.writer = QgsVectorFileWriter(path, "UTF-8", fields, QgsWkbTypes.Polygon, crs, grid_file_driver(path))
+        if self.writer.hasError() != QgsVectorFileWriter.NoError:
+            raise RuntimeError(f"Failed to create grid file '{path}': {self.writer.errorMessage()}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def addFeatures(self, features):
+        if not self.writer.addFeatures(features):
+            raise RuntimeError(f"Failed to write to grid file '{self.path}': {self.writer.errorMessage()}")
+        self.written += len(features)
+        return True
+
+    def close(self):
+        """Commit and close the file."""
+        # Dropping the last reference deletes the writer, which commits and closes the file
+        self.writer = None
+
+    def discard(self):
+        """Close the file and remove it, for canceled or failed runs."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
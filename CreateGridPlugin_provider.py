@@ -0,0 +1,27 @@
+import os
+
+from PyQt5.QtGui import QIcon
+from qgis.core import QgsProcessingProvider
+
+from .CreateGridPlugin_algorithms import AssignAdjacencyAlgorithm, CreateGridAlgorithm
+
+
+class CreateGridProvider(QgsProcessingProvider):
+    """Processing provider exposing the grid creation and adjacency stages."""
+
+    def __init__(self, plugin):
+        super(CreateGridProvider, self).__init__()
+        self.plugin = plugin
+
+    def id(self):
+        return "creategrid"
+
+    def name(self):
+        return "Create Grid"
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), "icon.png"))
+
+    def loadAlgorithms(self):
+        self.addAlgorithm(CreateGridAlgorithm(self.plugin))
+        self.addAlgorithm(AssignAdjacencyAlgorithm(self.plugin))
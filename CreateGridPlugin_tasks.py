@@ -0,0 +1,286 @@
+import threading
+
+from PyQt5.QtCore import QCoreApplication, QObject, Qt, pyqtSignal
+from PyQt5.QtWidgets import QMessageBox
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsFeatureRequest,
+    QgsFields,
+    QgsProject,
+    QgsRectangle,
+    QgsTask,
+    QgsVectorLayerFeatureSource,
+)
+
+from .CreateGridPlugin_feedback import GridFeedback
+from .CreateGridPlugin_memory import StagedChanges
+from .CreateGridPlugin_neighbourhood import neighbourhood_fields
+from .CreateGridPlugin_trace import logger
+
+
+class MainThreadCall(QObject):
+    """
+    Runs functions on the main thread for a worker thread and waits for their
+    result. Must be created on the main thread; calls made from the main
+    thread itself run directly. `canceled` is an optional callable, once it
+    returns True the worker stops waiting.
+    """
+
+    requested = pyqtSignal(object)
+
+    def __init__(self, canceled=None):
+        super(MainThreadCall, self).__init__()
+        self.canceled = canceled
+        self.main_thread_id = threading.get_ident()
+        self.requested.connect(self.run_request, Qt.QueuedConnection)
+
+    def __call__(self, function, *args):
+        """Return function(*args) run on the main thread, or None if the wait was canceled."""
+        if threading.get_ident() == self.main_thread_id:
+            return function(*args)
+        request = {"function": function, "args": args, "done": threading.Event()}
+        self.requested.emit(request)
+        while not request["done"].wait(0.1):
+            if self.canceled is not None and self.canceled():
+                return None
+        if "error" in request:
+            raise request["error"]
+        return request["result"]
+
+    def run_request(self, request):
+        try:
+            request["result"] = request["function"](*request["args"])
+        except Exception as e:
+            request["error"] = e
+        finally:
+            request["done"].set()
+
+
+class LayerSnapshot:
+    """
+    Read-only stand-in for a project layer, captured on the main thread so a
+    task reads the layer from its worker thread through a
+    QgsVectorLayerFeatureSource instead of the layer itself.
+    Attribute changes written to its data provider go through StagedChanges.
+    With main_thread (a MainThreadCall), each batch is written to the layer's
+    data provider on the main thread as it comes, and refresh() takes a new
+    feature source so the written values can be read back. Without it the
+    changes are kept in `pending` and features read back include them, so a
+    report can be written before the changes are applied on the main thread.
+    """
+
+    def __init__(self, layer, main_thread=None):
+        self.layer = layer
+        self.main_thread = main_thread
+        self.feature_source = QgsVectorLayerFeatureSource(layer)
+        self.changes = StagedChanges(None if main_thread is None else self.write_changes)
+        self.stale = False
+        self._fields = QgsFields(layer.fields())
+        self._extent = QgsRectangle(layer.extent())
+        self._crs = QgsCoordinateReferenceSystem(layer.crs())
+        self._feature_count = layer.featureCount()
+        self._provider_type = layer.providerType()
+        self._uri = layer.source()
+        self._id = layer.id()
+
+    def fields(self):
+        return self._fields
+
+    def extent(self):
+        return self._extent
+
+    def crs(self):
+        return self._crs
+
+    def featureCount(self):
+        return self._feature_count
+
+    def providerType(self):
+        return self._provider_type
+
+    def source(self):
+        return self._uri
+
+    def id(self):
+        return self._id
+
+    @property
+    def pending(self):
+        """The {fid: {field_index: value}} changes not written to the layer yet."""
+        return self.changes.pending
+
+    def getFeatures(self, request=None):
+        for feature in self.feature_source.getFeatures(request or QgsFeatureRequest()):
+            changes = self.changes.get(feature.id())
+            if changes:
+                for index, value in changes.items():
+                    feature.setAttribute(index, value)
+            yield feature
+
+    def dataProvider(self):
+        return self
+
+    def changeAttributeValues(self, attribute_map):
+        return self.changes.stage(attribute_map)
+
+    def write_changes(self, attribute_map):
+        """Write a batch of changes to the layer's data provider on the main thread."""
+        self.stale = True
+        return self.main_thread(self.layer.dataProvider().changeAttributeValues, attribute_map)
+
+    def refresh(self):
+        """Read from a new feature source once changes were written to the layer through the snapshot."""
+        if not self.stale:
+            return
+        feature_source = self.main_thread(QgsVectorLayerFeatureSource, self.layer)
+        if feature_source is not None:
+            self.feature_source = feature_source
+            self.stale = False
+
+    def triggerRepaint(self):
+        pass  # The layer is repainted on the main thread once the task is done
+
+
+class GridTask(QgsTask):
+    """
+    Base class for the plugin's background jobs.
+    run() executes on a worker thread of the QGIS task manager, finished()
+    is called back on the main thread with the result of run().
+    """
+
+    def __init__(self, plugin, description):
+        super(GridTask, self).__init__(description, QgsTask.CanCancel)
+        self.plugin = plugin
+        self.feedback = GridFeedback.for_task(self)
+        self.memory_budget = None
+        self.exception = None
+
+    def cancel(self):
+        # Raise the flag the stage loops check before telling the task manager
+        self.feedback.cancel()
+        super(GridTask, self).cancel()
+
+    def run(self):
+        try:
+            self.run_stage()
+        except Exception as e:
+            self.exception = e
+            return False
+        return not self.isCanceled()
+
+    def run_stage(self):
+        raise NotImplementedError
+
+    def finished(self, result):
+        if result:
+            self.on_success()
+        elif self.exception is not None:
+            QMessageBox.warning(None, self.description(), f"Task failed: {self.exception}")
+        else:
+            logger.info("%s canceled.", self.description())
+        self.plugin.task_finished(self, result)
+
+    def on_success(self):
+        pass
+
+    def with_memory_report(self, message):
+        """Append the memory budget summary of the run to a message, if the task had a budget."""
+        if self.memory_budget is None:
+            return message
+        return f"{message}\n{self.memory_budget.summary()}."
+
+
+class CreateGridTask(GridTask):
+    """
+    Generate a new grid layer and its adjacency report in the background.
+    Must be created on the main thread, where the boundary layer is captured.
+    """
+
+    def __init__(self, plugin, boundary_layer, length, width, out_path, engine="loop", chunk_size=None,
+                 clip_mode=None, write_sidecar=False, grid_path=None, memory_budget=None, cell_shape="square"):
+        super(CreateGridTask, self).__init__(plugin, "Create Grid")
+        self.boundary_layer = LayerSnapshot(boundary_layer)
+        self.length = length
+        self.width = width
+        self.out_path = out_path
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.clip_mode = clip_mode
+        self.write_sidecar = write_sidecar
+        self.grid_path = grid_path
+        self.memory_budget = memory_budget
+        self.cell_shape = cell_shape
+        self.grid_layer = None
+
+    def run_stage(self):
+        self.grid_layer = self.plugin.build_new_grid(
+            self.boundary_layer, self.length, self.width, self.out_path,
+            self.engine, self.chunk_size, self.clip_mode, self.write_sidecar, feedback=self.feedback,
+            grid_path=self.grid_path, memory_budget=self.memory_budget, cell_shape=self.cell_shape
+        )
+        if self.grid_layer is not None:
+            # The layer was created on the worker thread, hand it over to the main thread
+            self.grid_layer.moveToThread(QCoreApplication.instance().thread())
+
+    def on_success(self):
+        QgsProject.instance().addMapLayer(self.grid_layer)
+        QMessageBox.information(None, "Task Completed",
+                                self.with_memory_report("New grid created successfully and report saved."))
+
+
+class AssignAdjacencyTask(GridTask):
+    """
+    Assign adjacency fields to an existing grid layer in the background.
+    Must be created on the main thread: the missing fields are added and the
+    layer is captured there. run() computes the changes and writes the
+    report; each batch of changes is written to the data provider on the
+    main thread as soon as it is computed, so neither the worker nor the
+    main thread holds the changes of the whole layer. With undo the changes
+    go through the layer's edit buffer as one edit command instead, they are
+    then staged and applied back on the main thread once run() is done.
+    """
+
+    def __init__(self, plugin, grid_layer, grid_field_name, out_path, mode="label", write_sidecar=False, undo=False,
+                 live=False, memory_budget=None, neighbourhood="8", as_list=False):
+        super(AssignAdjacencyTask, self).__init__(plugin, "Update Grid Adjacency")
+        self.grid_layer = grid_layer
+        self.grid_field_name = grid_field_name
+        self.out_path = out_path
+        self.mode = mode
+        self.write_sidecar = write_sidecar
+        self.undo = undo
+        self.live = live
+        self.memory_budget = memory_budget
+        self.neighbourhood = neighbourhood
+        self.as_list = as_list
+        plugin.add_adjacency_fields(grid_layer, neighbourhood_fields(neighbourhood, as_list))
+        self.main_thread = None if undo else MainThreadCall(lambda: self.feedback.canceled)
+        self.snapshot = LayerSnapshot(grid_layer, self.main_thread)
+
+    def run_stage(self):
+        # Undo only applies when the staged changes are written in on_success
+        self.plugin.assign_adjacency_from_existing_layer(
+            self.snapshot, self.grid_field_name, self.out_path, feedback=self.feedback, mode=self.mode,
+            write_sidecar=self.write_sidecar, memory_budget=self.memory_budget,
+            neighbourhood=self.neighbourhood, as_list=self.as_list
+        )
+
+    def finished(self, result):
+        if not result and self.snapshot.changes.flushed:
+            # Batches written before a cancel or an error stay in the layer
+            self.grid_layer.triggerRepaint()
+        super(AssignAdjacencyTask, self).finished(result)
+
+    def on_success(self):
+        was_editing = self.grid_layer.isEditable()
+        if self.undo:
+            logger.info("Applying %d changed cells to the layer", len(self.snapshot.pending))
+            self.plugin.write_attribute_updates(self.grid_layer, self.snapshot.pending, undo=True)
+        self.grid_layer.triggerRepaint()
+        # Live adjacency keeps the eight adjacency fields up to date
+        live = self.live and self.neighbourhood == "8" and not self.as_list
+        self.plugin.set_live_adjacency(self.grid_layer, self.grid_field_name, live)
+        message = "Adjacency updated successfully and report saved."
+        if self.undo and was_editing:
+            message += "\nThe layer was already being edited, save its edits to keep the adjacency changes."
+        QMessageBox.information(None, "Task Completed", self.with_memory_report(message))
@@ -0,0 +1,108 @@
+"""
+Tiled, multi-process grid generation for the Create Grid plugin.
+
+The grid is split into row bands (tiles) that a process pool builds in
+parallel. Workers only need NumPy and the Qt-free engine: each one computes
+its band's labels, packed cell WKB and neighbour labels from the global
+grid layout, so labels and neighbours across tile edges are the same as in
+a single pass, and saves them to a temporary .npz file. The plugin reads
+the tiles back in row order and turns them into features, since QGIS
+objects cannot cross process boundaries.
+"""
+import math
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .CreateGridPlugin_engine import build_cell_buffer, iter_row_bands, split_wkb_buffer
+
+# Tiles per worker, so a slow tile does not leave the other workers idle
+TILES_PER_WORKER = 4
+
+
+def default_workers():
+    """Return the default worker count: all cores but one, which is left to QGIS."""
+    return max((os.cpu_count() or 1) - 1, 1)
+
+
+def tile_bands(n_rows, n_cols, workers, chunk_size=None):
+    """
+    Return the (row_start, row_stop) bands of the tiles, TILES_PER_WORKER
+    per worker and never more than chunk_size cells each.
+    """
+    rows_per_tile = max(int(math.ceil(n_rows / (workers * TILES_PER_WORKER))), 1)
+    if chunk_size and n_cols:
+        rows_per_tile = max(min(rows_per_tile, chunk_size // n_cols), 1)
+    return list(iter_row_bands(n_rows, rows_per_tile))
+
+
+def tile_jobs(bounds, length, width, bands, cell_mask, tile_dir):
+    """
+    Return one build_tile argument tuple per band. Only the cell_mask rows a
+    band needs (its own rows and the ones around it) are sent to the worker.
+    """
+    jobs = []
+    for number, (row_start, row_stop) in enumerate(bands):
+        mask, mask_row_start = None, 0
+        if cell_mask is not None:
+            mask_row_start = max(row_start - 1, 0)
+            mask = cell_mask[mask_row_start:row_stop + 1]
+        path = os.path.join(tile_dir, f"tile_{number:06d}.npz")
+        jobs.append((bounds, length, width, row_start, row_stop, mask, mask_row_start, path))
+    return jobs
+
+
+def build_tile(job):
+    """Process pool worker: build the cells of one tile and save them, returns the tile file path."""
+    bounds, length, width, row_start, row_stop, mask, mask_row_start, path = job
+    xmin, ymin, xmax, ymax = bounds
+    labels, wkb_buffer, neighbours = build_cell_buffer(
+        xmin, ymin, xmax, ymax, length, width, row_start, row_stop, mask, mask_row_start
+    )
+    np.savez(
+        path,
+        labels=np.array(labels, dtype=str),
+        wkb=np.frombuffer(wkb_buffer, dtype=np.uint8),
+        neighbours=np.array(neighbours, dtype=str).reshape(len(neighbours), len(labels)),
+    )
+    return path
+
+
+def load_tile(path):
+    """Read a tile saved by build_tile as (labels, wkb_list, neighbours) and delete its file."""
+    with np.load(path) as tile:
+        labels = tile["labels"].tolist()
+        wkb_list = split_wkb_buffer(tile["wkb"].tobytes())
+        neighbours = tile["neighbours"].tolist()
+    os.remove(path)
+    return labels, wkb_list, neighbours
+
+
+def python_executable():
+    """
+    Return the Python interpreter worker processes are started with.
+    Inside QGIS desktop sys.executable is the QGIS binary, so the bundled
+    interpreter is looked up next to the Python installation instead.
+    """
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    names = ("pythonw.exe", "python.exe") if sys.platform == "win32" else ("python3", "python")
+    for directory in (sys.exec_prefix, os.path.join(sys.exec_prefix, "bin")):
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+    return sys.executable
+
+
+def process_pool(workers):
+    """Return a process pool of spawned workers, which do not inherit any QGIS state."""
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(python_executable())
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
@@ -0,0 +1,127 @@
+"""
+Tracing and stage timing for the Create Grid plugin.
+
+All plugin messages go through the "CreateGrid" logger. Warnings and
+errors are always shown in the "Create Grid" tab of the QGIS message log
+(or on stderr without QGIS). Per feature traces are DEBUG and stage
+summaries are INFO, and neither is emitted until tracing is enabled,
+either with enable_tracing() or by setting the CREATE_GRID_TRACE
+environment variable to a level name.
+"""
+import contextlib
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger("CreateGrid")
+logger.setLevel(logging.WARNING)
+
+MESSAGE_LOG_TAG = "Create Grid"
+
+
+class QgsMessageLogHandler(logging.Handler):
+    """Logging handler that forwards records to the QGIS message log, or to stderr without QGIS."""
+
+    def emit(self, record):
+        try:
+            from qgis.core import Qgis, QgsMessageLog
+        except ImportError:
+            sys.stderr.write(self.format(record) + "\n")
+            return
+        if record.levelno >= logging.ERROR:
+            level = Qgis.Critical
+        elif record.levelno >= logging.WARNING:
+            level = Qgis.Warning
+        else:
+            level = Qgis.Info
+        QgsMessageLog.logMessage(self.format(record), MESSAGE_LOG_TAG, level)
+
+
+def use_handler(handler_type):
+    """Send the plugin records to a single handler of handler_type, replacing the current one."""
+    if any(type(handler) is handler_type for handler in logger.handlers):
+        return
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = handler_type()
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger.addHandler(handler)
+
+
+# Warnings and errors are never dropped, tracing only adds the INFO and DEBUG records
+use_handler(QgsMessageLogHandler)
+
+
+def enable_tracing(level=logging.INFO, message_log=True):
+    """
+    Turn tracing on at the given level. With message_log, records go to
+    the QGIS message log, otherwise to stderr.
+    """
+    logger.setLevel(level)
+    use_handler(QgsMessageLogHandler if message_log else logging.StreamHandler)
+
+
+def disable_tracing():
+    """Turn tracing off again, keeping warnings and errors."""
+    logger.setLevel(logging.WARNING)
+
+
+def configure_from_environment(message_log=True):
+    """Enable tracing when CREATE_GRID_TRACE names a logging level (e.g. 'info', 'debug')."""
+    level_name = os.environ.get("CREATE_GRID_TRACE", "").strip().upper()
+    level = logging.getLevelName(level_name) if level_name else None
+    if isinstance(level, int):
+        enable_tracing(level, message_log)
+
+
+class TraceSpan:
+    """
+    Accumulated timing of one stage. measure() can be entered several times,
+    e.g. once per provider insert chunk, and report() logs the total.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.cells = 0
+        self.elapsed = 0.0
+        self._started = None
+
+    def start(self):
+        """Start timing, for stages that do not fit in a with block."""
+        self._started = time.perf_counter()
+
+    def stop(self, cells=0):
+        """Stop timing started with start() and add the processed cells."""
+        self.elapsed += time.perf_counter() - self._started
+        self.cells += cells
+
+    @contextlib.contextmanager
+    def measure(self, cells=0):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.elapsed += time.perf_counter() - start
+            self.cells += cells
+
+    def summary(self):
+        if self.cells and self.elapsed > 0:
+            rate = self.cells / self.elapsed
+            return f"{self.name}: {self.cells} cells in {self.elapsed:.3f} s ({rate:,.0f} cells/s)"
+        return f"{self.name}: {self.elapsed:.3f} s"
+
+    def report(self):
+        logger.info(self.summary())
+
+
+@contextlib.contextmanager
+def trace_stage(name, cells=0):
+    """
+    Time a stage and log its summary when it ends. The yielded span's
+    `cells` can be set inside the block once the cell count is known.
+    """
+    span = TraceSpan(name)
+    with span.measure(cells):
+        yield span
+    span.report()
@@ -0,0 +1,61 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..CreateGridPlugin_adjacency import NO_NEIGHBOUR, AdjacencyTable
+from ..CreateGridPlugin_core import GridLayout
+from ..CreateGridPlugin_engine import mask_array
+
+
+def grid_table(n_rows, n_cols, mask_rows=None):
+    """Build the table of a grid from the layout's neighbour labels."""
+    layout = GridLayout(0.0, 0.0, float(n_cols), float(n_rows), 1.0, 1.0)
+    cells = [(row, col) for row in range(n_rows) for col in range(n_cols) if mask_rows is None or mask_rows[row][col]]
+    labels = [layout.cell_label(row, col) for row, col in cells]
+    return AdjacencyTable.from_neighbour_labels(labels, [layout.neighbour_labels(row, col, mask_rows)
+                                                         for row, col in cells])
+
+
+def test_from_grid_matches_neighbour_labels():
+    table = AdjacencyTable.from_grid(4, 5)
+    expected = grid_table(4, 5)
+    assert table.labels == expected.labels
+    assert table.neighbours.tolist() == expected.neighbours.tolist()
+
+
+def test_clipped_from_grid_matches_neighbour_labels():
+    mask_rows = [bytearray((row * col) % 4 != 1 for col in range(6)) for row in range(5)]
+    table = AdjacencyTable.from_grid(5, 6, mask_array(mask_rows))
+    expected = grid_table(5, 6, mask_rows)
+    assert table.labels == expected.labels
+    assert table.neighbours.tolist() == expected.neighbours.tolist()
+
+
+def test_neighbour_labels_of_a_corner_cell():
+    table = AdjacencyTable.from_grid(3, 3)
+    assert table.neighbour_labels(table.index_of("A1")) == ["", "", "", "", "B1", "B2", "A2", ""]
+    assert table.index_of("Z9") == NO_NEIGHBOUR
+
+
+def test_byte_round_trip():
+    table = AdjacencyTable.from_grid(7, 30)
+    copy = AdjacencyTable.from_bytes(table.to_bytes())
+    assert copy.labels == table.labels
+    assert copy.neighbours.tolist() == table.neighbours.tolist()
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_sidecar_round_trip(tmp_path, mmap):
+    table = grid_table(6, 4)
+    path = str(tmp_path / "grid.adj")
+    table.save(path)
+    loaded = AdjacencyTable.load(path, mmap=mmap)
+    assert loaded.labels == table.labels
+    assert np.array_equal(loaded.neighbours, table.neighbours)
+
+
+def test_other_neighbour_counts_round_trip():
+    table = AdjacencyTable.from_neighbour_labels(["A1", "B1", "C1"], [["B1", ""], ["C1", "A1"], ["", "B1"]], 2)
+    assert table.neighbours.tolist() == [[1, -1], [2, 0], [-1, 1]]
+    copy = AdjacencyTable.from_bytes(table.to_bytes())
+    assert copy.neighbours.tolist() == table.neighbours.tolist()
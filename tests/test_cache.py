@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..CreateGridPlugin_adjacency import AdjacencyTable
+from ..CreateGridPlugin_cache import AdjacencyCache, fingerprint
+
+FIDS = [1, 2, 3, 4]
+LABELS = ["A1", "B1", "A2", "B2"]
+EXTENT = (0.0, 0.0, 2.0, 2.0)
+
+
+def table(n_cols=2):
+    return AdjacencyTable.from_grid(2, n_cols)
+
+
+def test_fingerprint_follows_the_content():
+    base = fingerprint(FIDS, LABELS, EXTENT)
+    assert fingerprint(list(FIDS), list(LABELS), EXTENT) == base
+    assert fingerprint(FIDS, ["A1", "B1", "A2", "C2"], EXTENT) != base
+    assert fingerprint([1, 2, 3, 5], LABELS, EXTENT) != base
+    assert fingerprint(FIDS[::-1], LABELS[::-1], EXTENT) != base
+    assert fingerprint(FIDS, LABELS, (0.0, 0.0, 2.0, 3.0)) != base
+    assert fingerprint(FIDS, LABELS) != base
+    # Labels are joined with a separator, moving a character between them changes the hash
+    assert fingerprint([1, 2], ["AB", "1"]) != fingerprint([1, 2], ["A", "B1"])
+
+
+def test_fingerprint_includes_geometries():
+    wkbs = [b"\x01" * 93, b"\x02" * 93, b"\x03" * 93, b"\x04" * 93]
+    base = fingerprint(FIDS, LABELS, EXTENT, wkbs)
+    assert base != fingerprint(FIDS, LABELS, EXTENT)
+    assert fingerprint(FIDS, LABELS, EXTENT, iter(wkbs)) == base
+    assert fingerprint(FIDS, LABELS, EXTENT, wkbs[:3] + [b"\x05" * 93]) != base
+
+
+def test_get_returns_the_stored_table(tmp_path):
+    cache = AdjacencyCache(str(tmp_path / "cache" / "adjacency.sqlite"))
+    key = ("ogr:/data/grid.gpkg", "GridNo", "label")
+    layer_fingerprint = fingerprint(FIDS, LABELS, EXTENT)
+    assert cache.get(*key, layer_fingerprint) is None
+
+    cache.put(*key, layer_fingerprint, table())
+    cached = cache.get(*key, layer_fingerprint)
+    assert cached.labels == table().labels
+    assert cached.neighbours.tolist() == table().neighbours.tolist()
+    # A changed layer, another field or another mode misses
+    assert cache.get(*key, fingerprint(FIDS, LABELS)) is None
+    assert cache.get(key[0], "Other", "label", layer_fingerprint) is None
+    assert cache.get(key[0], "GridNo", "topology", layer_fingerprint) is None
+
+
+def test_put_replaces_the_entry_of_a_layer(tmp_path):
+    cache = AdjacencyCache(str(tmp_path / "adjacency.sqlite"))
+    key = ("memory:grid_1", "GridNo", "label")
+    cache.put(*key, "old", table(2))
+    cache.put(*key, "new", table(3))
+    assert cache.get(*key, "old") is None
+    assert len(cache.get(*key, "new")) == 6
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    size = len(table().to_bytes())
+    cache = AdjacencyCache(str(tmp_path / "adjacency.sqlite"), max_bytes=3 * size)
+    for name in ("a", "b", "c"):
+        cache.put(name, "GridNo", "label", "f", table())
+        time.sleep(0.01)
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a", "GridNo", "label", "f") is not None
+    time.sleep(0.01)
+    cache.put("d", "GridNo", "label", "f", table())
+    assert cache.get("b", "GridNo", "label", "f") is None
+    for name in ("a", "c", "d"):
+        assert cache.get(name, "GridNo", "label", "f") is not None
+
+
+def test_tables_larger_than_the_cache_are_not_stored(tmp_path):
+    small = table()
+    cache = AdjacencyCache(str(tmp_path / "adjacency.sqlite"), max_bytes=len(small.to_bytes()))
+    cache.put("small", "GridNo", "label", "f", small)
+    cache.put("large", "GridNo", "label", "f", table(40))
+    assert cache.get("large", "GridNo", "label", "f") is None
+    # The entry that fits was not evicted to make room
+    assert cache.get("small", "GridNo", "label", "f") is not None
+
+
+def test_clear(tmp_path):
+    cache = AdjacencyCache(str(tmp_path / "adjacency.sqlite"))
+    cache.put("a", "GridNo", "label", "f", table())
+    cache.clear()
+    assert cache.get("a", "GridNo", "label", "f") is None
@@ -0,0 +1,80 @@
+import csv
+
+from ..CreateGridPlugin_core import REPORT_FIELDS, report_batches, write_report
+from ..CreateGridPlugin_feedback import GridFeedback
+
+
+class CancelAfter(GridFeedback):
+    """Feedback that records progress and cancels once it reaches `limit`."""
+
+    def __init__(self, limit=None):
+        super(CancelAfter, self).__init__(min_interval=0.0, min_step=0.0)
+        self.limit = limit
+        self.values = []
+        self.on_progress = self.values.append
+
+    def set_progress(self, value):
+        super(CancelAfter, self).set_progress(value)
+        if self.limit is not None and value >= self.limit:
+            self.cancel()
+
+
+def read_report(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_values_are_quoted_where_needed(tmp_path):
+    path = str(tmp_path / "report.csv")
+    rows = [
+        ["A1", "B1", "", None, 'say "hi"', "x,y", "line\nbreak", "B2", "A2"],
+        ["B1", "", "", "", "", "", "", "", "A1"],
+    ]
+    assert write_report(path, rows, len(rows)) == 2
+    expected = [REPORT_FIELDS] + [["" if value is None else value for value in row] for row in rows]
+    assert read_report(path) == expected
+    with open(path, encoding="utf-8", newline="") as f:
+        text = f.read()
+    assert '"say ""hi"""' in text and '"x,y"' in text
+    assert text.startswith(",".join(REPORT_FIELDS) + "\n")
+
+
+def test_custom_columns(tmp_path):
+    path = str(tmp_path / "report.csv")
+    write_report(path, [("A,1", "B1")], 1, columns=["Cell", "Neighbours"])
+    assert read_report(path) == [["Cell", "Neighbours"], ["A,1", "B1"]]
+
+
+def test_batch_boundaries():
+    rows = [(i,) for i in range(25)]
+    for batch_size in (1, 5, 7, 25, 100):
+        batches = list(report_batches(rows, batch_size, len(rows)))
+        assert [row for batch in batches for row in batch] == rows
+        assert all(len(batch) == batch_size for batch in batches[:-1])
+        assert 0 < len(batches[-1]) <= batch_size
+    assert list(report_batches([], 10)) == []
+
+
+def test_batches_report_progress():
+    feedback = CancelAfter()
+    batches = list(report_batches(iter(range(10)), 4, 10, feedback))
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert feedback.values == [40.0, 80.0, 100.0]
+
+
+def test_write_report_stops_on_cancel(tmp_path):
+    path = str(tmp_path / "report.csv")
+    rows = [("A%d" % i,) for i in range(1, 101)]
+    assert write_report(path, rows, len(rows), CancelAfter(30), ["GridNo"], batch_size=10) is None
+    # Everything up to the batch that crossed the limit was written
+    assert len(read_report(path)) == 1 + 30
+
+
+def test_write_report_batches_match_single_pass(tmp_path):
+    rows = [("A%d" % i, "B%d" % i) for i in range(1, 1002)]
+    single = str(tmp_path / "single.csv")
+    batched = str(tmp_path / "batched.csv")
+    assert write_report(single, rows, columns=["a", "b"], batch_size=len(rows)) == len(rows)
+    assert write_report(batched, iter(rows), columns=["a", "b"], batch_size=64) == len(rows)
+    with open(single, "rb") as f, open(batched, "rb") as g:
+        assert f.read() == g.read()
@@ -0,0 +1,59 @@
+import struct
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..CreateGridPlugin_core import GridLayout
+from ..CreateGridPlugin_engine import WKB_CELL_SIZE, build_cells, mask_array
+
+
+def wkb_ring(wkb):
+    """Return the points of a single ring WKB polygon."""
+    byte_order, wkb_type, num_rings, num_points = struct.unpack_from("<BIII", wkb)
+    assert (byte_order, wkb_type, num_rings) == (1, 3, 1)
+    coords = struct.unpack_from(f"<{2 * num_points}d", wkb, 13)
+    return list(zip(coords[0::2], coords[1::2]))
+
+
+@pytest.mark.parametrize("bounds, length, width", [
+    ((0.0, 0.0, 10.0, 7.0), 2.0, 3.0),
+    ((-5.5, 100.0, 20.0, 133.3), 4.0, 1.5),
+    ((0.0, 0.0, 1.0, 1.0), 1.0, 1.0),
+])
+def test_engine_matches_layout(bounds, length, width):
+    layout = GridLayout(*bounds, length, width)
+    labels, wkb_list, neighbours = build_cells(*bounds, length, width)
+
+    cells = [(row, col) for row in range(layout.n_rows) for col in range(layout.n_cols)]
+    assert len(labels) == len(wkb_list) == len(layout)
+    assert labels == [layout.cell_label(row, col) for row, col in cells]
+    assert all(len(wkb) == WKB_CELL_SIZE for wkb in wkb_list)
+    assert [wkb_ring(wkb) for wkb in wkb_list] == [pytest.approx(layout.cell_ring(row, col)) for row, col in cells]
+    assert [list(values) for values in zip(*neighbours)] == [layout.neighbour_labels(row, col) for row, col in cells]
+
+
+def test_row_bands_match_single_pass():
+    bounds = (0.0, 0.0, 9.0, 11.0)
+    labels, wkb_list, neighbours = build_cells(*bounds, 1.0, 1.0)
+    band_labels, band_wkb, band_neighbours = [], [], [[] for _ in neighbours]
+    for row_start in range(0, 11, 4):
+        labels_band, wkb_band, neighbours_band = build_cells(*bounds, 1.0, 1.0, row_start, row_start + 4)
+        band_labels += labels_band
+        band_wkb += wkb_band
+        for values, band_values in zip(band_neighbours, neighbours_band):
+            values += band_values
+    assert (band_labels, band_wkb, band_neighbours) == (labels, wkb_list, neighbours)
+
+
+def test_clipped_engine_matches_layout():
+    bounds = (0.0, 0.0, 6.0, 5.0)
+    layout = GridLayout(*bounds, 1.0, 1.0)
+    mask_rows = [bytearray((row + col) % 3 != 0 for col in range(layout.n_cols)) for row in range(layout.n_rows)]
+    labels, wkb_list, neighbours = build_cells(*bounds, 1.0, 1.0, cell_mask=mask_array(mask_rows))
+
+    cells = [(row, col) for row in range(layout.n_rows) for col in range(layout.n_cols) if mask_rows[row][col]]
+    assert labels == [layout.cell_label(row, col) for row, col in cells]
+    assert [list(values) for values in zip(*neighbours)] == [
+        layout.neighbour_labels(row, col, mask_rows) for row, col in cells
+    ]
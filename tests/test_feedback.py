@@ -0,0 +1,121 @@
+import io
+
+import pytest
+
+from .. import CreateGridPlugin_core as core
+from .. import CreateGridPlugin_feedback as feedback_module
+from ..CreateGridPlugin_engine import HAS_NUMPY
+from ..CreateGridPlugin_feedback import GridFeedback
+from ..CreateGridPlugin_labels import encode_label
+
+needs_numpy = pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed")
+
+LABELS = [encode_label(row, col) for row in range(300) for col in range(300)]
+
+
+class Clock:
+    """Stands in for time.monotonic, moved on by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(feedback_module.time, "monotonic", clock)
+    return clock
+
+
+class CancelAt(GridFeedback):
+    """Feedback that records progress and cancels at the n-th update."""
+
+    def __init__(self, updates):
+        super(CancelAt, self).__init__(min_interval=0.0, min_step=0.0)
+        self.updates = updates
+        self.values = []
+        self.on_progress = self.values.append
+
+    def set_progress(self, value):
+        super(CancelAt, self).set_progress(value)
+        if len(self.values) >= self.updates:
+            self.cancel()
+
+
+def test_progress_at_most_once_per_interval(clock):
+    values = []
+    feedback = GridFeedback(values.append, min_interval=0.5, min_step=0.0)
+    for step in range(1, 100):
+        clock.now += 0.125
+        feedback.set_progress(step)
+    # The first update, then one every four steps of 0.125 seconds
+    assert values == [float(step) for step in range(1, 100, 4)]
+
+
+def test_progress_steps(clock):
+    values = []
+    feedback = GridFeedback(values.append, min_interval=0.0, min_step=10.0)
+    for step in range(0, 1001):
+        clock.now += 1.0
+        feedback.set_progress(step / 10)
+    assert values == [float(step) for step in range(0, 101, 10)]
+
+
+def test_start_and_end_always_reported(clock):
+    values = []
+    feedback = GridFeedback(values.append, min_interval=60.0, min_step=50.0)
+    for value in (0, 1, 2, 100, 100, 0, 120, -5):
+        feedback.set_progress(value)
+    # Repeats are dropped and values are clamped to 0-100
+    assert values == [0.0, 100.0, 0.0, 100.0, 0.0]
+
+
+def test_no_sink():
+    feedback = GridFeedback()
+    feedback.set_progress(50)
+    assert not feedback.canceled
+    feedback.cancel()
+    assert feedback.canceled
+
+
+def test_console(clock):
+    stream = io.StringIO()
+    feedback = GridFeedback.for_console("Grid", stream, min_interval=0.0)
+    feedback.set_progress(0)
+    feedback.set_progress(100)
+    assert stream.getvalue() == "\rGrid:   0.0%\rGrid: 100.0%\n"
+
+
+def test_scalar_loop_stops_on_cancel(monkeypatch):
+    monkeypatch.setattr(core, "HAS_NUMPY", False)
+    feedback = CancelAt(1)
+    assert core.label_adjacency(LABELS, feedback) is None
+    # The loop checks every 10000 labels, it stopped at the check after the first update
+    assert feedback.values == [pytest.approx(10000 * 100 / len(LABELS))]
+
+
+@needs_numpy
+@pytest.mark.parametrize("existing", [None, LABELS])
+def test_batched_loop_stops_on_cancel(existing):
+    feedback = CancelAt(1)
+    assert core.label_adjacency(LABELS, feedback, existing) is None
+    assert len(feedback.values) == 1 and feedback.values[0] < 100
+
+
+@needs_numpy
+def test_loop_runs_to_the_end_without_cancel():
+    feedback = CancelAt(len(LABELS))
+    assert core.label_adjacency(LABELS, feedback) == core.label_adjacency(LABELS)
+    assert feedback.values[-1] == 100.0
+    assert not feedback.canceled
+
+
+def test_canceled_before_start():
+    feedback = GridFeedback()
+    feedback.cancel()
+    if HAS_NUMPY:
+        assert core.label_adjacency(LABELS, feedback) is None
+    assert list(core.report_batches(iter(range(10)), 4, 10, feedback)) == []
@@ -0,0 +1,108 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from .. import CreateGridPlugin_formats as formats
+from ..CreateGridPlugin_core import REPORT_FIELDS
+from ..CreateGridPlugin_hex import HEX_FIELDS
+from ..CreateGridPlugin_neighbourhood import LIST_FIELD
+
+ROWS = [
+    ["A1", "", "", "", "", "B1", "B2", "A2", ""],
+    ["B1", "A1", "", "", "", "", "", "B2", "A2"],
+    ["A2", "", "", "A1", "B1", "", "", "", ""],
+    ["B2", "A2", "A1", "B1", "", "", "", "", None],
+]
+
+
+def expected_rows():
+    return [["" if value is None else value for value in row] for row in ROWS]
+
+
+@pytest.mark.parametrize("name, report_type", [
+    ("a.txt", "csv"), ("a.CSV", "csv"), ("a.parquet", "parquet"), ("a.arrows", "arrow"), ("a.npz", "npz"),
+    ("a.dat", "csv"),
+])
+def test_report_format(name, report_type):
+    assert formats.report_format(name) == report_type
+
+
+def test_npz_needs_neighbour_columns():
+    formats.check_report_file("a.npz", REPORT_FIELDS)
+    formats.check_report_file("a.npz", ["GridNo"] + HEX_FIELDS["flat"])
+    with pytest.raises(ValueError):
+        formats.check_report_file("a.npz", ["GridNo"])
+    with pytest.raises(ValueError):
+        formats.check_report_file("a.npz", ["GridNo", LIST_FIELD])
+    formats.check_report_file("a.csv", ["GridNo", LIST_FIELD])
+
+
+def test_missing_pyarrow_is_reported(monkeypatch):
+    monkeypatch.setattr(formats, "HAS_PYARROW", False)
+    for name in ("a.parquet", "a.arrows"):
+        with pytest.raises(RuntimeError):
+            formats.check_report_file(name)
+    formats.check_report_file("a.csv")
+
+
+def test_csv_round_trip(tmp_path):
+    import csv
+
+    path = str(tmp_path / "report.csv")
+    assert formats.write_report_file(path, ROWS, len(ROWS), batch_size=3) == len(ROWS)
+    with open(path, encoding="utf-8", newline="") as f:
+        assert list(csv.reader(f)) == [REPORT_FIELDS] + expected_rows()
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    path = str(tmp_path / "report.parquet")
+    assert formats.write_report_file(path, ROWS, len(ROWS), batch_size=3) == len(ROWS)
+    table = pq.read_table(path)
+    assert table.column_names == REPORT_FIELDS
+    assert [list(row.values()) for row in table.to_pylist()] == [list(row) for row in ROWS]
+
+
+def test_arrow_round_trip(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+
+    path = str(tmp_path / "report.arrows")
+    assert formats.write_report_file(path, ROWS, len(ROWS), batch_size=3) == len(ROWS)
+    with pa.ipc.open_stream(path) as reader:
+        batches = list(reader)
+    assert [len(batch) for batch in batches] == [3, 1]
+    table = pa.Table.from_batches(batches)
+    assert table.column_names == REPORT_FIELDS
+    assert [list(row.values()) for row in table.to_pylist()] == [list(row) for row in ROWS]
+
+
+def test_npz_round_trip(tmp_path):
+    path = str(tmp_path / "report.npz")
+    assert formats.write_report_file(path, ROWS, len(ROWS), batch_size=3) == len(ROWS)
+    with np.load(path) as data:
+        assert data["rows"].tolist() == [0, 0, 1, 1]
+        assert data["cols"].tolist() == [0, 1, 0, 1]
+        neighbours = data["neighbours"]
+    labels = [row[0] for row in ROWS]
+    assert neighbours.dtype == np.int32
+    assert [["" if n < 0 else labels[n] for n in row] for row in neighbours.tolist()] == \
+        [row[1:] for row in expected_rows()]
+
+
+def test_npz_leaves_out_cells_of_other_labels(tmp_path):
+    path = str(tmp_path / "report.npz")
+    rows = [["12", "99999999999999999999", ""], ["99999999999999999999", "", "12"],
+            ["3f2a-99", "", ""]]
+    assert formats.write_report_file(path, rows, columns=["id", "Left", "Right"]) == 3
+    with np.load(path) as data:
+        assert sorted(data.files) == ["neighbours"]
+        assert data["neighbours"].tolist() == [[1, -1], [-1, 0], [-1, -1]]
+
+
+def test_grid_cells():
+    rows, cols = formats.grid_cells(["A1", "", "ab12"])
+    assert rows.tolist() == [0, -1, 11] and cols.tolist() == [0, -1, 27]
+    assert formats.grid_cells(["A1", "1234"]) is None
+    assert formats.grid_cells(["A1", "ABCDEFG1"]) is None
@@ -0,0 +1,73 @@
+import math
+import struct
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..CreateGridPlugin_engine import cell_indices
+from ..CreateGridPlugin_hex import (
+    HEX_FIELDS,
+    HEX_ORIENTATIONS,
+    build_hex_cells,
+    hex_centres,
+    hex_dimensions,
+    hex_neighbour_cells,
+    hex_table,
+)
+
+BOUNDS = (10.0, -4.0, 47.0, 29.0)
+SIZE = 3.0
+
+
+@pytest.mark.parametrize("orientation", HEX_ORIENTATIONS)
+def test_neighbours_are_one_size_apart(orientation):
+    n_rows, n_cols = hex_dimensions(*BOUNDS, SIZE, orientation)
+    row_idx, col_idx = cell_indices(n_cols, 0, n_rows)
+    x, y = hex_centres(BOUNDS[0], BOUNDS[3], SIZE, orientation, row_idx, col_idx)
+    for n_row, n_col, valid in hex_neighbour_cells(row_idx, col_idx, n_rows, n_cols, orientation):
+        nx, ny = hex_centres(BOUNDS[0], BOUNDS[3], SIZE, orientation, n_row[valid], n_col[valid])
+        distances = np.hypot(nx - x[valid], ny - y[valid])
+        assert np.allclose(distances, SIZE)
+
+
+@pytest.mark.parametrize("orientation", HEX_ORIENTATIONS)
+def test_inner_cells_have_six_distinct_neighbours(orientation):
+    n_rows, n_cols = hex_dimensions(*BOUNDS, SIZE, orientation)
+    row_idx, col_idx = cell_indices(n_cols, 0, n_rows)
+    cells = hex_neighbour_cells(row_idx, col_idx, n_rows, n_cols, orientation)
+    inner = np.all([valid for _, _, valid in cells], axis=0)
+    assert inner.any()
+    ids = np.stack([n_row * n_cols + n_col for n_row, n_col, _ in cells], axis=1)[inner]
+    assert all(len(set(row)) == 6 for row in ids.tolist())
+
+
+@pytest.mark.parametrize("orientation", HEX_ORIENTATIONS)
+def test_cells_cover_the_extent(orientation):
+    labels, wkb_list, neighbours = build_hex_cells(*BOUNDS, SIZE, orientation)
+    assert len(neighbours) == len(HEX_FIELDS[orientation])
+    xs, ys = [], []
+    for wkb in wkb_list:
+        num_points = struct.unpack_from("<I", wkb, 9)[0]
+        coords = struct.unpack_from(f"<{2 * num_points}d", wkb, 13)
+        assert coords[:2] == coords[-2:]
+        xs += coords[0::2]
+        ys += coords[1::2]
+    assert min(xs) <= BOUNDS[0] and min(ys) <= BOUNDS[1]
+    assert max(xs) >= BOUNDS[2] and max(ys) >= BOUNDS[3]
+
+
+@pytest.mark.parametrize("orientation", HEX_ORIENTATIONS)
+def test_table_matches_neighbour_labels(orientation):
+    labels, _, neighbours = build_hex_cells(*BOUNDS, SIZE, orientation)
+    table = hex_table(*hex_dimensions(*BOUNDS, SIZE, orientation), orientation)
+    assert table.labels == labels
+    assert [table.neighbour_labels(row) for row in range(len(table))] == [list(values) for values in zip(*neighbours)]
+
+
+def test_hexagon_side_is_the_radius():
+    _, wkb_list, _ = build_hex_cells(*BOUNDS, SIZE, "flat", 0, 1)
+    coords = struct.unpack_from("<14d", wkb_list[0], 13)
+    points = list(zip(coords[0::2], coords[1::2]))
+    sides = [math.dist(a, b) for a, b in zip(points, points[1:])]
+    assert sides == pytest.approx([SIZE / math.sqrt(3)] * 6)
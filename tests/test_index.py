@@ -0,0 +1,59 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..CreateGridPlugin_index import GridIndex
+from ..CreateGridPlugin_labels import encode_label
+from ..CreateGridPlugin_neighbourhood import neighbour_values
+
+DENSE = [encode_label(row, col) for row in range(6) for col in range(5)]
+# A few cells spread over a huge row and column range
+SPARSE = ["A1", "B1", "A2", "ZZZ7", "ZZZ8", "C900000", "D900001"]
+
+
+@pytest.mark.parametrize("labels, dense", [(DENSE, True), (SPARSE, False)])
+def test_lookups(labels, dense):
+    fids = [10 * cell for cell in range(len(labels))]
+    index = GridIndex(labels, fids)
+    assert index.lookup.dense == dense
+    assert len(index) == len(labels)
+    for fid, label in zip(fids, labels):
+        row, col = index.position_of(label)
+        assert index.label_at(row, col) == label
+        assert index.fid_at(row, col) == fid
+        assert index.fid_of(label) == fid
+        assert index.label_of(fid) == label
+    assert index.label_at(-1, 0) is None
+    assert index.fid_at(0, 10 ** 6) is None
+    assert "A1" in index and "A0" not in index
+    with pytest.raises(KeyError):
+        index.fid_of("AB123")
+    with pytest.raises(KeyError):
+        index.label_of(-1)
+
+
+def test_sparse_neighbours():
+    index = GridIndex(SPARSE)
+    assert index.neighbours("A1") == [None, None, None, None, "B1", None, "A2", None]
+    assert index.neighbours("A1", "4") == [None, None, "B1", "A2"]
+    assert index.neighbours("ZZZ7", "4") == [None, None, None, "ZZZ8"]
+    assert index.ring("C900000", 1) == ["D900001"]
+    assert index.rectangle("A1", "ZZZ8") == ["A1", "B1", "A2", "ZZZ7", "ZZZ8"]
+
+
+def test_dense_queries():
+    index = GridIndex(DENSE)
+    assert index.neighbours("B2") == ["A2", "A1", "B1", "C1", "C2", "C3", "B3", "A3"]
+    assert index.ring("A1", 2) == ["B1", "C1", "A2", "B2", "C2", "A3", "B3", "C3"]
+    assert index.rectangle("D5", "B4") == ["B4", "C4", "D4", "B5", "C5", "D5"]
+    assert neighbour_values(index.table("4"))[DENSE.index("B2")] == ["A2", "B1", "C2", "B3"]
+
+
+def test_duplicates_and_empty_labels():
+    index = GridIndex(["A1", "", "A1", "B1"], fids=[5, 6, 7, 8])
+    assert index.fid_of("A1") == 5
+    assert index.label_at(0, 0) == "A1"
+    assert "" not in index
+    assert index.label_of(6) == ""
+    with pytest.raises(ValueError):
+        GridIndex(["A1"], fids=[1, 2])
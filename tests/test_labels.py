@@ -0,0 +1,85 @@
+import pytest
+
+from ..CreateGridPlugin_core import label_adjacency, label_neighbours
+from ..CreateGridPlugin_labels import column_letters, decode_label, decode_labels, encode_label, encode_labels
+
+
+@pytest.mark.parametrize("row, col, label", [
+    (0, 0, "A1"),
+    (0, 1, "B1"),
+    (1, 26, "AA2"),
+    (9, 25, "Z10"),
+    (0, 701, "ZZ1"),
+    (41, 702, "AAA42"),
+])
+def test_known_labels(row, col, label):
+    assert encode_label(row, col) == label
+    assert decode_label(label) == (row, col)
+
+
+def test_negative_indexes_have_no_label():
+    assert encode_label(-1, 0) is None
+    assert encode_label(0, -1) is None
+
+
+def test_column_letters_grow_on_demand():
+    assert column_letters(18277) == "ZZZ"
+    assert column_letters(18278) == "AAAA"
+
+
+def test_single_label_round_trip():
+    for row in range(0, 3000, 37):
+        for col in range(0, 20000, 211):
+            assert decode_label(encode_label(row, col)) == (row, col)
+
+
+def test_decode_label_rules():
+    assert decode_label("b3") == (2, 1)
+    assert decode_label("A-1") == (0, 0)
+    assert decode_label("7") == (6, 0)
+    assert decode_label("C") == (0, 2)
+
+
+def test_batch_round_trip():
+    np = pytest.importorskip("numpy")
+    rows = np.repeat(np.arange(0, 1200, 7), 40)
+    cols = np.tile(np.arange(0, 40000, 1000), len(rows) // 40)
+    labels = encode_labels(rows, cols)
+    assert labels == [encode_label(row, col) for row, col in zip(rows.tolist(), cols.tolist())]
+    decoded_rows, decoded_cols = decode_labels(labels)
+    assert decoded_rows.tolist() == rows.tolist()
+    assert decoded_cols.tolist() == cols.tolist()
+
+
+def test_batch_decode_matches_single_decode():
+    pytest.importorskip("numpy")
+    labels = ["A1", "aa2", "B-3", "7", "C", "Zz10", "É5"]
+    rows, cols = decode_labels(labels)
+    assert list(zip(rows.tolist(), cols.tolist())) == [decode_label(label) for label in labels]
+
+
+def scalar_adjacency(labels, existing):
+    """The label mode adjacency of the scalar codec, one label at a time."""
+    existing = set(existing) - {""}
+    return [[neighbour if neighbour in existing else "" for neighbour in label_neighbours(label)] if label
+            else [""] * 8 for label in labels]
+
+
+def test_batched_adjacency_matches_scalar_codec():
+    pytest.importorskip("numpy")
+    labels = [encode_label(row, col) for row in range(9) for col in range(30) if (row * col) % 7 != 3]
+    labels[5] = ""
+    assert label_adjacency(labels) == scalar_adjacency(labels, labels)
+
+
+def test_chunks_look_up_the_whole_layer():
+    pytest.importorskip("numpy")
+    from ..CreateGridPlugin_neighbourhood import CellLookup
+
+    labels = [encode_label(row, col) for row in range(12) for col in range(5)]
+    lookup = CellLookup(labels)
+    chunked = []
+    for start in range(0, len(labels), 7):
+        chunked += label_adjacency(labels[start:start + 7], existing=lookup)
+    assert chunked == scalar_adjacency(labels, labels)
+    assert label_adjacency(labels[:7], existing=set(labels)) == chunked[:7]
@@ -0,0 +1,160 @@
+import tracemalloc
+
+import pytest
+
+from ..CreateGridPlugin_memory import (
+    CELL_SNAPSHOT_BYTES,
+    MIB,
+    MIN_CHUNK_SIZE,
+    MemoryBudget,
+    StagedChanges,
+    snapshot_bytes,
+)
+from ..CreateGridPlugin_neighbourhood import NEIGHBOURHOODS, neighbour_count
+
+BATCH_SIZE = 2000
+
+
+def batches(count, batch_size=BATCH_SIZE):
+    """Yield `count` batches of adjacency changes of distinct cells."""
+    for start in range(0, count * batch_size, batch_size):
+        yield {fid: {1: f"A{fid}", 2: f"B{fid}"} for fid in range(start, start + batch_size)}
+
+
+def staged_peak(count, flush=None):
+    """Stage `count` batches and return the traced memory peak and the staged changes."""
+    staged = StagedChanges(flush)
+    tracemalloc.start()
+    try:
+        for batch in batches(count):
+            assert staged.stage(batch)
+            del batch
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak, staged
+
+
+def test_flushed_changes_stay_bounded():
+    written = []
+
+    def flush(changes):
+        written.append(len(changes))
+        return True
+
+    small_peak, small = staged_peak(4, flush)
+    large_peak, large = staged_peak(40, flush)
+    assert small.peak_cells == large.peak_cells == BATCH_SIZE
+    assert len(large) == 0 and large.flushed == 40 * BATCH_SIZE
+    assert sum(written) == 44 * BATCH_SIZE
+    # Ten times the changes, about the same peak
+    assert large_peak < 2 * small_peak
+
+
+def test_unflushed_changes_are_kept():
+    peak, staged = staged_peak(4)
+    assert len(staged) == staged.peak_cells == 4 * BATCH_SIZE
+    assert staged.flushed == 0
+    assert staged.get(7) == {1: "A7", 2: "B7"}
+    assert staged.get(-1) is None
+
+
+def test_changes_of_a_cell_are_merged():
+    staged = StagedChanges()
+    staged.stage({3: {1: "A1"}})
+    staged.stage({3: {2: "B1"}, 4: {1: ""}})
+    assert staged.pending == {3: {1: "A1", 2: "B1"}, 4: {1: ""}}
+
+
+def test_failed_flush_is_reported():
+    staged = StagedChanges(lambda changes: None)
+    assert not staged.stage({1: {1: "A1"}})
+    assert staged.flushed == 1
+
+
+@pytest.fixture
+def no_tracing():
+    """Run a test without tracemalloc running, and leave it off afterwards."""
+    was_tracing = tracemalloc.is_tracing()
+    tracemalloc.stop()
+    yield
+    if was_tracing:
+        tracemalloc.start()
+
+
+def test_budget_without_limit_fits_everything(no_tracing):
+    budget = MemoryBudget.from_megabytes(0)
+    assert budget.max_bytes is None and budget.remaining() is None
+    assert budget.fits(10 ** 9, CELL_SNAPSHOT_BYTES)
+    assert budget.chunk_size(CELL_SNAPSHOT_BYTES) is None
+    assert budget.chunk_size(CELL_SNAPSHOT_BYTES, 5000) == 5000
+    assert not budget.exceeded()
+
+
+def test_fits_and_chunk_size(no_tracing):
+    budget = MemoryBudget.from_megabytes(10)
+    assert budget.max_bytes == 10 * MIB == budget.remaining()
+    cells = 10 * MIB // 1024
+    assert budget.fits(cells, 1024)
+    assert not budget.fits(cells + 1, 1024)
+    # A chunk takes at most half of what is left, and never less than MIN_CHUNK_SIZE cells
+    assert budget.chunk_size(1024) == cells // 2
+    assert budget.chunk_size(1024, 100) == 100
+    assert budget.chunk_size(1024, 10 ** 9) == cells // 2
+    assert budget.chunk_size(10 * MIB) == MIN_CHUNK_SIZE
+
+
+def test_traced_allocations_reduce_what_is_left(no_tracing):
+    with MemoryBudget(64 * MIB) as budget:
+        assert tracemalloc.is_tracing()
+        before = budget.remaining()
+        held = bytearray(8 * MIB)
+        assert budget.remaining() <= before - 8 * MIB
+        assert not budget.fits(before // 1024, 1024)
+        del held
+    assert not tracemalloc.is_tracing()
+
+
+def test_stage_records_peaks(no_tracing):
+    with MemoryBudget(4 * MIB) as budget:
+        with budget.stage("small"):
+            data = bytearray(MIB)
+            del data
+        with budget.stage("large"):
+            data = bytearray(8 * MIB)
+            del data
+        with budget.stage("small"):
+            pass
+    assert MIB <= budget.peaks["small"] < 8 * MIB
+    assert budget.peaks["large"] >= 8 * MIB
+    assert budget.peak() == budget.peaks["large"]
+    assert budget.exceeded()
+    summary = budget.summary()
+    assert summary.startswith("Memory peak") and "4 MiB budget" in summary and "large" in summary
+
+
+def test_concurrent_budgets_share_tracing(no_tracing):
+    first, second = MemoryBudget(), MemoryBudget()
+    first.start()
+    second.start()
+    first.stop()
+    assert tracemalloc.is_tracing()
+    second.stop()
+    assert not tracemalloc.is_tracing()
+
+
+def test_budget_leaves_foreign_tracing_running(no_tracing):
+    tracemalloc.start()
+    try:
+        with MemoryBudget():
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_snapshot_estimate_grows_with_the_neighbourhood():
+    assert snapshot_bytes() == snapshot_bytes(4) == CELL_SNAPSHOT_BYTES
+    counts = [neighbour_count(neighbourhood) for neighbourhood in NEIGHBOURHOODS]
+    assert counts == [8, 4, 24, 48, 80, 120]
+    assert snapshot_bytes(120) == 15 * CELL_SNAPSHOT_BYTES
@@ -0,0 +1,123 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..CreateGridPlugin_adjacency import NO_NEIGHBOUR
+from ..CreateGridPlugin_engine import ADJACENCY_FIELDS
+from ..CreateGridPlugin_labels import encode_label
+from ..CreateGridPlugin_neighbourhood import (
+    LIST_FIELD,
+    NEIGHBOURHOODS,
+    CellLookup,
+    lookup_neighbour_values,
+    neighbour_values,
+    neighbourhood_fields,
+    neighbourhood_offsets,
+    neighbourhood_table,
+    ring_size,
+)
+
+N_ROWS, N_COLS = 9, 11
+LABELS = [encode_label(row, col) for row in range(N_ROWS) for col in range(N_COLS)]
+
+
+def expected_neighbours(row, col, row_offsets, col_offsets, n_rows=N_ROWS, n_cols=N_COLS):
+    """The labels around a cell of a full N_ROWS x N_COLS grid, "" outside the grid."""
+    return [encode_label(row + dr, col + dc) if 0 <= row + dr < n_rows and 0 <= col + dc < n_cols else ""
+            for dr, dc in zip(row_offsets.tolist(), col_offsets.tolist())]
+
+
+def test_ring_size():
+    assert [ring_size(neighbourhood) for neighbourhood in NEIGHBOURHOODS] == [None, None, 2, 3, 4, 5]
+    with pytest.raises(ValueError):
+        ring_size("ring6")
+
+
+@pytest.mark.parametrize("k", [2, 3, 4, 5])
+def test_ring_offsets(k):
+    row_offsets, col_offsets = neighbourhood_offsets(f"ring{k}")
+    offsets = list(zip(row_offsets.tolist(), col_offsets.tolist()))
+    assert len(offsets) == len(set(offsets)) == (2 * k + 1) ** 2 - 1
+    assert (0, 0) not in offsets
+    assert max(max(abs(dr), abs(dc)) for dr, dc in offsets) == k
+    # Row by row from the top left
+    assert offsets == sorted(offsets)
+    fields = neighbourhood_fields(f"ring{k}")
+    assert len(fields) == len(offsets)
+    assert fields[0] == f"N_m{k}_m{k}" and fields[-1] == f"N_p{k}_p{k}"
+    assert "N_m1_p0" in fields and "N_p0_m1" in fields
+
+
+def test_four_and_eight_follow_their_fields():
+    assert neighbourhood_fields("8") == ADJACENCY_FIELDS
+    assert neighbourhood_fields("4") == ["Left", "Top", "Right", "Bottom"]
+    row_offsets, col_offsets = neighbourhood_offsets("4")
+    assert list(zip(row_offsets.tolist(), col_offsets.tolist())) == [(0, -1), (-1, 0), (0, 1), (1, 0)]
+    assert neighbourhood_fields("ring3", as_list=True) == [LIST_FIELD]
+
+
+@pytest.mark.parametrize("neighbourhood", NEIGHBOURHOODS)
+def test_table_matches_offsets(neighbourhood):
+    row_offsets, col_offsets = neighbourhood_offsets(neighbourhood)
+    table = neighbourhood_table(LABELS, neighbourhood, chunk_size=17)
+    values = neighbour_values(table)
+    for cell, label in enumerate(LABELS):
+        row, col = divmod(cell, N_COLS)
+        assert values[cell] == expected_neighbours(row, col, row_offsets, col_offsets)
+
+
+def test_edge_cells():
+    table = neighbourhood_table(LABELS, "ring2")
+    row_offsets, col_offsets = neighbourhood_offsets("ring2")
+    corner = table.neighbours[LABELS.index("A1")]
+    inside = (row_offsets >= 0) & (col_offsets >= 0)
+    assert (corner[~inside] == NO_NEIGHBOUR).all()
+    assert (corner[inside] >= 0).all() and inside.sum() == 8
+    # The centre cell of a 5 x 5 block sees all 24 cells
+    assert (table.neighbours[LABELS.index(encode_label(4, 5))] >= 0).all()
+
+
+def test_missing_and_empty_cells():
+    labels = list(LABELS)
+    labels[LABELS.index("B2")] = ""
+    table = neighbourhood_table(labels, "8")
+    assert "B2" not in table.neighbour_labels(LABELS.index("A1"))
+    assert table.neighbour_labels(LABELS.index("A1")) == ["", "", "", "", "B1", "", "A2", ""]
+    assert (table.neighbours[LABELS.index("B2")] == NO_NEIGHBOUR).all()
+
+
+def test_list_field_output():
+    table = neighbourhood_table(LABELS, "4")
+    values = neighbour_values(table, as_list=True)
+    assert values[LABELS.index("A1")] == ["B1,A2"]
+    assert values[LABELS.index("B2")] == ["A2,B1,C2,B3"]
+    assert all(len(value) == 1 for value in values)
+    single = neighbour_values(neighbourhood_table(["C3"], "ring2"), as_list=True)
+    assert single == [[""]]
+
+
+def test_lookup_of_another_label_set():
+    lookup = CellLookup(LABELS)
+    chunk = LABELS[20:35]
+    assert lookup_neighbour_values(chunk, lookup, "ring3", chunk_size=4) == \
+        neighbour_values(neighbourhood_table(LABELS, "ring3"))[20:35]
+    assert lookup_neighbour_values(chunk, lookup, "4", as_list=True) == \
+        neighbour_values(neighbourhood_table(LABELS, "4"), as_list=True)[20:35]
+
+
+@pytest.mark.parametrize("labels", [
+    LABELS,
+    # Sparse: few cells spread over a huge row and column range
+    ["A1", "B1", "A2", "ZZZ1", "ZZZ2", "A900000", "B900001"],
+])
+def test_lookup_dense_and_sparse(labels):
+    lookup = CellLookup(labels + ["", labels[1]])
+    assert lookup.dense == (labels is LABELS)
+    for cell, label in enumerate(labels):
+        row, col = lookup.rows[cell], lookup.cols[cell]
+        assert lookup.find([row], [col]).tolist() == [cell]
+    assert lookup.find([-1, 0, lookup.n_rows], [0, -1, 0]).tolist() == [NO_NEIGHBOUR] * 3
+    # The first of duplicate labels wins and empty labels are no cells
+    assert lookup.find([lookup.rows[1]], [lookup.cols[1]]).tolist() == [1]
+    assert lookup.find_range(0, 0, 2).tolist() == [0, 1]
+    assert lookup.find_range(0, -5, 0).tolist() == []
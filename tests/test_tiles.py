@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..CreateGridPlugin_engine import build_cells, grid_dimensions
+from ..CreateGridPlugin_tiles import build_tile, load_tile, process_pool, tile_bands, tile_jobs
+
+BOUNDS = (0.0, 0.0, 23.0, 17.0)
+LENGTH, WIDTH = 1.5, 2.0
+
+
+def checkerboard_mask():
+    n_rows, n_cols = grid_dimensions(*BOUNDS, LENGTH, WIDTH)
+    rows, cols = np.indices((n_rows, n_cols))
+    return (rows * 3 + cols) % 4 != 0
+
+
+def merge_tiles(tiles):
+    """Concatenate loaded tiles in row order, the way the plugin adds them."""
+    labels, wkb_list, neighbours = [], [], [[] for _ in range(8)]
+    for tile_labels, tile_wkb, tile_neighbours in tiles:
+        labels += tile_labels
+        wkb_list += tile_wkb
+        for values, tile_values in zip(neighbours, tile_neighbours):
+            values += tile_values
+    return labels, wkb_list, neighbours
+
+
+def tiled_cells(tmp_path, cell_mask, workers, chunk_size=None):
+    n_rows, n_cols = grid_dimensions(*BOUNDS, LENGTH, WIDTH)
+    bands = tile_bands(n_rows, n_cols, workers, chunk_size)
+    jobs = tile_jobs(BOUNDS, LENGTH, WIDTH, bands, cell_mask, str(tmp_path))
+    return bands, merge_tiles(load_tile(build_tile(job)) for job in jobs)
+
+
+def test_bands_cover_the_grid():
+    for n_rows, n_cols, workers, chunk_size in [(1, 5, 4, None), (12, 10, 1, None), (100, 7, 3, 20), (9, 50, 2, 10)]:
+        bands = tile_bands(n_rows, n_cols, workers, chunk_size)
+        assert bands[0][0] == 0 and bands[-1][1] == n_rows
+        assert all(stop == start for (_, stop), (start, _) in zip(bands, bands[1:]))
+        assert all(start < stop for start, stop in bands)
+        if chunk_size:
+            assert all((stop - start) * n_cols <= max(chunk_size, n_cols) for start, stop in bands)
+
+
+@pytest.mark.parametrize("masked", [False, True])
+@pytest.mark.parametrize("workers, chunk_size", [(1, None), (3, None), (2, 13)])
+def test_tiles_match_single_pass(tmp_path, masked, workers, chunk_size):
+    cell_mask = checkerboard_mask() if masked else None
+    bands, tiled = tiled_cells(tmp_path, cell_mask, workers, chunk_size)
+    assert len(bands) > 1
+    assert tiled == build_cells(*BOUNDS, LENGTH, WIDTH, cell_mask=cell_mask)
+    # load_tile deletes each tile file once read
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_tiles_from_process_pool(tmp_path):
+    n_rows, n_cols = grid_dimensions(*BOUNDS, LENGTH, WIDTH)
+    jobs = tile_jobs(BOUNDS, LENGTH, WIDTH, tile_bands(n_rows, n_cols, 2), checkerboard_mask(), str(tmp_path))
+    with process_pool(2) as pool:
+        paths = list(pool.map(build_tile, jobs))
+    assert merge_tiles(load_tile(path) for path in paths) == \
+        build_cells(*BOUNDS, LENGTH, WIDTH, cell_mask=checkerboard_mask())